@@ -0,0 +1,233 @@
+"""
+Management command to purge stale rows: expired sessions, abandoned carts
+and used or old email verification tokens.
+Deletes in small primary-key chunks, each in its own short transaction, so it
+can run from cron next to live traffic. Progress is saved to a state file so a
+run stopped by --max-seconds resumes where it left off.
+"""
+import json
+import os
+import tempfile
+import time
+from datetime import timedelta
+
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Max, Q
+from django.utils import timezone
+
+from accounts.models import EmailVerificationToken
+from cart.models import Cart, CartItem
+from cart.utils import invalidate_cart_summary
+
+
+class Command(BaseCommand):
+    help = 'Delete expired sessions, abandoned carts and stale verification tokens in small chunks'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Count what would be deleted without deleting anything',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=1000,
+            help='Primary-key range (or number of sessions) handled per chunk',
+        )
+        parser.add_argument(
+            '--max-seconds',
+            type=float,
+            default=0,
+            help='Stop after this many seconds and resume on the next run (0 = no limit)',
+        )
+        parser.add_argument(
+            '--pause',
+            type=float,
+            default=0,
+            help='Seconds to sleep between chunks',
+        )
+        parser.add_argument(
+            '--cart-days',
+            type=int,
+            default=90,
+            help='Delete carts untouched for this many days',
+        )
+        parser.add_argument(
+            '--token-days',
+            type=int,
+            default=7,
+            help='Delete unused verification tokens older than this many days',
+        )
+        parser.add_argument(
+            '--state-file',
+            default=os.path.join(tempfile.gettempdir(), 'makola_purge_stale_data.json'),
+            help='Where progress is saved between runs',
+        )
+        parser.add_argument(
+            '--restart',
+            action='store_true',
+            help='Ignore saved progress and start from the beginning',
+        )
+
+    def handle(self, *args, **options):
+        self.dry_run = options['dry_run']
+        self.chunk_size = options['chunk_size']
+        self.pause = options['pause']
+        self.state_file = options['state_file']
+        self.deadline = time.monotonic() + options['max_seconds'] if options['max_seconds'] else None
+        self.state = {} if options['restart'] or self.dry_run else self._load_state()
+        self.removed = {}
+
+        now = timezone.now()
+        if self.dry_run:
+            self.stdout.write(self.style.WARNING('DRY RUN - nothing will be deleted'))
+
+        finished = (
+            self._purge_sessions(now)
+            and self._purge_carts(now - timedelta(days=options['cart_days']))
+            and self._purge_tokens(now - timedelta(days=options['token_days']))
+        )
+
+        if not self.dry_run:
+            self._save_state({} if finished else self.state)
+
+        verb = 'Would remove' if self.dry_run else 'Removed'
+        for table, count in self.removed.items():
+            self.stdout.write(f'{verb} {count} rows from {table}')
+        if finished:
+            self.stdout.write(self.style.SUCCESS('Purge complete'))
+        else:
+            self.stdout.write(self.style.WARNING('Time budget used up; the next run resumes from here'))
+
+    def _purge_sessions(self, now):
+        table = Session._meta.db_table
+        self.removed.setdefault(table, 0)
+        last_key = self.state.get(table, '')
+        expired = Session.objects.filter(expire_date__lt=now).order_by('session_key')
+        while True:
+            if self._out_of_time():
+                self.state[table] = last_key
+                return False
+            keys = list(expired.filter(session_key__gt=last_key).values_list('session_key', flat=True)[:self.chunk_size])
+            if not keys:
+                self.state.pop(table, None)
+                return True
+            if not self.dry_run:
+                Session.objects.filter(session_key__in=keys).delete()
+            self.removed[table] += len(keys)
+            last_key = keys[-1]
+            self._sleep()
+
+    def _purge_carts(self, cutoff):
+        stale = Cart.objects.filter(updated_at__lt=cutoff).exclude(items__updated_at__gte=cutoff)
+        stale_carts = Cart.objects.filter(updated_at__lt=cutoff).order_by().values('id')
+        fresh_item_carts = CartItem.objects.filter(updated_at__gte=cutoff).order_by().values('cart_id')
+        self._count(Cart, 0)
+        self._count(CartItem, 0)
+
+        def delete(start, end):
+            chunk = stale.filter(id__gte=start, id__lt=end)
+            if self.dry_run:
+                self._count(CartItem, CartItem.objects.filter(cart__in=chunk).count())
+                self._count(Cart, chunk.count())
+                return
+            with transaction.atomic():
+                # Locked, so a cart can't be touched between this check and the delete
+                carts = list(chunk.select_for_update().values_list('id', 'user_id'))
+                if not carts:
+                    return
+                cart_ids = [cart_id for cart_id, user_id in carts]
+                # Plain SQL: the ORM would load every row to send per-item delete signals.
+                # Both deletes repeat the staleness predicate, since SQLite ignores the row
+                # lock and item writes do not touch the cart's updated_at
+                self._count(CartItem, self._delete_in(
+                    CartItem, 'cart_id', cart_ids,
+                    ('cart_id', 'IN', stale_carts),
+                    ('cart_id', 'NOT IN', fresh_item_carts),
+                ))
+                self._count(Cart, self._delete_in(
+                    Cart, 'id', cart_ids,
+                    ('id', 'IN', stale_carts),
+                    ('id', 'NOT IN', CartItem.objects.order_by().values('cart_id')),
+                ))
+            for cart_id, user_id in carts:
+                invalidate_cart_summary(user_id)
+
+        return self._purge_by_id_range(Cart, delete)
+
+    def _purge_tokens(self, cutoff):
+        stale = EmailVerificationToken.objects.filter(Q(is_used=True) | Q(created_at__lt=cutoff))
+
+        def delete(start, end):
+            matching = stale.filter(id__gte=start, id__lt=end)
+            if self.dry_run:
+                self._count(EmailVerificationToken, matching.count())
+            else:
+                deleted, per_model = matching.delete()
+                self._count(EmailVerificationToken, deleted)
+
+        return self._purge_by_id_range(EmailVerificationToken, delete)
+
+    def _purge_by_id_range(self, model, delete):
+        """Call delete(start, end) for consecutive id ranges of chunk_size up to the max id."""
+        table = model._meta.db_table
+        self.removed.setdefault(table, 0)
+        start = self.state.get(table, 0)
+        max_id = model.objects.aggregate(max_id=Max('id'))['max_id'] or 0
+        while start <= max_id:
+            if self._out_of_time():
+                self.state[table] = start
+                return False
+            end = start + self.chunk_size
+            delete(start, end)
+            start = end
+            self._sleep()
+        self.state.pop(table, None)
+        return True
+
+    def _delete_in(self, model, column, values, *conditions):
+        """
+        DELETE rows whose column is in values and that match every
+        (column, 'IN' or 'NOT IN', queryset) subquery condition.
+        """
+        quote = connection.ops.quote_name
+        table = quote(model._meta.db_table)
+        placeholders = ', '.join(['%s'] * len(values))
+        sql = f'DELETE FROM {table} WHERE {quote(column)} IN ({placeholders})'
+        params = list(values)
+        for condition_column, operator, queryset in conditions:
+            subquery, subquery_params = queryset.query.sql_with_params()
+            sql += f' AND {quote(condition_column)} {operator} ({subquery})'
+            params.extend(subquery_params)
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return cursor.rowcount
+
+    def _count(self, model, count):
+        table = model._meta.db_table
+        self.removed[table] = self.removed.get(table, 0) + count
+
+    def _out_of_time(self):
+        return self.deadline is not None and time.monotonic() >= self.deadline
+
+    def _sleep(self):
+        if self.pause:
+            time.sleep(self.pause)
+
+    def _load_state(self):
+        try:
+            with open(self.state_file) as state_file:
+                return json.load(state_file)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_state(self, state):
+        if not state:
+            if os.path.exists(self.state_file):
+                os.remove(self.state_file)
+            return
+        with open(self.state_file, 'w') as state_file:
+            json.dump(state, state_file)
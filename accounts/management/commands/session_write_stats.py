@@ -0,0 +1,54 @@
+"""
+Management command to show session writes per minute.
+Reports saves caused by modified data, expiry refreshes and saves avoided
+by ThrottledSessionMiddleware.
+"""
+from datetime import datetime
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.middleware import AVOIDED, MODIFIED, REFRESHED, get_session_write_stats, stats_cache_is_shared
+
+
+class Command(BaseCommand):
+    help = 'Show session writes and writes avoided per minute'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--minutes',
+            type=int,
+            default=15,
+            help='Number of recent minutes to show (counters are kept for two hours)',
+        )
+
+    def handle(self, *args, **options):
+        if not stats_cache_is_shared():
+            raise CommandError(
+                f"The default cache ({settings.CACHES['default']['BACKEND']}) is private to each process, "
+                f"so this command cannot see the web workers' counters. "
+                f"Set REDIS_URL or run with DEBUG=False to use a shared cache."
+            )
+        stats = get_session_write_stats(options['minutes'])
+
+        self.stdout.write(f'{"minute":<8} {"modified":>9} {"refreshed":>10} {"avoided":>8}')
+        totals = dict.fromkeys((MODIFIED, REFRESHED, AVOIDED), 0)
+        for timestamp, counts in stats:
+            self.stdout.write(
+                f'{datetime.fromtimestamp(timestamp):%H:%M}    '
+                f'{counts[MODIFIED]:>9} {counts[REFRESHED]:>10} {counts[AVOIDED]:>8}'
+            )
+            for kind in totals:
+                totals[kind] += counts[kind]
+
+        decisions = sum(totals.values())
+        if not decisions:
+            self.stdout.write(self.style.WARNING(
+                f'No session activity recorded (workers flush counters to the cache every '
+                f'{settings.SESSION_STATS_FLUSH_INTERVAL}s)'
+            ))
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f'{totals[AVOIDED]} of {decisions} session saves avoided '
+            f'({totals[AVOIDED] * 100 // decisions}%)'
+        ))
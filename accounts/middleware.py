@@ -0,0 +1,137 @@
+"""
+Session middleware that refreshes session expiry lazily.
+
+Replaces django.contrib.sessions.middleware.SessionMiddleware (with
+SESSION_SAVE_EVERY_REQUEST = False). Sessions are written when their data
+changes, or when a request reads a session whose remaining lifetime has
+dropped below SESSION_REFRESH_THRESHOLD (a fraction of SESSION_COOKIE_AGE).
+Active visitors therefore keep a sliding expiry, at roughly one write per
+(1 - threshold) * SESSION_COOKIE_AGE instead of one per request.
+
+Per-minute counters of written, refreshed and skipped saves are kept in
+process memory and flushed to the default cache at most once per
+SESSION_STATS_FLUSH_INTERVAL seconds, so counting adds no per-request cache
+write. Each flush is stored under its own key claimed with cache.add(), so
+concurrent workers never overwrite each other's counts. See the
+session_write_stats command; the counters can only be read from another
+process when the cache is shared (Redis or the database cache), not with the
+per-process LocMemCache used in development.
+"""
+import atexit
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.sessions.middleware import SessionMiddleware
+from django.core.cache import cache
+
+REFRESHED_AT_KEY = '_session_refreshed_at'
+
+MODIFIED = 'modified'
+REFRESHED = 'refreshed'
+AVOIDED = 'avoided'
+STAT_KINDS = (MODIFIED, REFRESHED, AVOIDED)
+STATS_RETENTION = 2 * 60 * 60
+# Flush slots read per cache round trip by get_session_write_stats()
+STATS_SLOT_BATCH = 50
+# Cache backends whose contents are private to one process
+PROCESS_LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+_pending = {}  # {minute: {kind: count}} not yet flushed
+_next_slot = {}  # {minute: first flush slot that may be free}
+_lock = threading.Lock()
+_last_flush = time.monotonic()
+
+
+def _stats_key(minute, slot):
+    return f'makola:session-writes:{minute}:{slot}'
+
+
+def stats_cache_is_shared():
+    """Whether counters recorded by web workers are visible to other processes."""
+    return settings.CACHES['default']['BACKEND'] not in PROCESS_LOCAL_CACHES
+
+
+def record_session_write(kind):
+    """Count one session save decision for the current minute, flushing when due."""
+    global _last_flush
+    minute = int(time.time() // 60)
+    interval = getattr(settings, 'SESSION_STATS_FLUSH_INTERVAL', 60)
+    with _lock:
+        _pending.setdefault(minute, dict.fromkeys(STAT_KINDS, 0))[kind] += 1
+        if time.monotonic() - _last_flush < interval:
+            return
+        _last_flush = time.monotonic()
+    flush_session_write_stats()
+
+
+def flush_session_write_stats():
+    """Write this process's pending counters to the cache, one new key per minute."""
+    with _lock:
+        pending = dict(_pending)
+        _pending.clear()
+    current = int(time.time() // 60)
+    for minute, counts in pending.items():
+        slot = _next_slot.get(minute, 0)
+        # add() only succeeds on a free key, so concurrent flushes take different slots
+        while not cache.add(_stats_key(minute, slot), counts, STATS_RETENTION):
+            slot += 1
+        _next_slot[minute] = slot + 1
+    for minute in [minute for minute in _next_slot if minute < current]:
+        del _next_slot[minute]
+
+
+atexit.register(flush_session_write_stats)
+
+
+def get_session_write_stats(minutes=15):
+    """Return [(minute_start_timestamp, {kind: count}), ...] for recent minutes, oldest first."""
+    current = int(time.time() // 60)
+    minute_range = range(current - minutes + 1, current + 1)
+    stats = {minute: dict.fromkeys(STAT_KINDS, 0) for minute in minute_range}
+    # Slots are claimed in order, so keep reading a minute while its last slot is taken
+    start, minutes_left = 0, list(minute_range)
+    while minutes_left:
+        slots = range(start, start + STATS_SLOT_BATCH)
+        keys = {_stats_key(minute, slot): (minute, slot) for minute in minutes_left for slot in slots}
+        found = cache.get_many(list(keys))
+        full = set()
+        for key, counts in found.items():
+            minute, slot = keys[key]
+            for kind in STAT_KINDS:
+                stats[minute][kind] += counts.get(kind, 0)
+            if slot == slots[-1]:
+                full.add(minute)
+        minutes_left = [minute for minute in minutes_left if minute in full]
+        start += STATS_SLOT_BATCH
+    return [(minute * 60, stats[minute]) for minute in minute_range]
+
+
+class ThrottledSessionMiddleware(SessionMiddleware):
+    """SessionMiddleware that only extends expiry when it is running low."""
+
+    def process_response(self, request, response):
+        session = getattr(request, 'session', None)
+        if session is not None and session.accessed and not session.is_empty():
+            if session.modified:
+                session[REFRESHED_AT_KEY] = int(time.time())
+                record_session_write(MODIFIED)
+            elif self._needs_refresh(session):
+                # Marking the session modified makes SessionMiddleware save it and re-send the cookie
+                session[REFRESHED_AT_KEY] = int(time.time())
+                record_session_write(REFRESHED)
+            else:
+                record_session_write(AVOIDED)
+        return super().process_response(request, response)
+
+    def _needs_refresh(self, session):
+        refreshed_at = session.get(REFRESHED_AT_KEY)
+        if refreshed_at is None:
+            return True
+        age = session.get_expiry_age()
+        remaining = refreshed_at + age - time.time()
+        return remaining < age * getattr(settings, 'SESSION_REFRESH_THRESHOLD', 0.5)
@@ -6,8 +6,9 @@ from django.contrib.auth import login, logout
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.utils.crypto import get_random_string
-from django.core.mail import send_mail
+from django.db import transaction
 from django.conf import settings
+from store.outbox import enqueue_email
 from .forms import UserRegistrationForm, UserProfileForm
 from .models import User, EmailVerificationToken
 
@@ -20,21 +21,20 @@ def register_view(request):
     if request.method == 'POST':
         form = UserRegistrationForm(request.POST)
         if form.is_valid():
-            user = form.save()
-            
-            # Create email verification token
-            token = get_random_string(64)
-            EmailVerificationToken.objects.create(user=user, token=token)
-            
-            # Send verification email
-            verification_url = f"{settings.SITE_URL}/accounts/verify-email/{token}/"
-            send_mail(
-                'Verify your email - Makola Marketplace',
-                f'Please click the following link to verify your email: {verification_url}',
-                settings.DEFAULT_FROM_EMAIL,
-                [user.email],
-                fail_silently=False,
-            )
+            with transaction.atomic():
+                user = form.save()
+                
+                # Create email verification token
+                token = get_random_string(64)
+                EmailVerificationToken.objects.create(user=user, token=token)
+                
+                # Queue verification email (delivered by send_outbox)
+                verification_url = f"{settings.SITE_URL}/accounts/verify-email/{token}/"
+                enqueue_email(
+                    'Verify your email - Makola Marketplace',
+                    f'Please click the following link to verify your email: {verification_url}',
+                    [user.email],
+                )
             
             messages.success(request, 'Registration successful! Please check your email to verify your account.')
             return redirect('accounts:login')
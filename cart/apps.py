@@ -9,6 +9,9 @@ class CartConfig(AppConfig):
     name = 'cart'
     verbose_name = 'Cart'
 
+    def ready(self):
+        from . import signals  # noqa: F401
+
 
 
 
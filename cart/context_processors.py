@@ -1,23 +1,25 @@
 """
 Context processors for cart app.
 """
-from .utils import get_cart
+from django.utils.functional import SimpleLazyObject
+
+from .models import Cart
+from .services import get_cart_service
 
 
 def cart(request):
     """
     Add cart information to template context.
     """
-    cart_obj = get_cart(request)
-    return {
-        'cart': cart_obj,
-        'cart_total': cart_obj.get_total() if cart_obj else 0,
-        'cart_item_count': cart_obj.get_item_count() if cart_obj else 0,
-    }
-
-
-
-
-
+    summary = get_cart_service(request).summary()
 
+    def existing_cart():
+        if request.user.is_authenticated:
+            return Cart.objects.filter(user=request.user).first()
+        return None
 
+    return {
+        'cart': SimpleLazyObject(existing_cart),
+        'cart_total': summary['total'],
+        'cart_item_count': summary['item_count'],
+    }
@@ -0,0 +1,124 @@
+"""
+Management command to stress cart mutations with concurrent requests.
+Fires parallel add/update calls at one product in one cart against the
+configured database and checks that no update is lost and stock is never
+exceeded. Everything it creates is deleted afterwards.
+"""
+import random
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from types import SimpleNamespace
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, connection
+
+from accounts.models import User
+from cart.models import CartItem
+from cart.services import CartService
+from products.models import Product
+
+
+class Command(BaseCommand):
+    help = 'Run parallel cart add/update calls against the database and verify cart invariants'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--calls',
+            type=int,
+            default=200,
+            help='Number of calls per phase',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=16,
+            help='Number of parallel threads',
+        )
+        parser.add_argument(
+            '--stock',
+            type=int,
+            default=50,
+            help='Stock quantity of the test product',
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=None,
+            help='Random seed for the mixed phase',
+        )
+
+    def handle(self, *args, **options):
+        calls, workers, stock = options['calls'], options['workers'], options['stock']
+        rng = random.Random(options['seed'])
+        token = uuid.uuid4().hex[:12]
+
+        user = User.objects.create_user(
+            username=f'concurrency-{token}',
+            email=f'concurrency-{token}@example.invalid',
+            password=None,
+        )
+        product = Product.objects.create(
+            name=f'Concurrency check {token}',
+            slug=f'concurrency-check-{token}',
+            description='Temporary product created by cart_concurrency_check',
+            price=Decimal('1.00'),
+            stock_quantity=stock,
+        )
+        self.stdout.write(f'Running {calls} calls per phase on {workers} threads ({connection.vendor}, stock {stock})...')
+
+        failures = []
+        try:
+            # Phase 1: every call adds one; exactly min(calls, stock) may succeed
+            results = self._run(workers, [('add', 1)] * calls, user, product)
+            succeeded = sum(1 for ok, error in results if ok)
+            errors = sum(1 for ok, error in results if error)
+            quantity = self._quantity(user, product, failures)
+            self.stdout.write(f'Adds: {succeeded} succeeded, {errors} database errors, final quantity {quantity}')
+            if quantity != succeeded:
+                failures.append(f'lost update: {succeeded} successful adds but quantity is {quantity}')
+            if not errors and succeeded != min(calls, stock):
+                failures.append(f'expected {min(calls, stock)} successful adds, got {succeeded}')
+
+            # Phase 2: a random mix of adds and absolute updates
+            operations = [
+                ('add', rng.randint(1, 3)) if rng.random() < 0.5 else ('update', rng.randint(1, stock))
+                for _ in range(calls)
+            ]
+            results = self._run(workers, operations, user, product)
+            errors = sum(1 for ok, error in results if error)
+            quantity = self._quantity(user, product, failures)
+            self.stdout.write(f'Mixed: {errors} database errors, final quantity {quantity}')
+        finally:
+            product.delete()
+            user.delete()
+
+        if quantity is not None and quantity > stock:
+            failures.append(f'stock exceeded: quantity {quantity} > stock {stock}')
+        if failures:
+            raise CommandError('Invariant violated: ' + '; '.join(failures))
+        self.stdout.write(self.style.SUCCESS('All cart invariants held'))
+
+    def _run(self, workers, operations, user, product):
+        def call(operation):
+            action, quantity = operation
+            service = CartService(SimpleNamespace(user=user, session={}))
+            try:
+                if action == 'add':
+                    ok, message = service.add(product.id, quantity)
+                else:
+                    ok, message = service.update(product.id, quantity)
+                return ok, None
+            except DatabaseError as exc:
+                return False, exc
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(call, operations))
+
+    def _quantity(self, user, product, failures):
+        rows = list(CartItem.objects.filter(cart__user=user, product=product).values_list('quantity', flat=True))
+        if len(rows) > 1:
+            failures.append(f'{len(rows)} cart rows for one product')
+        return sum(rows) if rows else 0
@@ -0,0 +1,43 @@
+"""
+Management command to reprice cart items after product price changes.
+Processes products queued because their price change touched too many cart
+items to reprice inline; --all reprices every product found in a cart.
+"""
+from django.core.management.base import BaseCommand
+
+from cart.models import CartItem
+from cart.repricing import process_pending_repricing, reprice_cart_items
+
+
+class Command(BaseCommand):
+    help = 'Update cart item prices for products whose price changed'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Reprice items of every product in any cart, not just queued ones',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Number of products per UPDATE',
+        )
+
+    def handle(self, *args, **options):
+        if options['all']:
+            self.stdout.write('Repricing all cart items...')
+            product_ids = CartItem.objects.order_by().values_list('product_id', flat=True).distinct()
+            log = reprice_cart_items(product_ids, batch_size=options['batch_size'], deferred=True)
+            logs = [log] if log else []
+        else:
+            self.stdout.write('Repricing queued products...')
+            logs = process_pending_repricing(batch_size=options['batch_size'])
+
+        if not logs:
+            self.stdout.write(self.style.WARNING('No cart items needed repricing'))
+            return
+        items = sum(log.item_count for log in logs)
+        carts = sum(log.cart_count for log in logs)
+        self.stdout.write(self.style.SUCCESS(f'Repriced {items} cart items in {carts} carts'))
@@ -0,0 +1,17 @@
+"""
+Middleware for cart app.
+"""
+
+
+class GuestCartMiddleware:
+    """Write the cookies requested by the guest cart storage."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        storage = getattr(request, '_guest_cart_storage', None)
+        if storage is not None:
+            storage.process_response(response)
+        return response
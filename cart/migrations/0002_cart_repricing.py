@@ -0,0 +1,42 @@
+# Generated by Django 4.2.30 on 2026-10-18 07:18
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0006_product_recommendations'),
+        ('cart', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CartRepriceLog',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('product_count', models.PositiveIntegerField(default=0, verbose_name='products')),
+                ('item_count', models.PositiveIntegerField(default=0, verbose_name='cart items updated')),
+                ('cart_count', models.PositiveIntegerField(default=0, verbose_name='carts changed')),
+                ('deferred', models.BooleanField(default=False, verbose_name='deferred')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='created at')),
+            ],
+            options={
+                'verbose_name': 'cart reprice log',
+                'verbose_name_plural': 'cart reprice logs',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='PendingCartReprice',
+            fields=[
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='+', serialize=False, to='products.product', verbose_name='product')),
+                ('requested_at', models.DateTimeField(auto_now=True, verbose_name='requested at')),
+            ],
+            options={
+                'verbose_name': 'pending cart reprice',
+                'verbose_name_plural': 'pending cart reprices',
+            },
+        ),
+    ]
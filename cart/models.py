@@ -73,8 +73,42 @@ class CartItem(models.Model):
         return self.price_at_addition * self.quantity
 
 
+class PendingCartReprice(models.Model):
+    """
+    A product whose price changed while too many cart items held it to
+    reprice inline; processed by the reprice_carts command.
+    """
+    product = models.OneToOneField(
+        'products.Product',
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='+',
+        verbose_name=_('product')
+    )
+    requested_at = models.DateTimeField(_('requested at'), auto_now=True)
 
+    class Meta:
+        verbose_name = _('pending cart reprice')
+        verbose_name_plural = _('pending cart reprices')
 
+    def __str__(self):
+        return f"Reprice carts for product {self.product_id}"
 
 
+class CartRepriceLog(models.Model):
+    """
+    One repricing pass: how many products, cart items and carts it changed.
+    """
+    product_count = models.PositiveIntegerField(_('products'), default=0)
+    item_count = models.PositiveIntegerField(_('cart items updated'), default=0)
+    cart_count = models.PositiveIntegerField(_('carts changed'), default=0)
+    deferred = models.BooleanField(_('deferred'), default=False)
+    created_at = models.DateTimeField(_('created at'), auto_now_add=True)
 
+    class Meta:
+        verbose_name = _('cart reprice log')
+        verbose_name_plural = _('cart reprice logs')
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"Repriced {self.item_count} items in {self.cart_count} carts"
@@ -0,0 +1,97 @@
+"""
+Repricing of cart items after product price changes.
+
+CartItem.price_at_addition follows the product's current price. A price
+change is applied to every affected cart item with one set-based UPDATE per
+batch of products (a CASE over product ids). Small changes run inline;
+when more than CART_REPRICE_INLINE_LIMIT cart items are affected the products
+are queued in PendingCartReprice for the reprice_carts command.
+"""
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, DecimalField, Value, When
+from django.utils import timezone
+
+from products.models import Product
+
+from .models import CartItem, CartRepriceLog, PendingCartReprice
+from .utils import invalidate_cart_summary
+
+
+def reprice_cart_items(product_ids, batch_size=500, deferred=False):
+    """
+    Set price_at_addition to the current price on every cart item of the
+    given products. Returns a CartRepriceLog, or None if nothing changed.
+    """
+    prices = list(Product.objects.filter(id__in=list(product_ids)).values_list('id', 'price'))
+    log = CartRepriceLog(product_count=len(prices), deferred=deferred)
+    now = timezone.now()
+    # A cart can hold products from several batches; count and invalidate it once
+    repriced_user_ids = set()
+
+    for start in range(0, len(prices), batch_size):
+        batch = prices[start:start + batch_size]
+        new_price = Case(
+            *[When(product_id=product_id, then=Value(price)) for product_id, price in batch],
+            output_field=DecimalField(max_digits=10, decimal_places=2)
+        )
+        stale = CartItem.objects.filter(
+            product_id__in=[product_id for product_id, price in batch]
+        ).exclude(price_at_addition=new_price)
+
+        user_ids = set(stale.order_by().values_list('cart__user_id', flat=True).distinct())
+        if not user_ids:
+            continue
+        log.item_count += stale.update(price_at_addition=new_price, updated_at=now)
+        repriced_user_ids |= user_ids
+
+    for user_id in repriced_user_ids:
+        invalidate_cart_summary(user_id)
+    if not log.item_count:
+        return None
+    log.cart_count = len(repriced_user_ids)
+    log.save()
+    return log
+
+
+def schedule_cart_repricing(product_ids):
+    """
+    Reprice cart items for products whose price changed: inline when at most
+    CART_REPRICE_INLINE_LIMIT cart items are affected, otherwise deferred.
+    """
+    product_ids = list(product_ids)
+    affected = CartItem.objects.filter(product_id__in=product_ids).count()
+    if not affected:
+        return None
+    if affected <= getattr(settings, 'CART_REPRICE_INLINE_LIMIT', 500):
+        return reprice_cart_items(product_ids)
+
+    PendingCartReprice.objects.bulk_create(
+        [PendingCartReprice(product_id=product_id, requested_at=timezone.now()) for product_id in product_ids],
+        update_conflicts=True,
+        unique_fields=['product'],
+        update_fields=['requested_at'],
+    )
+    return None
+
+
+def process_pending_repricing(batch_size=500):
+    """
+    Reprice queued products, batch by batch, until the queue is empty.
+    Returns the CartRepriceLogs written.
+    """
+    logs = []
+    while True:
+        with transaction.atomic():
+            product_ids = list(
+                PendingCartReprice.objects.select_for_update().order_by('requested_at').values_list(
+                    'product_id', flat=True
+                )[:batch_size]
+            )
+            if not product_ids:
+                return logs
+            # Dequeue before reading prices; a change made meanwhile queues the product again
+            PendingCartReprice.objects.filter(product_id__in=product_ids).delete()
+            log = reprice_cart_items(product_ids, batch_size=batch_size, deferred=True)
+        if log:
+            logs.append(log)
@@ -0,0 +1,423 @@
+"""
+Request-scoped cart service.
+
+get_cart_service(request) returns one CartService per request. It loads the
+cart lines at most once, derives totals and counts from them, and keeps them
+up to date as mutations are applied, so views, the context processor and
+AJAX responses share a single read.
+
+Writes to a user's cart are single conditional statements: quantities move
+with F() expressions and only while the result stays within stock, so
+concurrent requests (double clicks, several tabs) can neither lose an
+increment nor overshoot stock. On PostgreSQL an add is one
+INSERT ... ON CONFLICT DO UPDATE statement.
+"""
+from decimal import Decimal
+
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from products.models import Product
+
+from .models import Cart, CartItem
+from .storage import get_guest_cart_storage
+from .utils import CartLine, get_cart_items, get_cart_summary, invalidate_cart_summary
+
+
+class CartService:
+    """
+    The current visitor's cart: a user's Cart rows or the guest cart storage.
+    """
+
+    def __init__(self, request):
+        self.request = request
+        self._lines = None
+
+    @property
+    def is_authenticated(self):
+        return self.request.user.is_authenticated
+
+    @property
+    def lines(self):
+        """Cart lines, loaded on first access."""
+        if self._lines is None:
+            self._lines = get_cart_items(self.request)
+        return self._lines
+
+    @property
+    def total(self):
+        return sum((line.subtotal for line in self.lines), Decimal('0.00'))
+
+    @property
+    def item_count(self):
+        return sum(line.quantity for line in self.lines)
+
+    def summary(self):
+        """Item count and total; reuses loaded lines, else the cached summary."""
+        if self._lines is not None:
+            return {'item_count': self.item_count, 'total': self.total}
+        return get_cart_summary(self.request)
+
+    def _find_line(self, product_id):
+        if self._lines is None:
+            return None
+        return next((line for line in self._lines if line.product.id == product_id), None)
+
+    def _set_line(self, product, quantity=0, price=None):
+        """Mirror a write into the loaded lines (no-op until they are loaded)."""
+        if self._lines is None:
+            return
+        current = self._find_line(product.id)
+        if current is not None:
+            index = self._lines.index(current)
+            if quantity > 0:
+                self._lines[index] = CartLine(product=product, quantity=quantity, price=current.price)
+            else:
+                del self._lines[index]
+        elif quantity > 0:
+            line = CartLine(product=product, quantity=quantity, price=price)
+            # Match get_cart_items ordering: newest first for users, insertion order for guests
+            if self.is_authenticated:
+                self._lines.insert(0, line)
+            else:
+                self._lines.append(line)
+
+    def _get_product(self, product_id):
+        line = self._find_line(product_id)
+        if line is not None:
+            return line.product
+        try:
+            return Product.objects.get(id=product_id, is_available=True)
+        except Product.DoesNotExist:
+            return None
+
+    def add(self, product_id, quantity=1):
+        """Add product to cart (works for both authenticated and guest users)."""
+        if quantity < 1:
+            return False, "Quantity must be positive"
+
+        product = self._get_product(product_id)
+        if product is None:
+            return False, "Product not found or unavailable"
+
+        if product.stock_quantity < quantity:
+            return False, f"Only {product.stock_quantity} items available in stock"
+
+        if self.is_authenticated:
+            cart, created = Cart.objects.get_or_create(user=self.request.user)
+            current = self._find_line(product.id)
+            new_quantity = (current.quantity if current else 0) + quantity
+            if connection.vendor == 'postgresql':
+                new_quantity = _upsert_item(cart, product, quantity)
+                added = new_quantity is not None
+            else:
+                added = _add_item(cart, product, quantity)
+            if not added:
+                return False, f"Only {product.stock_quantity} items available in stock"
+            invalidate_cart_summary(self.request.user.pk)
+            self._set_line(product, new_quantity, product.price)
+        else:
+            storage = get_guest_cart_storage(self.request)
+            guest_cart = storage.load()
+            product_key = str(product_id)
+
+            if product_key in guest_cart:
+                new_quantity = guest_cart[product_key]['quantity'] + quantity
+                if new_quantity > product.stock_quantity:
+                    return False, f"Only {product.stock_quantity} items available in stock"
+                guest_cart[product_key]['quantity'] = new_quantity
+            else:
+                guest_cart[product_key] = {
+                    'quantity': quantity,
+                    'price': str(product.price)
+                }
+
+            storage.save(guest_cart)
+            self._set_line(product, guest_cart[product_key]['quantity'], product.price)
+        return True, "Product added to cart"
+
+    def update(self, product_id, quantity):
+        """Update quantity of cart item."""
+        if quantity <= 0:
+            return self.remove(product_id)
+
+        product = self._get_product(product_id)
+        if product is None:
+            return False, "Product not found"
+
+        if product.stock_quantity < quantity:
+            return False, f"Only {product.stock_quantity} items available in stock"
+
+        if self.is_authenticated:
+            # A plain conditional write: setting an absolute quantity cannot lose updates
+            updated = CartItem.objects.filter(
+                cart__user=self.request.user,
+                product=product
+            ).update(quantity=quantity, updated_at=timezone.now())
+            if not updated:
+                return False, "Cart item not found"
+            invalidate_cart_summary(self.request.user.pk)
+            self._set_line(product, quantity)
+            return True, "Cart updated"
+
+        storage = get_guest_cart_storage(self.request)
+        guest_cart = storage.load()
+        product_key = str(product_id)
+        if product_key in guest_cart:
+            guest_cart[product_key]['quantity'] = quantity
+            storage.save(guest_cart)
+            self._set_line(product, quantity)
+            return True, "Cart updated"
+        return False, "Cart item not found"
+
+    def remove(self, product_id):
+        """Remove product from cart."""
+        if self.is_authenticated:
+            try:
+                cart_item = CartItem.objects.select_related('cart').get(
+                    cart__user=self.request.user,
+                    product_id=product_id
+                )
+            except CartItem.DoesNotExist:
+                return False, "Cart item not found"
+            cart_item.delete()
+        else:
+            storage = get_guest_cart_storage(self.request)
+            guest_cart = storage.load()
+            product_key = str(product_id)
+            if product_key not in guest_cart:
+                return False, "Cart item not found"
+            del guest_cart[product_key]
+            storage.save(guest_cart)
+
+        if self._lines is not None:
+            self._lines = [line for line in self._lines if line.product.id != product_id]
+        return True, "Product removed from cart"
+
+    def clear(self):
+        """Clear all items from cart."""
+        if self.is_authenticated:
+            CartItem.objects.filter(cart__user=self.request.user).delete()
+            invalidate_cart_summary(self.request.user.pk)
+        else:
+            get_guest_cart_storage(self.request).clear()
+        self._lines = []
+        return True
+
+    def add_many(self, operations):
+        """
+        Add many (product_id, quantity) pairs at once; quantities for a
+        repeated product are summed. Products are validated with one query and all writes happen in one
+        transaction (bulk_update for existing lines, bulk_create for new ones).
+        Returns one (product_id, success, message) result per operation;
+        invalid operations are reported and skipped.
+        """
+        requested = {}
+        for product_id, quantity in operations:
+            if quantity > 0:
+                requested[product_id] = requested.get(product_id, 0) + quantity
+        products = Product.objects.filter(is_available=True).in_bulk(list(requested))
+
+        if self.is_authenticated:
+            try:
+                accepted = self._add_many_to_user_cart(requested, products)
+            except IntegrityError:
+                # A concurrent request inserted one of the lines first; the retry sees it
+                accepted = self._add_many_to_user_cart(requested, products)
+            invalidate_cart_summary(self.request.user.pk)
+        else:
+            accepted = self._add_many_to_guest_cart(requested, products)
+        self._lines = None
+
+        results = []
+        for product_id, quantity in operations:
+            product = products.get(product_id)
+            if quantity <= 0:
+                results.append((product_id, False, "Quantity must be positive"))
+            elif product is None:
+                results.append((product_id, False, "Product not found or unavailable"))
+            elif product_id not in accepted:
+                results.append((product_id, False, f"Only {product.stock_quantity} items available in stock"))
+            else:
+                results.append((product_id, True, "Product added to cart"))
+        return results
+
+    def _add_many_to_user_cart(self, requested, products):
+        accepted = set()
+        now = timezone.now()
+        with transaction.atomic():
+            cart, created = Cart.objects.get_or_create(user=self.request.user)
+            existing = {
+                item.product_id: item
+                for item in CartItem.objects.select_for_update().filter(cart=cart, product_id__in=list(products))
+            }
+            to_update, to_create = [], []
+            for product_id, quantity in requested.items():
+                product = products.get(product_id)
+                if product is None:
+                    continue
+                item = existing.get(product_id)
+                new_quantity = quantity + (item.quantity if item else 0)
+                if new_quantity > product.stock_quantity:
+                    continue
+                if item:
+                    item.quantity = new_quantity
+                    item.updated_at = now
+                    to_update.append(item)
+                else:
+                    to_create.append(CartItem(
+                        cart=cart,
+                        product=product,
+                        quantity=quantity,
+                        price_at_addition=product.price
+                    ))
+                accepted.add(product_id)
+            CartItem.objects.bulk_update(to_update, ['quantity', 'updated_at'], batch_size=500)
+            CartItem.objects.bulk_create(to_create, batch_size=500)
+        return accepted
+
+    def _add_many_to_guest_cart(self, requested, products):
+        accepted = set()
+        storage = get_guest_cart_storage(self.request)
+        guest_cart = storage.load()
+        for product_id, quantity in requested.items():
+            product = products.get(product_id)
+            if product is None:
+                continue
+            product_key = str(product_id)
+            entry = guest_cart.get(product_key)
+            new_quantity = quantity + (entry['quantity'] if entry else 0)
+            if new_quantity > product.stock_quantity:
+                continue
+            if entry:
+                entry['quantity'] = new_quantity
+            else:
+                guest_cart[product_key] = {'quantity': quantity, 'price': str(product.price)}
+            accepted.add(product_id)
+        if accepted:
+            storage.save(guest_cart)
+        return accepted
+
+
+def _increment_item(cart, product, quantity):
+    """Add quantity to an existing line if the result stays within the product's current stock."""
+    return CartItem.objects.filter(
+        cart=cart,
+        product=product,
+        quantity__lte=F('product__stock_quantity') - quantity
+    ).update(quantity=F('quantity') + quantity, updated_at=timezone.now())
+
+
+def _add_item(cart, product, quantity):
+    """
+    Portable add: conditional increment, else insert, else (lost an insert
+    race) increment again. Returns False if stock would be exceeded.
+    """
+    if _increment_item(cart, product, quantity):
+        return True
+    try:
+        with transaction.atomic():
+            CartItem.objects.create(
+                cart=cart,
+                product=product,
+                quantity=quantity,
+                price_at_addition=product.price
+            )
+        return True
+    except IntegrityError:
+        return bool(_increment_item(cart, product, quantity))
+
+
+def _upsert_item(cart, product, quantity):
+    """
+    PostgreSQL add in one statement. The conflict update only applies while
+    the summed quantity stays within the product's current stock; no returned
+    row means it did not.
+    """
+    quote = connection.ops.quote_name
+    table = quote(CartItem._meta.db_table)
+    product_table = quote(Product._meta.db_table)
+    now = timezone.now()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            INSERT INTO {table} (cart_id, product_id, quantity, price_at_addition, created_at, updated_at)
+            VALUES (%s, %s, %s, %s, %s, %s)
+            ON CONFLICT (cart_id, product_id) DO UPDATE
+                SET quantity = {table}.quantity + EXCLUDED.quantity,
+                    updated_at = EXCLUDED.updated_at
+                WHERE {table}.quantity + EXCLUDED.quantity <= (
+                    SELECT stock_quantity FROM {product_table} WHERE id = EXCLUDED.product_id
+                )
+            RETURNING quantity
+            """,
+            [cart.pk, product.pk, quantity, product.price, now, now],
+        )
+        row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def merge_session_cart(request, user):
+    """
+    Move a guest's cart into the user's Cart after login.
+    Products are resolved with one query and the lines are written with one
+    bulk upsert; quantities already in the user's cart are added to and the
+    result is clamped to stock. Returns the number of lines merged.
+    """
+    storage = get_guest_cart_storage(request)
+    guest_cart = storage.load()
+    if not guest_cart:
+        return 0
+
+    requested = {}
+    for product_key, item_data in guest_cart.items():
+        try:
+            requested[int(product_key)] = int(item_data['quantity'])
+        except (KeyError, TypeError, ValueError):
+            continue
+    products = Product.objects.filter(is_available=True, stock_quantity__gt=0).in_bulk(list(requested))
+
+    merged = []
+    if products:
+        now = timezone.now()
+        with transaction.atomic():
+            cart, created = Cart.objects.get_or_create(user=user)
+            existing = dict(
+                CartItem.objects.select_for_update().filter(
+                    cart=cart, product_id__in=list(products)
+                ).values_list('product_id', 'quantity')
+            )
+            for product_id, product in products.items():
+                quantity = min(existing.get(product_id, 0) + requested[product_id], product.stock_quantity)
+                if quantity > 0:
+                    merged.append(CartItem(
+                        cart=cart,
+                        product=product,
+                        quantity=quantity,
+                        price_at_addition=product.price,
+                        created_at=now,
+                        updated_at=now
+                    ))
+            CartItem.objects.bulk_create(
+                merged,
+                batch_size=500,
+                update_conflicts=True,
+                unique_fields=['cart', 'product'],
+                update_fields=['quantity', 'updated_at'],
+            )
+        invalidate_cart_summary(user.pk)
+
+    storage.clear()
+    # Lines memoized for the guest no longer describe the cart
+    if hasattr(request, '_cart_service'):
+        del request._cart_service
+    return len(merged)
+
+
+def get_cart_service(request):
+    """Return the request's CartService, creating it on first use."""
+    service = getattr(request, '_cart_service', None)
+    if service is None:
+        service = request._cart_service = CartService(request)
+    return service
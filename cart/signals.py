@@ -0,0 +1,50 @@
+"""
+Signal handlers for cart app.
+"""
+from decimal import Decimal
+
+from django.contrib.auth.signals import user_logged_in
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from products.models import Product
+
+from .models import Cart, CartItem
+from .repricing import schedule_cart_repricing
+from .services import merge_session_cart
+from .utils import invalidate_cart_summary
+
+
+@receiver(post_save, sender=CartItem)
+@receiver(post_delete, sender=CartItem)
+def invalidate_summary_on_item_change(sender, instance, **kwargs):
+    """A changed cart item makes its owner's cached summary stale."""
+    try:
+        user_id = instance.cart.user_id
+    except Cart.DoesNotExist:
+        # Deleted along with its cart; handled by the Cart receiver
+        return
+    invalidate_cart_summary(user_id)
+
+
+@receiver(post_delete, sender=Cart)
+def invalidate_summary_on_cart_delete(sender, instance, **kwargs):
+    invalidate_cart_summary(instance.user_id)
+
+
+@receiver(user_logged_in)
+def merge_guest_cart_on_login(sender, request, user, **kwargs):
+    """Carry a guest's session cart over to their account."""
+    if request is not None and hasattr(request, 'session'):
+        merge_session_cart(request, user)
+
+
+@receiver(post_save, sender=Product)
+def reprice_carts_on_price_change(sender, instance, created, raw=False, **kwargs):
+    """Carry a product's new price over to the cart items holding it."""
+    if raw or created:
+        return
+    loaded = getattr(instance, '_loaded_values', None) or {}
+    if 'price' in loaded and Decimal(str(loaded['price'])) == Decimal(str(instance.price)):
+        return
+    schedule_cart_repricing([instance.pk])
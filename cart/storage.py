@@ -0,0 +1,169 @@
+"""
+Storage backends for guest (not logged-in) carts.
+
+A guest cart is a dict of {product_id (str): {'quantity': int, 'price': str}}.
+The backend is chosen by the CART_GUEST_STORAGE setting:
+
+- 'session': inside the session (the original behaviour; every change is a
+  session write, and with SESSION_SAVE_EVERY_REQUEST every page view is too)
+- 'signed_cookie': in a compact signed cookie, falling back to the session
+  for carts too big for a cookie
+- 'cache': in the cache, keyed by a random token cookie
+
+or a dotted path to a GuestCartStorage subclass. Loading never marks the
+session as modified, so browsing without changing the cart writes nothing.
+cart.middleware.GuestCartMiddleware sets the cookies a backend asks for.
+"""
+import secrets
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.utils.module_loading import import_string
+
+SESSION_KEY = 'cart'
+
+
+class GuestCartStorage:
+    """Base class: load() once per request, save() after changing the dict."""
+
+    def __init__(self, request):
+        self.request = request
+        self._data = None
+        self._cookies = {}
+
+    def load(self):
+        if self._data is None:
+            self._data = self._read() or {}
+        return self._data
+
+    def save(self, data):
+        self._data = data
+        self._write(data)
+
+    def clear(self):
+        self.save({})
+
+    def _read(self):
+        raise NotImplementedError
+
+    def _write(self, data):
+        raise NotImplementedError
+
+    def _set_cookie(self, name, value):
+        """Queue a cookie for the response; None deletes it."""
+        self._cookies[name] = value
+
+    def process_response(self, response):
+        for name, value in self._cookies.items():
+            if value is None:
+                response.delete_cookie(name, samesite=settings.SESSION_COOKIE_SAMESITE)
+            else:
+                response.set_cookie(
+                    name,
+                    value,
+                    max_age=getattr(settings, 'CART_COOKIE_AGE', settings.SESSION_COOKIE_AGE),
+                    secure=settings.SESSION_COOKIE_SECURE,
+                    httponly=True,
+                    samesite=settings.SESSION_COOKIE_SAMESITE,
+                )
+        return response
+
+
+class SessionGuestCartStorage(GuestCartStorage):
+
+    def _read(self):
+        return self.request.session.get(SESSION_KEY)
+
+    def _write(self, data):
+        if data:
+            self.request.session[SESSION_KEY] = data
+        elif SESSION_KEY in self.request.session:
+            del self.request.session[SESSION_KEY]
+
+
+class SignedCookieGuestCartStorage(SessionGuestCartStorage):
+    """
+    Cart in a signed cookie as {id: [quantity, price]}. Carts whose encoding
+    exceeds CART_COOKIE_MAX_SIZE bytes are kept in the session instead.
+    """
+    salt = 'cart.storage.SignedCookieGuestCartStorage'
+
+    @property
+    def cookie_name(self):
+        return getattr(settings, 'CART_COOKIE_NAME', 'cart')
+
+    def _read(self):
+        value = self.request.COOKIES.get(self.cookie_name)
+        if value:
+            try:
+                compact = signing.loads(value, salt=self.salt)
+                return {key: {'quantity': quantity, 'price': price} for key, (quantity, price) in compact.items()}
+            except (signing.BadSignature, TypeError, ValueError):
+                pass
+        # Oversized carts (and carts from before this backend) live in the session
+        return super()._read()
+
+    def _write(self, data):
+        value = ''
+        if data:
+            compact = {key: [item['quantity'], item['price']] for key, item in data.items()}
+            value = signing.dumps(compact, salt=self.salt, compress=True)
+
+        if value and len(value) <= getattr(settings, 'CART_COOKIE_MAX_SIZE', 3000):
+            self._set_cookie(self.cookie_name, value)
+            if self.request.session.get(SESSION_KEY):
+                super()._write({})
+        else:
+            if self.cookie_name in self.request.COOKIES or self._cookies:
+                self._set_cookie(self.cookie_name, None)
+            super()._write(data)
+
+
+class CacheGuestCartStorage(GuestCartStorage):
+    """Cart in the cache under a random token kept in a cookie."""
+
+    @property
+    def cookie_name(self):
+        return getattr(settings, 'CART_COOKIE_NAME', 'cart') + '_token'
+
+    def _cache_key(self, token):
+        return f'makola:guest-cart:{token}'
+
+    def _read(self):
+        token = self.request.COOKIES.get(self.cookie_name)
+        return cache.get(self._cache_key(token)) if token else None
+
+    def _write(self, data):
+        token = self._cookies.get(self.cookie_name) or self.request.COOKIES.get(self.cookie_name)
+        if not data:
+            if token:
+                cache.delete(self._cache_key(token))
+                self._set_cookie(self.cookie_name, None)
+            return
+        if not token:
+            token = secrets.token_urlsafe(24)
+        # Refresh the cookie with every write so it expires with the cache entry
+        self._set_cookie(self.cookie_name, token)
+        cache.set(
+            self._cache_key(token),
+            data,
+            getattr(settings, 'CART_COOKIE_AGE', settings.SESSION_COOKIE_AGE)
+        )
+
+
+GUEST_CART_STORAGES = {
+    'session': SessionGuestCartStorage,
+    'signed_cookie': SignedCookieGuestCartStorage,
+    'cache': CacheGuestCartStorage,
+}
+
+
+def get_guest_cart_storage(request):
+    """Return the request's guest cart storage, creating it on first use."""
+    storage = getattr(request, '_guest_cart_storage', None)
+    if storage is None:
+        name = getattr(settings, 'CART_GUEST_STORAGE', 'session')
+        storage_class = GUEST_CART_STORAGES.get(name) or import_string(name)
+        storage = request._guest_cart_storage = storage_class(request)
+    return storage
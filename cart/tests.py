@@ -0,0 +1,212 @@
+"""
+Tests for cart app.
+"""
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from products.models import Product
+
+from .models import Cart, CartItem, CartRepriceLog, PendingCartReprice
+from .repricing import process_pending_repricing
+from .services import _increment_item
+
+User = get_user_model()
+
+AJAX = {'HTTP_X_REQUESTED_WITH': 'XMLHttpRequest'}
+
+
+class CartTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='buyer', email='buyer@example.com', password='pass12345')
+        cls.yam = Product.objects.create(name='Yam', description='Tuber', price=Decimal('3.00'), stock_quantity=5)
+        cls.rice = Product.objects.create(name='Rice', description='Grain', price=Decimal('10.00'), stock_quantity=2)
+
+    def setUp(self):
+        cache.clear()
+
+    def add(self, product, quantity):
+        return self.client.post(reverse('cart:add_to_cart', args=[product.id]), {'quantity': quantity}, **AJAX).json()
+
+    def update(self, product, quantity):
+        return self.client.post(reverse('cart:update_cart', args=[product.id]), {'quantity': quantity}, **AJAX).json()
+
+    def remove(self, product):
+        return self.client.post(reverse('cart:remove_from_cart', args=[product.id]), **AJAX).json()
+
+    def user_quantities(self):
+        return dict(CartItem.objects.filter(cart__user=self.user).values_list('product__name', 'quantity'))
+
+
+class CartMutationMixin:
+    """Add, update and remove behave the same for guests and users."""
+
+    def test_add_update_remove(self):
+        self.assertTrue(self.add(self.yam, 2)['success'])
+        response = self.add(self.yam, 1)
+        self.assertTrue(response['success'])
+        self.assertEqual((response['cart_item_count'], Decimal(response['cart_total'])), (3, Decimal('9.00')))
+
+        response = self.update(self.yam, 4)
+        self.assertTrue(response['success'])
+        self.assertEqual(response['cart_item_count'], 4)
+
+        response = self.remove(self.yam)
+        self.assertTrue(response['success'])
+        self.assertEqual(response['cart_item_count'], 0)
+        self.assertFalse(self.remove(self.yam)['success'])
+
+    def test_stock_limits(self):
+        self.assertFalse(self.add(self.rice, 3)['success'])
+        self.assertTrue(self.add(self.rice, 2)['success'])
+        response = self.add(self.rice, 1)
+        self.assertFalse(response['success'])
+        self.assertEqual(response['message'], 'Only 2 items available in stock')
+        self.assertFalse(self.update(self.rice, 3)['success'])
+        self.assertEqual(self.add(self.yam, 1)['cart_item_count'], 3)
+
+    def test_invalid_quantities_are_rejected(self):
+        for quantity in (0, -5):
+            response = self.add(self.yam, quantity)
+            self.assertFalse(response['success'])
+            self.assertEqual(response['message'], 'Quantity must be positive')
+            self.assertEqual((response['cart_item_count'], Decimal(response['cart_total'])), (0, Decimal('0.00')))
+
+    def test_unavailable_product_cannot_be_added(self):
+        Product.objects.filter(pk=self.yam.pk).update(is_available=False)
+        self.assertFalse(self.add(self.yam, 1)['success'])
+
+
+class GuestCartTests(CartMutationMixin, CartTestCase):
+
+    def test_signed_cookie_round_trip(self):
+        self.add(self.yam, 2)
+        self.assertIn('cart', self.client.cookies)
+        self.assertNotIn('cart', self.client.session)
+
+        # A fresh client carrying only the cookie sees the same cart
+        cookie = self.client.cookies['cart'].value
+        self.client.cookies.clear()
+        self.client.cookies['cart'] = cookie
+        response = self.update(self.yam, 3)
+        self.assertTrue(response['success'])
+        self.assertEqual((response['cart_item_count'], Decimal(response['cart_total'])), (3, Decimal('9.00')))
+
+    def test_tampered_cookie_is_ignored(self):
+        self.client.cookies['cart'] = 'not-a-signed-value'
+        response = self.update(self.yam, 1)
+        self.assertEqual((response['success'], response['cart_item_count']), (False, 0))
+
+    @override_settings(CART_GUEST_STORAGE='cache')
+    def test_cache_storage_round_trip(self):
+        self.add(self.yam, 2)
+        self.assertIn('cart_token', self.client.cookies)
+        self.assertEqual(self.add(self.yam, 1)['cart_item_count'], 3)
+
+    def test_merge_on_login(self):
+        CartItem.objects.create(cart=Cart.objects.create(user=self.user), product=self.rice, quantity=1,
+                                price_at_addition=self.rice.price)
+        self.add(self.yam, 2)
+        self.add(self.rice, 2)
+
+        self.client.post(reverse('accounts:login'), {'username': 'buyer@example.com', 'password': 'pass12345'})
+
+        # Quantities are summed and clamped to stock, and the guest cart is cleared
+        self.assertEqual(self.user_quantities(), {'Yam': 2, 'Rice': 2})
+        self.assertEqual(self.client.cookies['cart'].value, '')
+
+
+class UserCartTests(CartMutationMixin, CartTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.user)
+
+    def test_writes_go_to_the_database(self):
+        self.add(self.yam, 2)
+        self.add(self.rice, 1)
+        self.assertEqual(self.user_quantities(), {'Yam': 2, 'Rice': 1})
+
+    def test_increment_checks_current_stock(self):
+        self.add(self.yam, 4)
+        # Stock drops after the product was loaded; the increment must see the new value
+        Product.objects.filter(pk=self.yam.pk).update(stock_quantity=4)
+        self.assertFalse(_increment_item(Cart.objects.get(user=self.user), self.yam, 1))
+        self.assertEqual(self.user_quantities(), {'Yam': 4})
+
+
+class BatchAddTests(CartTestCase):
+
+    def batch(self, body):
+        return self.client.post(reverse('cart:batch_add_to_cart'), body, content_type='application/json')
+
+    def test_valid_and_invalid_items_are_reported_per_item(self):
+        self.client.force_login(self.user)
+        response = self.batch({'items': [
+            {'product_id': self.yam.id, 'quantity': 2},
+            {'product_id': self.yam.id, 'quantity': 1},
+            {'product_id': self.rice.id, 'quantity': 5},
+            {'product_id': 999999},
+            {'product_id': self.rice.id, 'quantity': 0},
+        ]})
+        data = response.json()
+        self.assertFalse(data['success'])
+        self.assertEqual([result['success'] for result in data['results']], [True, True, False, False, False])
+        self.assertEqual(data['results'][4]['message'], 'Quantity must be positive')
+        self.assertEqual(self.user_quantities(), {'Yam': 3})
+
+    def test_malformed_bodies_are_rejected(self):
+        for body in ('not json', {'items': [{'quantity': 1}]}, {'items': [{'product_id': 'x'}]}, {'rows': []}):
+            self.assertEqual(self.batch(body).status_code, 400, body)
+
+    @override_settings(CART_BATCH_MAX_ITEMS=2)
+    def test_item_count_is_limited(self):
+        self.assertEqual(self.batch({'items': []}).status_code, 400)
+        items = [{'product_id': self.yam.id}] * 3
+        self.assertEqual(self.batch({'items': items}).status_code, 400)
+
+    def test_guest_batch(self):
+        data = self.batch({'items': [{'product_id': self.yam.id, 'quantity': 2}]}).json()
+        self.assertTrue(data['success'])
+        self.assertEqual(Decimal(self.add(self.rice, 1)['cart_total']), Decimal('16.00'))
+
+
+class CartRepricingTests(CartTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.user)
+        self.add(self.yam, 2)
+
+    def test_price_change_reprices_cart_items(self):
+        self.yam.price = Decimal('4.50')
+        self.yam.save()
+
+        item = CartItem.objects.get(cart__user=self.user, product=self.yam)
+        self.assertEqual(item.price_at_addition, Decimal('4.50'))
+        log = CartRepriceLog.objects.get()
+        self.assertEqual((log.item_count, log.cart_count, log.deferred), (1, 1, False))
+        # The cached header summary was invalidated
+        self.assertEqual(Decimal(self.update(self.yam, 2)['cart_total']), Decimal('9.00'))
+
+    def test_saving_without_price_change_does_not_reprice(self):
+        self.yam.name = 'White Yam'
+        self.yam.save()
+        self.assertFalse(CartRepriceLog.objects.exists())
+
+    @override_settings(CART_REPRICE_INLINE_LIMIT=0)
+    def test_large_changes_are_deferred(self):
+        self.yam.price = Decimal('5.00')
+        self.yam.save()
+        self.assertTrue(PendingCartReprice.objects.filter(product=self.yam).exists())
+        self.assertEqual(CartItem.objects.get(product=self.yam).price_at_addition, Decimal('3.00'))
+
+        logs = process_pending_repricing()
+        self.assertEqual([(log.item_count, log.deferred) for log in logs], [(1, True)])
+        self.assertEqual(CartItem.objects.get(product=self.yam).price_at_addition, Decimal('5.00'))
+        self.assertFalse(PendingCartReprice.objects.exists())
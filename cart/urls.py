@@ -9,6 +9,7 @@ app_name = 'cart'
 urlpatterns = [
     path('', views.cart_view, name='cart'),
     path('add/<int:product_id>/', views.add_to_cart_view, name='add_to_cart'),
+    path('batch/', views.batch_add_to_cart_view, name='batch_add_to_cart'),
     path('update/<int:product_id>/', views.update_cart_view, name='update_cart'),
     path('remove/<int:product_id>/', views.remove_from_cart_view, name='remove_from_cart'),
 ]
@@ -1,10 +1,30 @@
 """
 Utility functions for cart management.
 """
+from dataclasses import dataclass
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import DecimalField, F, Sum
+
 from .models import Cart, CartItem
+from .storage import get_guest_cart_storage
 from products.models import Product
 
 
+@dataclass(frozen=True)
+class CartLine:
+    """One resolved cart line: the product, quantity and unit price charged."""
+    product: Product
+    quantity: int
+    price: Decimal
+
+    @property
+    def subtotal(self):
+        return self.price * self.quantity
+
+
 def get_cart(request):
     """
     Get or create cart for user (logged-in) or session (guest).
@@ -16,150 +36,87 @@ def get_cart(request):
     return None
 
 
-def get_or_create_session_cart(request):
-    """
-    Get cart items from session for guest users.
-    Returns a dictionary of {product_id: {'quantity': int, 'price': float}}.
-    """
-    if 'cart' not in request.session:
-        request.session['cart'] = {}
-    return request.session['cart']
-
-
 def add_to_cart(request, product_id, quantity=1):
     """
     Add product to cart (works for both authenticated and guest users).
     """
-    try:
-        product = Product.objects.get(id=product_id, is_available=True)
-    except Product.DoesNotExist:
-        return False, "Product not found or unavailable"
-    
-    if product.stock_quantity < quantity:
-        return False, f"Only {product.stock_quantity} items available in stock"
-    
-    if request.user.is_authenticated:
-        cart, created = Cart.objects.get_or_create(user=request.user)
-        cart_item, created = CartItem.objects.get_or_create(
-            cart=cart,
-            product=product,
-            defaults={'quantity': quantity, 'price_at_addition': product.price}
-        )
-        if not created:
-            cart_item.quantity += quantity
-            cart_item.save()
-        return True, "Product added to cart"
-    else:
-        # Session-based cart for guests
-        session_cart = get_or_create_session_cart(request)
-        product_key = str(product_id)
-        
-        if product_key in session_cart:
-            session_cart[product_key]['quantity'] += quantity
-        else:
-            session_cart[product_key] = {
-                'quantity': quantity,
-                'price': str(product.price)
-            }
-        
-        request.session.modified = True
-        return True, "Product added to cart"
+    from .services import get_cart_service
+    return get_cart_service(request).add(product_id, quantity)
 
 
 def update_cart_item(request, product_id, quantity):
     """
     Update quantity of cart item.
     """
-    if quantity <= 0:
-        return remove_from_cart(request, product_id)
-    
-    try:
-        product = Product.objects.get(id=product_id, is_available=True)
-    except Product.DoesNotExist:
-        return False, "Product not found"
-    
-    if product.stock_quantity < quantity:
-        return False, f"Only {product.stock_quantity} items available in stock"
-    
-    if request.user.is_authenticated:
-        try:
-            cart = Cart.objects.get(user=request.user)
-            cart_item = CartItem.objects.get(cart=cart, product=product)
-            cart_item.quantity = quantity
-            cart_item.save()
-            return True, "Cart updated"
-        except (Cart.DoesNotExist, CartItem.DoesNotExist):
-            return False, "Cart item not found"
-    else:
-        session_cart = get_or_create_session_cart(request)
-        product_key = str(product_id)
-        
-        if product_key in session_cart:
-            session_cart[product_key]['quantity'] = quantity
-            request.session.modified = True
-            return True, "Cart updated"
-        return False, "Cart item not found"
+    from .services import get_cart_service
+    return get_cart_service(request).update(product_id, quantity)
 
 
 def remove_from_cart(request, product_id):
     """
     Remove product from cart.
     """
-    if request.user.is_authenticated:
+    from .services import get_cart_service
+    return get_cart_service(request).remove(product_id)
+
+
+def apply_cart_operations(request, operations):
+    """
+    Add many (product_id, quantity) pairs in one go.
+    Returns a (product_id, success, message) result per operation.
+    """
+    from .services import get_cart_service
+    return get_cart_service(request).add_many(operations)
+
+
+def _load_guest_cart_lines(request):
+    """
+    Resolve the guest cart with one in_bulk query.
+    Entries whose product is gone, unavailable or malformed are pruned.
+    """
+    storage = get_guest_cart_storage(request)
+    guest_cart = storage.load()
+    if not guest_cart:
+        return []
+
+    product_ids = []
+    for product_key in guest_cart:
+        try:
+            product_ids.append(int(product_key))
+        except ValueError:
+            continue
+    products = Product.objects.filter(is_available=True).in_bulk(product_ids)
+
+    lines, stale_keys = [], []
+    for product_key, item_data in guest_cart.items():
         try:
-            cart = Cart.objects.get(user=request.user)
-            cart_item = CartItem.objects.get(cart=cart, product_id=product_id)
-            cart_item.delete()
-            return True, "Product removed from cart"
-        except (Cart.DoesNotExist, CartItem.DoesNotExist):
-            return False, "Cart item not found"
-    else:
-        session_cart = get_or_create_session_cart(request)
-        product_key = str(product_id)
-        
-        if product_key in session_cart:
-            del session_cart[product_key]
-            request.session.modified = True
-            return True, "Product removed from cart"
-        return False, "Cart item not found"
+            product = products[int(product_key)]
+            quantity = int(item_data['quantity'])
+            price = Decimal(str(item_data['price']))
+        except (InvalidOperation, KeyError, TypeError, ValueError):
+            stale_keys.append(product_key)
+            continue
+        lines.append(CartLine(product=product, quantity=quantity, price=price))
+
+    if stale_keys:
+        for product_key in stale_keys:
+            del guest_cart[product_key]
+        storage.save(guest_cart)
+    return lines
 
 
 def get_cart_items(request):
     """
-    Get all cart items as a list of dictionaries.
+    Get all cart items as a list of CartLine.
     Works for both authenticated and guest users.
     """
-    items = []
-    
     if request.user.is_authenticated:
-        try:
-            cart = Cart.objects.get(user=request.user)
-            for cart_item in cart.items.select_related('product').all():
-                items.append({
-                    'product': cart_item.product,
-                    'quantity': cart_item.quantity,
-                    'price': cart_item.price_at_addition,
-                    'subtotal': cart_item.get_subtotal(),
-                })
-        except Cart.DoesNotExist:
-            pass
-    else:
-        session_cart = get_or_create_session_cart(request)
-        for product_id, item_data in session_cart.items():
-            try:
-                product = Product.objects.get(id=int(product_id), is_available=True)
-                quantity = item_data['quantity']
-                price = float(item_data['price'])
-                items.append({
-                    'product': product,
-                    'quantity': quantity,
-                    'price': price,
-                    'subtotal': price * quantity,
-                })
-            except (Product.DoesNotExist, ValueError, KeyError):
-                continue
-    
-    return items
+        cart_items = CartItem.objects.filter(cart__user=request.user).select_related('product')
+        return [
+            CartLine(product=item.product, quantity=item.quantity, price=item.price_at_addition)
+            for item in cart_items
+        ]
+    return _load_guest_cart_lines(request)
 
 
 def get_cart_total(request):
@@ -167,28 +124,56 @@ def get_cart_total(request):
     Calculate total cart value.
     """
     items = get_cart_items(request)
-    return sum(item['subtotal'] for item in items)
+    return sum((item.subtotal for item in items), Decimal('0.00'))
 
 
 def clear_cart(request):
     """
     Clear all items from cart.
     """
-    if request.user.is_authenticated:
-        try:
-            cart = Cart.objects.get(user=request.user)
-            cart.items.all().delete()
-            return True
-        except Cart.DoesNotExist:
-            return True
-    else:
-        request.session['cart'] = {}
-        request.session.modified = True
-        return True
+    from .services import get_cart_service
+    return get_cart_service(request).clear()
 
 
+def _cart_summary_key(user_id):
+    return f'makola:cart-summary:{user_id}'
 
 
+def invalidate_cart_summary(user_id):
+    """Drop the cached summary after a change that bypasses model signals (bulk writes)."""
+    cache.delete(_cart_summary_key(user_id))
 
 
+def get_cart_summary(request):
+    """
+    Item count and total for the header badge, as {'item_count', 'total'}.
+    Logged-in users get one aggregate query, cached until their cart changes;
+    no cart row is created. Guest carts are summed from their storage.
+    """
+    if request.user.is_authenticated:
+        key = _cart_summary_key(request.user.pk)
+        summary = cache.get(key)
+        if summary is None:
+            totals = CartItem.objects.filter(cart__user=request.user).aggregate(
+                item_count=Sum('quantity'),
+                total=Sum(
+                    F('quantity') * F('price_at_addition'),
+                    output_field=DecimalField(max_digits=12, decimal_places=2)
+                ),
+            )
+            summary = {
+                'item_count': totals['item_count'] or 0,
+                'total': (totals['total'] or Decimal('0')).quantize(Decimal('0.01')),
+            }
+            cache.set(key, summary, getattr(settings, 'CART_SUMMARY_CACHE_TIMEOUT', 3600))
+        return summary
 
+    item_count, total = 0, Decimal('0.00')
+    for item_data in get_guest_cart_storage(request).load().values():
+        try:
+            quantity = int(item_data['quantity'])
+            total += Decimal(str(item_data['price'])) * quantity
+        except (InvalidOperation, KeyError, TypeError, ValueError):
+            continue
+        item_count += quantity
+    return {'item_count': item_count, 'total': total}
@@ -1,30 +1,26 @@
 """
 Views for cart app.
 """
+import json
+
+from django.conf import settings
 from django.shortcuts import render, redirect
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.http import JsonResponse
-from .utils import (
-    get_cart_items,
-    get_cart_total,
-    add_to_cart,
-    update_cart_item,
-    remove_from_cart,
-    clear_cart
-)
+from django.views.decorators.http import require_POST
+from .services import get_cart_service
 
 
 def cart_view(request):
     """
     Display shopping cart.
     """
-    cart_items = get_cart_items(request)
-    cart_total = get_cart_total(request)
+    cart = get_cart_service(request)
     
     context = {
-        'cart_items': cart_items,
-        'cart_total': cart_total,
+        'cart_items': cart.lines,
+        'cart_total': cart.total,
     }
     
     return render(request, 'cart/cart.html', context)
@@ -36,15 +32,16 @@ def add_to_cart_view(request, product_id):
     """
     if request.method == 'POST':
         quantity = int(request.POST.get('quantity', 1))
-        success, message = add_to_cart(request, product_id, quantity)
+        cart = get_cart_service(request)
+        success, message = cart.add(product_id, quantity)
         
         if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
             # AJAX request
             return JsonResponse({
                 'success': success,
                 'message': message,
-                'cart_total': get_cart_total(request),
-                'cart_item_count': sum(item['quantity'] for item in get_cart_items(request))
+                'cart_total': cart.total,
+                'cart_item_count': cart.item_count
             })
         else:
             # Regular request
@@ -88,14 +85,15 @@ def update_cart_view(request, product_id):
     """
     if request.method == 'POST':
         quantity = int(request.POST.get('quantity', 1))
-        success, message = update_cart_item(request, product_id, quantity)
+        cart = get_cart_service(request)
+        success, message = cart.update(product_id, quantity)
         
         if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
             return JsonResponse({
                 'success': success,
                 'message': message,
-                'cart_total': get_cart_total(request),
-                'cart_item_count': sum(item['quantity'] for item in get_cart_items(request))
+                'cart_total': cart.total,
+                'cart_item_count': cart.item_count
             })
         else:
             if success:
@@ -111,14 +109,15 @@ def remove_from_cart_view(request, product_id):
     Remove product from cart.
     """
     if request.method == 'POST':
-        success, message = remove_from_cart(request, product_id)
+        cart = get_cart_service(request)
+        success, message = cart.remove(product_id)
         
         if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
             return JsonResponse({
                 'success': success,
                 'message': message,
-                'cart_total': get_cart_total(request),
-                'cart_item_count': sum(item['quantity'] for item in get_cart_items(request))
+                'cart_total': cart.total,
+                'cart_item_count': cart.item_count
             })
         else:
             if success:
@@ -128,3 +127,37 @@ def remove_from_cart_view(request, product_id):
     
     return redirect('cart:cart')
 
+
+@require_POST
+def batch_add_to_cart_view(request):
+    """
+    Add many products in one request (AJAX).
+    Expects a JSON body: {"items": [{"product_id": 1, "quantity": 2}, ...]}.
+    """
+    try:
+        payload = json.loads(request.body)
+        operations = [
+            (int(item['product_id']), int(item.get('quantity', 1)))
+            for item in payload['items']
+        ]
+    except (ValueError, TypeError, KeyError):
+        return JsonResponse({'success': False, 'message': 'Invalid request body'}, status=400)
+
+    max_items = getattr(settings, 'CART_BATCH_MAX_ITEMS', 100)
+    if not operations or len(operations) > max_items:
+        return JsonResponse(
+            {'success': False, 'message': f'Send between 1 and {max_items} items'},
+            status=400
+        )
+
+    cart = get_cart_service(request)
+    results = cart.add_many(operations)
+    return JsonResponse({
+        'success': all(success for product_id, success, message in results),
+        'results': [
+            {'product_id': product_id, 'success': success, 'message': message}
+            for product_id, success, message in results
+        ],
+        'cart_total': cart.total,
+        'cart_item_count': cart.item_count
+    })
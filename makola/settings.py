@@ -41,11 +41,12 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
-    'django.contrib.sessions.middleware.SessionMiddleware',
+    'accounts.middleware.ThrottledSessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
+    'cart.middleware.GuestCartMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
@@ -187,9 +188,63 @@ LOGIN_URL = 'accounts:login'
 LOGIN_REDIRECT_URL = 'products:product_list'
 LOGOUT_REDIRECT_URL = 'products:product_list'
 
+# Cache
+# Catalog and cart caches are invalidated by bumping version keys, so every
+# process (gunicorn workers, management commands) must share one cache.
+# Production uses Redis from REDIS_URL, or the database cache table when no Redis
+# is provisioned (created by `migrate`, see products/migrations/0009). The
+# process-local LocMemCache is only used with DEBUG (development and tests).
+REDIS_URL = config('REDIS_URL', default='')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+elif DEBUG:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'makola',
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': 'makola_cache',
+        }
+    }
+CATALOG_CACHE_TIMEOUT = config('CATALOG_CACHE_TIMEOUT', default=3600, cast=int)
+
+# Full-page cache for anonymous catalog pages (purged by tag on catalog writes)
+PAGE_CACHE_ENABLED = config('PAGE_CACHE_ENABLED', default=True, cast=bool)
+PAGE_CACHE_TIMEOUT = config('PAGE_CACHE_TIMEOUT', default=600, cast=int)
+
+# Catalog pagination: 'offset' (numbered pages) or 'cursor' (keyset, no COUNT/OFFSET)
+CATALOG_PAGINATION = config('CATALOG_PAGINATION', default='offset')
+
+# Header cart badge (item count and total) cached per user until the cart changes
+CART_SUMMARY_CACHE_TIMEOUT = config('CART_SUMMARY_CACHE_TIMEOUT', default=3600, cast=int)
+
+# Guest cart storage: 'signed_cookie', 'cache' or 'session' (see cart/storage.py)
+CART_GUEST_STORAGE = config('CART_GUEST_STORAGE', default='signed_cookie')
+
+# Price changes touching more cart items than this are repriced by the reprice_carts command
+CART_REPRICE_INLINE_LIMIT = config('CART_REPRICE_INLINE_LIMIT', default=500, cast=int)
+
+# Maximum number of items accepted by the batch add-to-cart endpoint
+CART_BATCH_MAX_ITEMS = config('CART_BATCH_MAX_ITEMS', default=100, cast=int)
+
 # Session Configuration
 SESSION_COOKIE_AGE = 86400  # 24 hours
-SESSION_SAVE_EVERY_REQUEST = True
+# Sessions are saved when modified; ThrottledSessionMiddleware extends expiry
+# only once less than this fraction of SESSION_COOKIE_AGE remains
+SESSION_SAVE_EVERY_REQUEST = False
+SESSION_REFRESH_THRESHOLD = config('SESSION_REFRESH_THRESHOLD', default=0.5, cast=float)
+# Session write counters are batched in each process and flushed this often (seconds)
+SESSION_STATS_FLUSH_INTERVAL = config('SESSION_STATS_FLUSH_INTERVAL', default=60, cast=int)
 
 # Security Settings (for production)
 # Railway handles HTTPS automatically, so we don't force SSL redirect
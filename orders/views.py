@@ -2,15 +2,8 @@
 Views for orders app (Shopping List only, no online checkout/delivery).
 """
 import logging
-from django.shortcuts import render, get_object_or_404
-from django.contrib import messages
-from django.contrib.auth.decorators import login_required
-from django.conf import settings
-from django.views.decorators.csrf import csrf_exempt
-from django.http import JsonResponse, HttpResponse
-from .forms import CheckoutForm
-from cart.utils import get_cart_items, get_cart_total, clear_cart
-from products.models import Product
+from django.shortcuts import render
+from cart.services import get_cart_service
 
 logger = logging.getLogger(__name__)
 
@@ -19,12 +12,11 @@ def shopping_list_view(request):
     """
     Display the user-selected shopping list (formerly cart/order overview).
     """
-    shopping_list_items = get_cart_items(request)
-    shopping_list_total = get_cart_total(request)
+    cart = get_cart_service(request)
 
     context = {
-        'shopping_list_items': shopping_list_items,
-        'shopping_list_total': shopping_list_total,
+        'shopping_list_items': cart.lines,
+        'shopping_list_total': cart.total,
     }
     return render(request, 'orders/shopping_list.html', context)
 
@@ -4,6 +4,7 @@ Admin configuration for products app.
 from django.contrib import admin
 from django.utils.html import format_html
 from .models import Category, Product, ProductImage, Review
+from .signals import catalog_bulk_changed
 
 
 class ProductImageInline(admin.TabularInline):
@@ -33,13 +34,13 @@ class ProductAdmin(admin.ModelAdmin):
     """Admin for Product model."""
     list_display = ['name', 'category', 'price', 'stock_quantity', 'is_available', 'created_at']
     list_filter = ['category', 'is_available', 'country_of_origin', 'created_at']
-    search_fields = ['name', 'description', 'country_of_origin']
+    search_fields = ['name', 'sku', 'description', 'country_of_origin']
     prepopulated_fields = {'slug': ('name',)}
     readonly_fields = ['created_at', 'updated_at', 'product_image_preview']
     inlines = [ProductImageInline]
     fieldsets = (
         ('Basic Information', {
-            'fields': ('name', 'slug', 'category', 'description')
+            'fields': ('name', 'slug', 'sku', 'category', 'description')
         }),
         ('Pricing & Inventory', {
             'fields': ('price', 'stock_quantity', 'is_available')
@@ -68,12 +69,14 @@ class ProductAdmin(admin.ModelAdmin):
     def make_available(self, request, queryset):
         """Admin action to make products available."""
         queryset.update(is_available=True)
+        catalog_bulk_changed()
         self.message_user(request, f'{queryset.count()} products marked as available.')
     make_available.short_description = 'Mark selected products as available'
 
     def make_unavailable(self, request, queryset):
         """Admin action to make products unavailable."""
         queryset.update(is_available=False)
+        catalog_bulk_changed()
         self.message_user(request, f'{queryset.count()} products marked as unavailable.')
     make_unavailable.short_description = 'Mark selected products as unavailable'
 
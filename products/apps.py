@@ -9,6 +9,9 @@ class ProductsConfig(AppConfig):
     name = 'products'
     verbose_name = 'Products'
 
+    def ready(self):
+        from . import signals  # noqa: F401
+
 
 
 
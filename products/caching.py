@@ -0,0 +1,71 @@
+"""
+Versioned caching helpers for catalog data.
+
+Cached values are stored under keys that embed a version number. Writers
+invalidate by bumping the version instead of deleting keys, so every entry
+built from the old data is orphaned at once and simply expires.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q
+
+from .models import Category
+
+CATALOG = 'catalog'
+
+
+def _version_key(name):
+    return f'makola:version:{name}'
+
+
+def get_cache_version(name):
+    """Return the current version for name, initialising it if missing."""
+    key = _version_key(name)
+    version = cache.get(key)
+    if version is None:
+        # Seed from the clock so an evicted counter never reuses an old version
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key)
+    return version
+
+
+def get_cache_versions(names):
+    """Return {name: version} for several names with one cache round trip."""
+    keys = {_version_key(name): name for name in names}
+    found = cache.get_many(list(keys))
+    versions = {keys[key]: version for key, version in found.items()}
+    for name in names:
+        if name not in versions:
+            versions[name] = get_cache_version(name)
+    return versions
+
+
+def bump_cache_version(name):
+    """Invalidate everything cached under name's current version."""
+    key = _version_key(name)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), None)
+
+
+def versioned_key(name, *parts):
+    """Build a cache key tied to the current version of name."""
+    return ':'.join(['makola', name, str(get_cache_version(name)), *map(str, parts)])
+
+
+def get_categories_with_counts():
+    """
+    Active categories annotated with product_count (available products).
+    Cached until the next Product or Category write bumps the catalog version.
+    """
+    key = versioned_key(CATALOG, 'categories')
+    categories = cache.get(key)
+    if categories is None:
+        categories = list(Category.objects.filter(is_active=True).annotate(
+            product_count=Count('products', filter=Q(products__is_available=True))
+        ).order_by('name'))
+        cache.set(key, categories, getattr(settings, 'CATALOG_CACHE_TIMEOUT', 3600))
+    return categories
@@ -0,0 +1,213 @@
+"""
+Synthetic catalog data for load testing.
+
+generate_catalog() creates categories, users, products (with an image row
+and reviews each) and carts from a seed. Rows come from generators and are
+written with bulk_create one batch at a time, so memory stays flat apart
+from one integer per product and per user (their ids, kept to attach
+reviews and cart items). The same seed and sizes always produce the same
+data; every generated name carries a 'gen<seed>' tag, so one seed can be
+generated once per database.
+
+bulk_create bypasses model signals, so the derived data they normally keep
+in step is built directly: rating aggregates are computed while reviews are
+generated, and the search index, price statistics and caches are rebuilt at
+the end.
+"""
+import random
+from array import array
+from decimal import Decimal
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils.text import slugify
+
+from cart.models import Cart, CartItem
+
+from .models import Category, Product, ProductImage, Review
+from .ratings import RATING_VALUES, _histogram_field
+from .search import get_search_backend
+from .signals import catalog_bulk_changed
+
+GENERATED_PASSWORD = 'loadtest'
+
+CATEGORY_WORDS = [
+    'Frozen', 'Grains', 'Oils', 'Snacks', 'Drinks', 'Produce', 'Breakfast', 'Seasonings',
+    'Condiments', 'Household', 'Canned Goods', 'Pasta', 'Meat', 'Seafood', 'Flour', 'Beans',
+]
+PRODUCT_ADJECTIVES = [
+    'Smoked', 'Dried', 'Fresh', 'Ground', 'Organic', 'Spicy', 'Roasted', 'Premium',
+    'Traditional', 'Sweet', 'Fermented', 'Whole', 'Peeled', 'Sun-dried', 'Pounded', 'Wild',
+]
+PRODUCT_NOUNS = [
+    'Catfish', 'Plantain', 'Yam', 'Cassava', 'Egusi', 'Palm Oil', 'Crayfish', 'Stockfish',
+    'Pepper', 'Ogbono', 'Gari', 'Fufu', 'Cocoyam', 'Shea Butter', 'Hibiscus', 'Kola Nut',
+]
+PRODUCT_SIZES = ['100g', '250g', '500g', '1kg', '2lbs', '5lbs', '10lbs', '1L']
+COUNTRIES = ['Nigeria', 'Ghana', 'Cameroon', 'Senegal', 'Kenya', 'Ivory Coast', 'Togo', 'Ethiopia']
+REVIEW_COMMENTS = [
+    'Tastes just like home.', 'Good quality for the price.', 'Arrived quickly and well packed.',
+    'Not as fresh as I hoped.', 'Will definitely buy again.', 'Smaller than expected.',
+]
+# Rating distribution skewed towards good reviews, like real catalogs
+RATING_WEIGHTS = [5, 7, 15, 33, 40]
+
+
+def catalog_tag(seed):
+    return f'gen{seed}'
+
+
+def catalog_exists(seed):
+    return Category.objects.filter(slug__startswith=f'{catalog_tag(seed)}-').exists()
+
+
+def _batches(objects, batch_size):
+    iterator = iter(objects)
+    while True:
+        batch = list(islice(iterator, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def _insert(model, objects, batch_size, on_batch=None):
+    """bulk_create objects batch by batch; yields the created batches (with pks)."""
+    for batch in _batches(objects, batch_size):
+        with transaction.atomic():
+            model.objects.bulk_create(batch)
+        if on_batch:
+            on_batch(model, len(batch))
+        yield batch
+
+
+def _categories(seed, count):
+    tag = catalog_tag(seed)
+    for index in range(count):
+        name = f'{CATEGORY_WORDS[index % len(CATEGORY_WORDS)]} {index + 1} ({tag})'
+        yield Category(name=name, slug=f'{tag}-{slugify(name)}', description=f'Generated category {index + 1}.')
+
+
+def _users(seed, count):
+    tag = catalog_tag(seed)
+    password = make_password(GENERATED_PASSWORD)  # hashing once keeps generation fast
+    User = get_user_model()
+    for index in range(count):
+        username = f'{tag}-user{index}'
+        yield User(username=username, email=f'{username}@example.com', password=password,
+                   first_name='Load', last_name=f'Tester {index}', email_verified=True)
+
+
+def _product(rng, tag, index, category_ids):
+    name = f'{rng.choice(PRODUCT_ADJECTIVES)} {rng.choice(PRODUCT_NOUNS)} ({rng.choice(PRODUCT_SIZES)})'
+    stock = 0 if rng.random() < 0.05 else rng.randint(1, 500)
+    return Product(
+        name=name,
+        slug=f'{tag}-{slugify(name)}-{index}',
+        category_id=rng.choice(category_ids) if category_ids else None,
+        description=f'{name} from {rng.choice(COUNTRIES)}. Generated product {index}.',
+        price=Decimal(rng.randint(99, 19999)) / 100,
+        image=f'products/generated/{tag}-{index}.jpg',
+        stock_quantity=stock,
+        is_available=rng.random() < 0.95,
+        country_of_origin=rng.choice(COUNTRIES),
+    )
+
+
+def _set_rating_aggregates(product, ratings):
+    product.rating_sum = sum(ratings)
+    product.review_count = len(ratings)
+    product.average_rating = round(product.rating_sum / len(ratings), 1) if ratings else 0
+    for rating in RATING_VALUES:
+        setattr(product, _histogram_field(rating), ratings.count(rating))
+
+
+def _products_with_ratings(seed, count, category_ids, max_reviews, user_count):
+    """Yield (product, [(user_index, rating), ...]) with the product's aggregates already set."""
+    rng = random.Random(f'{seed}:products')
+    tag = catalog_tag(seed)
+    for index in range(count):
+        product = _product(rng, tag, index, category_ids)
+        review_count = min(rng.randint(0, max_reviews), user_count)
+        reviewers = rng.sample(range(user_count), review_count)
+        ratings = rng.choices(RATING_VALUES, weights=RATING_WEIGHTS, k=review_count)
+        _set_rating_aggregates(product, ratings)
+        yield product, list(zip(reviewers, ratings))
+
+
+def _cart_items(seed, cart_ids, product_ids, max_items, batch_size):
+    """Yield CartItems priced at their product's current price, one price lookup per batch of carts."""
+    rng = random.Random(f'{seed}:carts')
+    for cart_batch in _batches(cart_ids, batch_size):
+        picks = [
+            (cart_id, product_ids[index], rng.randint(1, 5))
+            for cart_id in cart_batch
+            for index in rng.sample(range(len(product_ids)), min(rng.randint(1, max_items), len(product_ids)))
+        ]
+        prices = dict(Product.objects.filter(id__in={product_id for _, product_id, _ in picks})
+                      .values_list('id', 'price'))
+        for cart_id, product_id, quantity in picks:
+            yield CartItem(cart_id=cart_id, product_id=product_id, quantity=quantity,
+                           price_at_addition=prices[product_id])
+
+
+def generate_catalog(seed=1, categories=20, products=1000, users=100, max_reviews=5,
+                     carts=50, max_cart_items=5, batch_size=1000, on_batch=None):
+    """
+    Generate a catalog for the given seed and return the number of rows
+    created per model. on_batch(model, count) is called after every batch.
+    """
+    counts = {}
+
+    category_ids = array('q')
+    for batch in _insert(Category, _categories(seed, categories), batch_size, on_batch):
+        category_ids.extend(category.pk for category in batch)
+    counts['categories'] = len(category_ids)
+
+    user_ids = array('q')
+    for batch in _insert(get_user_model(), _users(seed, users), batch_size, on_batch):
+        user_ids.extend(user.pk for user in batch)
+    counts['users'] = len(user_ids)
+
+    product_ids = array('q')
+    counts['products'] = counts['images'] = counts['reviews'] = 0
+    rng = random.Random(f'{seed}:reviews')
+    generated = _products_with_ratings(seed, products, list(category_ids), max_reviews, len(user_ids))
+    for batch in _batches(generated, batch_size):
+        with transaction.atomic():
+            Product.objects.bulk_create([product for product, reviews in batch])
+            images = [ProductImage(product_id=product.pk, image=product.image.name, is_primary=True)
+                      for product, reviews in batch]
+            ProductImage.objects.bulk_create(images)
+            reviews = [
+                Review(product_id=product.pk, user_id=user_ids[user_index], rating=rating,
+                       comment=rng.choice(REVIEW_COMMENTS))
+                for product, product_reviews in batch
+                for user_index, rating in product_reviews
+            ]
+            Review.objects.bulk_create(reviews, batch_size=batch_size)
+        product_ids.extend(product.pk for product, reviews in batch)
+        counts['images'] += len(images)
+        counts['reviews'] += len(reviews)
+        if on_batch:
+            on_batch(Product, len(batch))
+    counts['products'] = len(product_ids)
+
+    cart_ids = array('q')
+    cart_users = (Cart(user_id=user_id) for user_id in user_ids[:carts])
+    for batch in _insert(Cart, cart_users, batch_size, on_batch):
+        cart_ids.extend(cart.pk for cart in batch)
+    counts['carts'] = len(cart_ids)
+    cart_items = _cart_items(seed, cart_ids, product_ids, max_cart_items, batch_size)
+    counts['cart items'] = sum(len(batch) for batch in _insert(CartItem, cart_items, batch_size, on_batch))
+
+    refresh_derived_data()
+    return counts
+
+
+def refresh_derived_data():
+    """Rebuild what product signals would have maintained for bulk-inserted rows."""
+    with transaction.atomic():
+        get_search_backend().rebuild()
+    catalog_bulk_changed()
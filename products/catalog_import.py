@@ -0,0 +1,346 @@
+"""
+Streaming catalog import from supplier files.
+
+Rows are read one at a time and processed in chunks, each in its own
+transaction: existing products are looked up with one query per key type,
+new products get unique slugs allocated for the whole chunk at once, and
+everything is written with bulk_create(update_conflicts=True) keyed on SKU
+(or on an explicit slug for rows without a known SKU). Rows with only a name
+always create a product. Only columns present in a row are changed, so a
+price book with just sku and price columns is a valid import. Categories
+missing from the database are created before a chunk is written.
+
+Bulk writes skip the product signals; the import applies their effects per
+chunk (search index, cart repricing) and once at the end (price statistics
+and caches).
+"""
+import csv
+import json
+from collections import Counter
+from decimal import Decimal, InvalidOperation
+
+from django.db import DatabaseError, transaction
+from django.db.models import Q
+from django.utils.text import slugify
+
+from cart.repricing import schedule_cart_repricing
+
+from .models import Category, Product
+from .search import get_search_backend
+from .signals import catalog_bulk_changed
+
+# Product fields an import row can set, besides the sku and slug keys
+IMPORT_FIELDS = ('name', 'category_id', 'description', 'price', 'stock_quantity', 'is_available',
+                 'country_of_origin')
+# Changes to these affect price statistics
+PRICE_STATS_FIELDS = ('price', 'category_id', 'is_available')
+# Room left after a slug base for -2, -3, ... suffixes
+SLUG_SUFFIX_LENGTH = 10
+MAX_REPORTED_ERRORS = 100
+
+TRUE_VALUES = {'1', 'true', 'yes', 'y'}
+FALSE_VALUES = {'0', 'false', 'no', 'n'}
+
+
+def read_catalog_file(file, file_format='csv'):
+    """
+    Yield (line_number, row) from an open CSV (with header) or JSONL file.
+    row is a dict with lower-cased keys, or None if the line cannot be parsed.
+    """
+    if file_format == 'jsonl':
+        for line_number, line in enumerate(file, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                record = None
+            if not isinstance(record, dict):
+                yield line_number, None
+                continue
+            yield line_number, {str(key).strip().lower(): value for key, value in record.items()}
+        return
+
+    reader = csv.DictReader(file)
+    for row in reader:
+        yield reader.line_num, {
+            str(key).strip().lower(): value for key, value in row.items() if key is not None
+        }
+
+
+def allocate_slugs(bases, reserved=(), model=Product):
+    """
+    Return a unique model slug for each base slug (suffixing -2, -3, ... on
+    collisions), checking the database once for the whole list.
+    """
+    base_length = model._meta.get_field('slug').max_length - SLUG_SUFFIX_LENGTH
+    default = model._meta.model_name
+    bases = [base[:base_length].strip('-') or default for base in bases]
+    taken = set(reserved)
+    taken.update(model.objects.filter(slug__in=set(bases)).values_list('slug', flat=True))
+
+    counts = Counter(bases)
+    clashing = {base for base in counts if base in taken or counts[base] > 1}
+    if clashing:
+        prefixes = Q()
+        for base in clashing:
+            prefixes |= Q(slug__startswith=f'{base}-')
+        taken.update(model.objects.filter(prefixes).values_list('slug', flat=True))
+
+    slugs = []
+    for base in bases:
+        slug, suffix = base, 1
+        while slug in taken:
+            suffix += 1
+            slug = f'{base}-{suffix}'
+        taken.add(slug)
+        slugs.append(slug)
+    return slugs
+
+
+def _text(row, column, max_length=None):
+    value = row.get(column)
+    if value is None:
+        return None
+    value = str(value).strip()
+    if not value:
+        return None
+    if max_length and len(value) > max_length:
+        raise ValueError(f'{column} is longer than {max_length} characters')
+    return value
+
+
+def _create_categories(rows, categories):
+    """
+    Create the categories named in rows that are not in categories (a
+    {casefolded name: id} map, updated in place), with unique slugs.
+    """
+    names = {}
+    for line_number, row in rows:
+        try:
+            name = _text(row, 'category', 100) if row is not None else None
+        except ValueError:
+            continue
+        if name is not None and name.casefold() not in categories:
+            names.setdefault(name.casefold(), name)
+    if not names:
+        return
+    slugs = allocate_slugs([slugify(name) for name in names.values()], model=Category)
+    for (key, name), slug in zip(names.items(), slugs):
+        category, created = Category.objects.get_or_create(name=name, defaults={'slug': slug})
+        categories[key] = category.pk
+
+
+def _parse_row(row, categories):
+    """Clean a raw row into Product field values; only columns present are returned."""
+    values = {}
+    for column, max_length in (('sku', 64), ('name', 200), ('description', None), ('country_of_origin', 100)):
+        value = _text(row, column, max_length)
+        if value is not None:
+            values[column] = value
+
+    slug = _text(row, 'slug')
+    if slug is not None:
+        values['slug'] = slugify(slug)[:200]
+        if not values['slug']:
+            raise ValueError(f'invalid slug {slug!r}')
+
+    price = _text(row, 'price')
+    if price is not None:
+        try:
+            amount = Decimal(price)
+            # NaN survives quantize() and then raises on comparison
+            if not amount.is_finite():
+                raise InvalidOperation
+            values['price'] = amount.quantize(Decimal('0.01'))
+        except InvalidOperation:
+            raise ValueError(f'invalid price {price!r}')
+        if values['price'] < 0 or values['price'] >= 10 ** 8:
+            raise ValueError(f'price {price} out of range')
+
+    stock = _text(row, 'stock_quantity')
+    if stock is not None:
+        try:
+            values['stock_quantity'] = int(stock)
+        except ValueError:
+            raise ValueError(f'invalid stock_quantity {stock!r}')
+        if values['stock_quantity'] < 0:
+            raise ValueError('stock_quantity cannot be negative')
+
+    available = _text(row, 'is_available')
+    if available is not None:
+        if available.lower() in TRUE_VALUES:
+            values['is_available'] = True
+        elif available.lower() in FALSE_VALUES:
+            values['is_available'] = False
+        else:
+            raise ValueError(f'invalid is_available {available!r}')
+
+    category = _text(row, 'category', 100)
+    if category is not None:
+        category_id = categories.get(category.casefold())
+        if category_id is None:
+            raise ValueError(f'unknown category {category!r}')
+        values['category_id'] = category_id
+
+    if 'sku' not in values and 'slug' not in values and 'name' not in values:
+        raise ValueError('row needs a sku, slug or name')
+    return values
+
+
+class _ChunkResult:
+    def __init__(self):
+        self.created = 0
+        self.updated = 0
+        self.unchanged = 0
+        self.errors = []
+        self.repriced_ids = []
+        self.price_stats_changed = False
+
+
+def _import_chunk(rows, categories, create_categories):
+    result = _ChunkResult()
+    if create_categories:
+        _create_categories(rows, categories)
+
+    parsed = []
+    for line_number, row in rows:
+        if row is None:
+            result.errors.append((line_number, 'unreadable row'))
+            continue
+        try:
+            parsed.append((line_number, _parse_row(row, categories)))
+        except ValueError as exc:
+            result.errors.append((line_number, str(exc)))
+
+    fields = ('id', 'sku', 'slug', *IMPORT_FIELDS)
+    skus = {values['sku'] for line_number, values in parsed if 'sku' in values}
+    by_sku = {product.sku: product for product in Product.objects.filter(sku__in=skus).only(*fields)}
+
+    # Rows not matched on SKU are matched on an explicit slug
+    slugs = {values['slug'] for line_number, values in parsed if 'slug' in values and values.get('sku') not in by_sku}
+    by_slug = {product.slug: product for product in Product.objects.filter(slug__in=slugs).only(*fields)}
+
+    # Resolve each row to a key; later rows for the same key override earlier ones
+    targets = {}
+    for line_number, values in parsed:
+        if values.get('sku') in by_sku:
+            key = ('sku', values['sku'])
+            existing = by_sku[values['sku']]
+        elif 'slug' in values:
+            key = ('slug', values['slug'])
+            existing = by_slug.get(key[1])
+        elif 'sku' in values:
+            key = ('sku', values['sku'])
+            existing = None
+        else:
+            # Name only: never matched to an existing product by its derived slug
+            key = ('new', line_number)
+            existing = None
+        if key in targets:
+            targets[key][2].update(values)
+        else:
+            targets[key] = [line_number, existing, dict(values)]
+
+    unslugged = []
+    products = {'sku': [], 'slug': [], 'new': []}
+    for (key_field, key), (line_number, existing, values) in targets.items():
+        if existing is not None:
+            current = {field: getattr(existing, field) for field in ('sku', 'slug', *IMPORT_FIELDS)}
+            merged = {**current, **values, 'slug': existing.slug}
+            if merged == current:
+                result.unchanged += 1
+                continue
+            result.updated += 1
+            if merged['price'] != current['price']:
+                result.repriced_ids.append(existing.pk)
+            if any(merged[field] != current[field] for field in PRICE_STATS_FIELDS):
+                result.price_stats_changed = True
+        else:
+            missing = [field for field in ('name', 'price') if field not in values]
+            if missing:
+                result.errors.append((line_number, f"new product needs {' and '.join(missing)}"))
+                continue
+            merged = {'description': '', **values}
+            if key_field == 'slug':
+                merged['slug'] = key
+            else:
+                unslugged.append(merged)
+            result.created += 1
+            result.price_stats_changed = True
+        products[key_field].append(merged)
+
+    # Slugs of other new rows must avoid existing slugs and those claimed by slug-keyed rows
+    bases = [slugify(values['name']) for values in unslugged]
+    reserved = {values['slug'] for values in products['slug']}
+    for values, slug in zip(unslugged, allocate_slugs(bases, reserved)):
+        values['slug'] = slug
+
+    update_fields = [*IMPORT_FIELDS, 'updated_at']
+    with transaction.atomic():
+        if products['sku']:
+            Product.objects.bulk_create(
+                [Product(**values) for values in products['sku']],
+                update_conflicts=True, unique_fields=['sku'], update_fields=update_fields,
+            )
+        if products['slug']:
+            Product.objects.bulk_create(
+                [Product(**values) for values in products['slug']],
+                update_conflicts=True, unique_fields=['slug'], update_fields=[*update_fields, 'sku'],
+            )
+        if products['new']:
+            Product.objects.bulk_create([Product(**values) for values in products['new']])
+
+    touched = Product.objects.filter(
+        Q(sku__in=[values['sku'] for values in products['sku']]) |
+        Q(slug__in=[values['slug'] for values in products['slug'] + products['new']])
+    ).values_list('id', flat=True)
+    get_search_backend().index_products(list(touched))
+    return result
+
+
+def import_catalog(rows, chunk_size=1000, create_categories=False, on_chunk=None):
+    """
+    Import (line_number, row) pairs from read_catalog_file() chunk by chunk.
+    Returns a report with created, updated, unchanged and failed row counts
+    and the first MAX_REPORTED_ERRORS (line_number, message) errors.
+    on_chunk(number, report) is called after each chunk with the running report.
+    """
+    report = {'created': 0, 'updated': 0, 'unchanged': 0, 'failed': 0, 'errors': []}
+    categories = {name.casefold(): category_id for category_id, name in Category.objects.values_list('id', 'name')}
+    price_stats_changed = False
+    chunk = []
+    chunk_number = 0
+
+    def flush():
+        nonlocal chunk, chunk_number, price_stats_changed
+        try:
+            result = _import_chunk(chunk, categories, create_categories)
+        except DatabaseError as exc:
+            # The chunk's transaction was rolled back; report every row in it
+            result = _ChunkResult()
+            result.errors = [(line_number, f'chunk failed: {exc}') for line_number, row in chunk]
+        if result.repriced_ids:
+            schedule_cart_repricing(result.repriced_ids)
+        price_stats_changed = price_stats_changed or result.price_stats_changed
+        report['created'] += result.created
+        report['updated'] += result.updated
+        report['unchanged'] += result.unchanged
+        report['failed'] += len(result.errors)
+        room = MAX_REPORTED_ERRORS - len(report['errors'])
+        report['errors'].extend(result.errors[:max(room, 0)])
+        chunk_number += 1
+        if on_chunk:
+            on_chunk(chunk_number, report)
+        chunk = []
+
+    for line_number, row in rows:
+        chunk.append((line_number, row))
+        if len(chunk) >= chunk_size:
+            flush()
+    if chunk:
+        flush()
+
+    if report['created'] or report['updated']:
+        catalog_bulk_changed(prices=price_stats_changed)
+    return report
@@ -1,20 +1,24 @@
 """
 Context processors for products app.
 """
-from django.db.models import Count, Q
-from .models import Category
+from django.utils.functional import SimpleLazyObject
+
+from .caching import get_categories_with_counts
+from .page_cache import CATEGORY_NAV_TAG, tag_page
 
 
 def categories(request):
     """
     Add all active categories to the template context.
+    Loaded when a template first uses them, which also tags the cached page
+    so category and product count changes purge it.
     """
-    categories_list = Category.objects.filter(is_active=True).annotate(
-        product_count=Count('products', filter=Q(products__is_available=True))
-    ).order_by('name')
-    
+    def categories_list():
+        tag_page(request, CATEGORY_NAV_TAG)
+        return get_categories_with_counts()
+
     return {
-        'all_categories': categories_list,
+        'all_categories': SimpleLazyObject(categories_list),
     }
 
 
@@ -0,0 +1,101 @@
+"""
+Filter-aware facet counts for the product list sidebar.
+
+Each facet family is computed with one grouped query over the filtered
+product set, leaving out the family's own filter so customers can see what
+switching it would give them:
+
+- categories: GROUP BY category (ignores the category filter)
+- countries: GROUP BY country_of_origin (ignores the country filter)
+- availability: in-stock count (ignores the in-stock filter)
+- prices: one conditional COUNT per price bucket (ignores the price range)
+
+Results are cached per normalized filter key under the catalog version, so
+any Product or Category write invalidates them.
+"""
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q
+
+from .caching import CATALOG, get_categories_with_counts, versioned_key
+from .filters import apply_catalog_filters, filters_cache_key
+from .search import match_products
+
+# Lower bounds of the price buckets; the last bucket is open-ended
+DEFAULT_PRICE_BUCKETS = [0, 5, 10, 20, 50]
+# Smallest price difference (prices have two decimal places)
+PRICE_STEP = Decimal('0.01')
+
+
+def get_price_buckets():
+    """Return [(min, max or None), ...] from CATALOG_PRICE_BUCKETS."""
+    edges = [Decimal(str(edge)) for edge in getattr(settings, 'CATALOG_PRICE_BUCKETS', DEFAULT_PRICE_BUCKETS)]
+    return list(zip(edges, edges[1:] + [None]))
+
+
+def _category_facets(base, filters):
+    rows = apply_catalog_filters(base, filters, exclude=('category',)).order_by().values(
+        'category_id'
+    ).annotate(count=Count('id'))
+    counts = {row['category_id']: row['count'] for row in rows}
+    return [
+        {'slug': category.slug, 'name': category.name, 'count': counts.get(category.id, 0)}
+        for category in get_categories_with_counts()
+    ]
+
+
+def _country_facets(base, filters):
+    rows = apply_catalog_filters(base, filters, exclude=('country',)).exclude(country_of_origin='').order_by().values(
+        'country_of_origin'
+    ).annotate(count=Count('id')).order_by('-count', 'country_of_origin')
+    return [{'name': row['country_of_origin'], 'count': row['count']} for row in rows]
+
+
+def _in_stock_count(base, filters):
+    queryset = apply_catalog_filters(base, filters, exclude=('in_stock',)).order_by()
+    return queryset.aggregate(in_stock=Count('id', filter=Q(stock_quantity__gt=0)))['in_stock']
+
+
+def _price_facets(base, filters):
+    buckets = get_price_buckets()
+    conditions = {}
+    for index, (low, high) in enumerate(buckets):
+        condition = Q(price__gte=low)
+        if high is not None:
+            condition &= Q(price__lt=high)
+        conditions[f'bucket_{index}'] = Count('id', filter=condition)
+
+    queryset = apply_catalog_filters(base, filters, exclude=('min_price', 'max_price')).order_by()
+    counts = queryset.aggregate(**conditions)
+    # Buckets are [low, high); links filter with max_price (inclusive), so they
+    # use the last cent below high to list exactly the products counted
+    return [
+        {'min': low, 'max': high, 'max_price': high - PRICE_STEP if high is not None else None,
+         'count': counts[f'bucket_{index}']}
+        for index, (low, high) in enumerate(buckets)
+    ]
+
+
+def get_catalog_facets(base, filters):
+    """
+    Facet counts for the normalized filters over the base Product queryset.
+    The base queryset must not depend on anything besides the catalog
+    (e.g. Product.objects.filter(is_available=True)).
+    """
+    key = versioned_key(CATALOG, 'facets', filters_cache_key(filters))
+    facets = cache.get(key)
+    if facets is None:
+        if filters['search']:
+            # Counts cover every match, not just the capped, ranked page results
+            base = match_products(base, filters['search'])
+            filters = {**filters, 'search': ''}
+        facets = {
+            'categories': _category_facets(base, filters),
+            'countries': _country_facets(base, filters),
+            'in_stock': _in_stock_count(base, filters),
+            'prices': _price_facets(base, filters),
+        }
+        cache.set(key, facets, getattr(settings, 'CATALOG_CACHE_TIMEOUT', 3600))
+    return facets
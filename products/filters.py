@@ -0,0 +1,59 @@
+"""
+Catalog filter parsing shared by the product list view, facets and caches.
+"""
+import hashlib
+from decimal import Decimal, InvalidOperation
+
+from .search import search_products
+
+CATALOG_FILTERS = ('search', 'category', 'country', 'min_price', 'max_price', 'in_stock')
+
+
+def _parse_price(value):
+    try:
+        return Decimal(value).quantize(Decimal('0.01'))
+    except (InvalidOperation, TypeError, ValueError):
+        return None
+
+
+def normalize_catalog_filters(params):
+    """
+    Clean catalog filter values from GET params.
+    Invalid prices are dropped, so equivalent requests normalize identically.
+    """
+    return {
+        'search': ' '.join(params.get('search', '').split()),
+        'category': params.get('category', '').strip(),
+        'country': params.get('country', '').strip(),
+        'min_price': _parse_price(params.get('min_price', '').strip()),
+        'max_price': _parse_price(params.get('max_price', '').strip()),
+        'in_stock': bool(params.get('in_stock', '')),
+    }
+
+
+def apply_catalog_filters(queryset, filters, exclude=()):
+    """
+    Apply normalized filters to a Product queryset, skipping names in exclude.
+    The search is ranked within the other filters, so its result cap only
+    ever trims the final ordered result.
+    """
+    if filters['category'] and 'category' not in exclude:
+        queryset = queryset.filter(category__slug=filters['category'])
+    if filters['country'] and 'country' not in exclude:
+        queryset = queryset.filter(country_of_origin=filters['country'])
+    if filters['min_price'] is not None and 'min_price' not in exclude:
+        queryset = queryset.filter(price__gte=filters['min_price'])
+    if filters['max_price'] is not None and 'max_price' not in exclude:
+        queryset = queryset.filter(price__lte=filters['max_price'])
+    if filters['in_stock'] and 'in_stock' not in exclude:
+        queryset = queryset.filter(stock_quantity__gt=0)
+    if filters['search'] and 'search' not in exclude:
+        queryset = search_products(queryset, filters['search'])
+    return queryset
+
+
+def filters_cache_key(filters, *extra):
+    """Short, stable cache key fragment for a normalized filter dict."""
+    parts = [f'{name}={filters[name]}' for name in CATALOG_FILTERS]
+    parts.extend(str(part) for part in extra)
+    return hashlib.md5('&'.join(parts).encode()).hexdigest()
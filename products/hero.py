@@ -0,0 +1,158 @@
+"""
+Hero carousel images for the homepage.
+
+The carousel is described by a small JSON manifest (ordered image names and
+their static URLs) that is built once by `build_hero_manifest` after
+collectstatic, or lazily on first use. The parsed manifest is cached in
+process and only re-read when the manifest file's mtime changes, so the
+homepage does not scan the filesystem on each request.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.templatetags.static import static
+
+logger = logging.getLogger(__name__)
+
+HERO_IMAGE_DIR = 'logo'
+HERO_MAX_IMAGES = 10
+
+# Images to exclude
+HERO_EXCLUDED_IMAGES = [
+    'Image_12-2-25_at_7.25_PM.jpg',  # Lady in grocery/shopping - exclude
+]
+
+# Priority images to include - store exterior should be first
+HERO_PRIORITY_IMAGES = [
+    'Image_12-2-25_at_3.39_PM.jpg',  # Store exterior - FIRST
+    'Image_12-2-25_at_4.11_PM.jpg',  # Kitchen lady attending to customer - KEEP
+    'Image_12-2-25_at_3.57_PM_2.jpg',  # Cooked food area
+    'Image_12-2-25_at_4.11_PM_2.jpg',  # Cooked food area
+    # Man with mask - will be added from other images if not in priority
+]
+
+# Position dropped from the final carousel (3rd image, 0-indexed)
+HERO_SKIPPED_POSITION = 2
+
+_cache = {'images': None, 'mtime': None, 'checked_at': 0.0}
+_lock = threading.Lock()
+
+
+def get_manifest_path():
+    """Location of the hero manifest file."""
+    return Path(getattr(settings, 'HERO_MANIFEST_PATH', Path(settings.STATIC_ROOT) / 'hero_manifest.json'))
+
+
+def find_hero_image_dir():
+    """Return the first existing hero image directory, checking STATIC_ROOT last."""
+    roots = list(getattr(settings, 'STATICFILES_DIRS', []))
+    if settings.STATIC_ROOT:
+        roots.append(settings.STATIC_ROOT)
+    for root in roots:
+        if isinstance(root, (list, tuple)):
+            root = root[1]  # (prefix, path) entries
+        image_dir = Path(root) / HERO_IMAGE_DIR
+        if image_dir.is_dir():
+            return image_dir
+    return None
+
+
+def select_hero_images(filenames):
+    """Order and filter available image filenames for the carousel."""
+    available = set(filenames)
+
+    # First, add priority images (store exterior will be first)
+    hero_images = [name for name in HERO_PRIORITY_IMAGES if name in available]
+
+    # Then add other images, excluding excluded images and already added priority images
+    for name in sorted(available):
+        if name in HERO_EXCLUDED_IMAGES or name in HERO_PRIORITY_IMAGES:
+            continue
+        if len(hero_images) >= HERO_MAX_IMAGES:
+            break
+        hero_images.append(name)
+
+    if len(hero_images) > HERO_SKIPPED_POSITION:
+        hero_images.pop(HERO_SKIPPED_POSITION)
+    return hero_images
+
+
+def build_hero_manifest(write=True):
+    """
+    Scan the hero image directory and build the manifest.
+    URLs go through the static files storage, so they are hashed when a
+    manifest storage is configured.
+    """
+    image_dir = find_hero_image_dir()
+    filenames = []
+    if image_dir is not None:
+        filenames = [entry.name for entry in os.scandir(image_dir) if entry.name.endswith('.jpg')]
+
+    manifest = {
+        'images': [
+            {'name': name, 'url': static(f'{HERO_IMAGE_DIR}/{name}')}
+            for name in select_hero_images(filenames)
+        ],
+    }
+
+    if write:
+        path = get_manifest_path()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix('.tmp')
+        tmp_path.write_text(json.dumps(manifest, indent=2) + '\n')
+        os.replace(tmp_path, path)
+    return manifest
+
+
+def _load_manifest(path):
+    with open(path) as manifest_file:
+        manifest = json.load(manifest_file)
+    return [image['url'] for image in manifest.get('images', [])]
+
+
+def get_hero_images():
+    """
+    Return the carousel image URLs.
+    The manifest's mtime is checked at most once per HERO_MANIFEST_CHECK_INTERVAL
+    seconds; a missing manifest is built on first use.
+    """
+    interval = getattr(settings, 'HERO_MANIFEST_CHECK_INTERVAL', 60)
+    now = time.monotonic()
+    if _cache['images'] is not None and now - _cache['checked_at'] < interval:
+        return _cache['images']
+
+    with _lock:
+        if _cache['images'] is not None and now - _cache['checked_at'] < interval:
+            return _cache['images']
+
+        path = get_manifest_path()
+        try:
+            try:
+                mtime = path.stat().st_mtime
+            except FileNotFoundError:
+                try:
+                    manifest = build_hero_manifest()
+                    _cache['mtime'] = path.stat().st_mtime
+                except OSError as e:
+                    # Read-only deploys still get a carousel, cached in process only
+                    logger.warning(f"Could not write hero manifest to {path}: {e}")
+                    manifest = build_hero_manifest(write=False)
+                    _cache['mtime'] = None
+                _cache['images'] = [image['url'] for image in manifest['images']]
+            else:
+                if mtime != _cache['mtime'] or _cache['images'] is None:
+                    _cache['images'] = _load_manifest(path)
+                    _cache['mtime'] = mtime
+        except Exception:
+            # If there's any error, keep serving what we had (or nothing)
+            logger.exception('Error loading hero images')
+            if _cache['images'] is None:
+                _cache['images'] = []
+
+        _cache['checked_at'] = now
+        return _cache['images']
@@ -0,0 +1,22 @@
+"""
+Management command to build the homepage hero carousel manifest.
+Run after collectstatic so the manifest records hashed static URLs.
+"""
+from django.core.management.base import BaseCommand
+from products.hero import build_hero_manifest, get_manifest_path
+
+
+class Command(BaseCommand):
+    help = 'Build the hero carousel image manifest used by the homepage'
+
+    def handle(self, *args, **options):
+        self.stdout.write('Building hero image manifest...')
+
+        manifest = build_hero_manifest()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Hero manifest written to {get_manifest_path()} '
+            f'({len(manifest["images"])} images)'
+        ))
+        for image in manifest['images']:
+            self.stdout.write(f'  • {image["name"]} → {image["url"]}')
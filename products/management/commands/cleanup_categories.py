@@ -4,6 +4,7 @@ This will deactivate old/duplicate categories and keep only the correct ones.
 """
 from django.core.management.base import BaseCommand
 from products.models import Category, Product
+from products.signals import catalog_bulk_changed
 
 
 class Command(BaseCommand):
@@ -100,6 +101,9 @@ class Command(BaseCommand):
                             self.style.WARNING(f'✗ Deactivated old category: {category.name}')
                         )
         
+        if migrated_count:
+            catalog_bulk_changed()
+        
         # Ensure all keep categories are active
         activated_count = 0
         for cat_name in keep_categories:
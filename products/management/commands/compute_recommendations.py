@@ -0,0 +1,47 @@
+"""
+Management command to compute "frequently added together" recommendations.
+Incremental by default: only cart items added since the last run are counted.
+"""
+from django.core.management.base import BaseCommand
+from products.recommendations import DEFAULT_TOP_N, compute_recommendations
+
+
+class Command(BaseCommand):
+    help = 'Update product co-occurrence counts from cart items and refresh recommendations'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Discard existing counts and recompute from all cart items',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Number of cart items to process per batch',
+        )
+        parser.add_argument(
+            '--top-n',
+            type=int,
+            default=DEFAULT_TOP_N,
+            help='Number of related products to keep per product',
+        )
+
+    def handle(self, *args, **options):
+        mode = 'full' if options['full'] else 'incremental'
+        self.stdout.write(f'Computing recommendations ({mode})...')
+
+        run = compute_recommendations(
+            batch_size=options['batch_size'],
+            top_n=options['top_n'],
+            full=options['full'],
+        )
+
+        if not run.cart_items_processed:
+            self.stdout.write(self.style.WARNING('No new cart items since the last run'))
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f'Processed {run.cart_items_processed} cart items, '
+            f'refreshed recommendations for {run.products_refreshed} products'
+        ))
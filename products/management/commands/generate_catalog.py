@@ -0,0 +1,70 @@
+"""
+Management command to generate a synthetic catalog for load testing.
+Creates categories, users, products with images and reviews, and carts from
+a seed, using batched bulk inserts so even millions of products fit in flat
+memory. Generated users log in with the password 'loadtest'.
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from products.catalog_generator import catalog_exists, catalog_tag, generate_catalog
+
+
+class Command(BaseCommand):
+    help = 'Generate a deterministic synthetic catalog (categories, products, reviews, users, carts)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=1, help='Random seed; the same seed gives the same data')
+        parser.add_argument('--categories', type=int, default=20, help='Number of categories to create')
+        parser.add_argument('--products', type=int, default=1000, help='Number of products to create')
+        parser.add_argument('--users', type=int, default=100, help='Number of users to create')
+        parser.add_argument(
+            '--max-reviews',
+            type=int,
+            default=5,
+            help='Maximum reviews per product (each from a different user)',
+        )
+        parser.add_argument('--carts', type=int, default=50, help='Number of users who get a cart')
+        parser.add_argument('--max-cart-items', type=int, default=5, help='Maximum distinct products per cart')
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Number of rows written per bulk insert',
+        )
+
+    def handle(self, *args, **options):
+        seed = options['seed']
+        if catalog_exists(seed):
+            raise CommandError(
+                f"A catalog tagged '{catalog_tag(seed)}' already exists; use another --seed or flush the database"
+            )
+        if options['carts'] > options['users']:
+            raise CommandError('--carts cannot exceed --users (each cart belongs to one user)')
+
+        started = time.monotonic()
+        written = {}
+
+        def progress(model, count):
+            name = model._meta.verbose_name_plural
+            written[name] = written.get(name, 0) + count
+            self.stdout.write(f'{written[name]} {name} written ({time.monotonic() - started:.1f}s)')
+
+        self.stdout.write(f"Generating catalog '{catalog_tag(seed)}'...")
+        counts = generate_catalog(
+            seed=seed,
+            categories=options['categories'],
+            products=options['products'],
+            users=options['users'],
+            max_reviews=options['max_reviews'],
+            carts=options['carts'],
+            max_cart_items=options['max_cart_items'],
+            batch_size=options['batch_size'],
+            on_batch=progress,
+        )
+
+        summary = ', '.join(f'{count} {name}' for name, count in counts.items())
+        self.stdout.write(self.style.SUCCESS(
+            f'Catalog generated in {time.monotonic() - started:.1f}s: {summary}'
+        ))
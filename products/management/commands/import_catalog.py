@@ -0,0 +1,80 @@
+"""
+Management command to import or update products from a supplier CSV/JSONL file.
+Rows are streamed and upserted in chunks keyed on SKU (or slug); rows with
+only a name create new products. Only the columns present in the file are
+changed. Columns: sku, slug, name, category,
+description, price, stock_quantity, is_available, country_of_origin.
+"""
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from products.catalog_import import import_catalog, read_catalog_file
+
+
+class Command(BaseCommand):
+    help = 'Import products from a CSV or JSONL supplier file (batched upsert on SKU or slug)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="CSV (with header) or JSONL file ('-' reads stdin)")
+        parser.add_argument(
+            '--format',
+            choices=['csv', 'jsonl'],
+            default=None,
+            help='File format (default: from the file extension, csv for stdin)',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=1000,
+            help='Number of rows upserted per transaction',
+        )
+        parser.add_argument(
+            '--create-categories',
+            action='store_true',
+            help='Create categories that do not exist instead of rejecting their rows',
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options['format']
+        if file_format is None:
+            file_format = 'jsonl' if path.endswith(('.jsonl', '.ndjson')) else 'csv'
+
+        started = time.monotonic()
+
+        def progress(number, report):
+            self.stdout.write(
+                f"Chunk {number}: {report['created']} created, {report['updated']} updated, "
+                f"{report['unchanged']} unchanged, {report['failed']} failed "
+                f"({time.monotonic() - started:.1f}s)"
+            )
+
+        try:
+            file = sys.stdin if path == '-' else open(path, newline='', encoding='utf-8-sig')
+        except OSError as exc:
+            raise CommandError(f'Cannot read {path}: {exc}')
+        with file:
+            report = import_catalog(
+                read_catalog_file(file, file_format),
+                chunk_size=options['chunk_size'],
+                create_categories=options['create_categories'],
+                on_chunk=progress,
+            )
+
+        for line_number, message in report['errors']:
+            self.stdout.write(self.style.WARNING(f'Line {line_number}: {message}'))
+        if report['failed'] > len(report['errors']):
+            self.stdout.write(self.style.WARNING(
+                f"... and {report['failed'] - len(report['errors'])} more failed rows"
+            ))
+
+        summary = (
+            f"Catalog imported in {time.monotonic() - started:.1f}s: {report['created']} created, "
+            f"{report['updated']} updated, {report['unchanged']} unchanged, {report['failed']} failed"
+        )
+        if report['failed']:
+            self.stdout.write(self.style.WARNING(summary))
+        else:
+            self.stdout.write(self.style.SUCCESS(summary))
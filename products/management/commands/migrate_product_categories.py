@@ -3,6 +3,7 @@ Management command to migrate products from old categories to new categories.
 """
 from django.core.management.base import BaseCommand
 from products.models import Category, Product
+from products.signals import catalog_bulk_changed
 
 
 class Command(BaseCommand):
@@ -45,6 +46,9 @@ class Command(BaseCommand):
                 self.stdout.write(
                     self.style.WARNING(f'Category "{old_name}" or "{new_name}" not found, skipping...')
                 )
+
+        if migrated_count:
+            catalog_bulk_changed()
         
         self.stdout.write(self.style.SUCCESS(f'\nMigration complete! Migrated {migrated_count} products.'))
 
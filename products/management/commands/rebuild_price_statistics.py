@@ -0,0 +1,17 @@
+"""
+Management command to rebuild precomputed price statistics.
+Recomputes min/max price and the price histogram globally and per category.
+"""
+from django.core.management.base import BaseCommand
+from products.price_stats import rebuild_price_statistics
+
+
+class Command(BaseCommand):
+    help = 'Rebuild price statistics (min, max, histogram) for all categories'
+
+    def handle(self, *args, **options):
+        self.stdout.write('Rebuilding price statistics...')
+
+        scope_count = rebuild_price_statistics()
+
+        self.stdout.write(self.style.SUCCESS(f'Price statistics rebuilt for {scope_count} scopes'))
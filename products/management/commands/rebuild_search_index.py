@@ -0,0 +1,20 @@
+"""
+Management command to rebuild the product full-text search index.
+Uses the backend selected by PRODUCT_SEARCH_BACKEND (or the database default).
+"""
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from products.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search index for all products'
+
+    def handle(self, *args, **options):
+        backend = get_search_backend()
+        self.stdout.write(f'Rebuilding search index with {backend.__class__.__name__}...')
+
+        with transaction.atomic():
+            indexed = backend.rebuild()
+
+        self.stdout.write(self.style.SUCCESS(f'Search index rebuilt. Products indexed: {indexed}'))
@@ -0,0 +1,38 @@
+"""
+Management command to backfill or reconcile denormalized product ratings.
+Recomputes rating sums, counts, averages and star histograms from reviews.
+"""
+from django.core.management.base import BaseCommand
+from products.ratings import reconcile_ratings
+
+
+class Command(BaseCommand):
+    help = 'Backfill and reconcile stored product rating aggregates from reviews'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Report products with stale aggregates without updating them',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Number of products to read and update per batch',
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        self.stdout.write('Reconciling product ratings...')
+
+        stale_count = reconcile_ratings(batch_size=options['batch_size'], dry_run=dry_run)
+
+        if dry_run:
+            self.stdout.write(self.style.WARNING(
+                f'{stale_count} products have stale rating aggregates (dry run, nothing changed)'
+            ))
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                f'Rating aggregates reconciled. Products updated: {stale_count}'
+            ))
@@ -0,0 +1,66 @@
+from django.db import migrations
+
+
+SQLITE_FORWARD = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS products_product_fts "
+    "USING fts5(name, description, country_of_origin, tokenize='unicode61 remove_diacritics 2')",
+    "INSERT INTO products_product_fts (rowid, name, description, country_of_origin) "
+    "SELECT id, name, description, country_of_origin FROM products_product",
+]
+SQLITE_REVERSE = [
+    "DROP TABLE IF EXISTS products_product_fts",
+]
+
+POSTGRES_FORWARD = [
+    "CREATE TABLE IF NOT EXISTS products_product_search ("
+    "product_id bigint PRIMARY KEY REFERENCES products_product (id) ON DELETE CASCADE, "
+    "document tsvector NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS products_product_search_document_gin "
+    "ON products_product_search USING gin (document)",
+    "INSERT INTO products_product_search (product_id, document) "
+    "SELECT id, "
+    "setweight(to_tsvector('english', coalesce(name, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(country_of_origin, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(description, '')), 'C') "
+    "FROM products_product",
+]
+POSTGRES_REVERSE = [
+    "DROP TABLE IF EXISTS products_product_search",
+]
+
+
+def _run(schema_editor, statements):
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        with schema_editor.connection.cursor() as cursor:
+            cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+            if not cursor.fetchone()[0]:
+                # Without FTS5 the app falls back to unranked icontains search
+                return
+        _run(schema_editor, SQLITE_FORWARD)
+    elif vendor == 'postgresql':
+        _run(schema_editor, POSTGRES_FORWARD)
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        _run(schema_editor, SQLITE_REVERSE)
+    elif vendor == 'postgresql':
+        _run(schema_editor, POSTGRES_REVERSE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0002_product_rating_aggregates'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.30 on 2026-10-18 07:06
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0004_product_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PriceStatistics',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(max_length=40, unique=True, verbose_name='scope')),
+                ('product_count', models.PositiveIntegerField(default=0, verbose_name='product count')),
+                ('min_price', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True, verbose_name='min price')),
+                ('max_price', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True, verbose_name='max price')),
+                ('histogram', models.JSONField(blank=True, default=list, verbose_name='histogram')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='updated at')),
+                ('category', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='price_statistics', to='products.category', verbose_name='category')),
+            ],
+            options={
+                'verbose_name': 'price statistics',
+                'verbose_name_plural': 'price statistics',
+            },
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 4.2.30 on 2026-10-18 07:08
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0005_price_statistics'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductRecommendation',
+            fields=[
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='recommendation', serialize=False, to='products.product', verbose_name='product')),
+                ('related_ids', models.JSONField(default=list, verbose_name='related product ids')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='updated at')),
+            ],
+            options={
+                'verbose_name': 'product recommendation',
+                'verbose_name_plural': 'product recommendations',
+            },
+        ),
+        migrations.CreateModel(
+            name='RecommendationRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_cart_item_id', models.BigIntegerField(default=0, verbose_name='last cart item id')),
+                ('cart_items_processed', models.PositiveIntegerField(default=0, verbose_name='cart items processed')),
+                ('products_refreshed', models.PositiveIntegerField(default=0, verbose_name='products refreshed')),
+                ('started_at', models.DateTimeField(auto_now_add=True, verbose_name='started at')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='finished at')),
+            ],
+            options={
+                'verbose_name': 'recommendation run',
+                'verbose_name_plural': 'recommendation runs',
+                'ordering': ['-started_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ProductCoOccurrence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('count', models.PositiveIntegerField(default=0, verbose_name='count')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='co_occurrences', to='products.product', verbose_name='product')),
+                ('related', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='products.product', verbose_name='related product')),
+            ],
+            options={
+                'verbose_name': 'product co-occurrence',
+                'verbose_name_plural': 'product co-occurrences',
+                'indexes': [models.Index(fields=['product', '-count'], name='products_pr_product_05c5cc_idx')],
+                'unique_together': {('product', 'related')},
+            },
+        ),
+    ]
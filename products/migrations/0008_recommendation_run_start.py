@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-18 07:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0007_product_sku'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recommendationrun',
+            name='start_cart_item_id',
+            field=models.BigIntegerField(default=0, verbose_name='start cart item id'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+from django.core.management import call_command
+from django.db import migrations
+
+
+def create_cache_table(apps, schema_editor):
+    # Production falls back to the database cache when REDIS_URL is unset (see
+    # settings.CACHES), and every page reads it, so the table must exist on
+    # every deployment that runs migrate. Does nothing for other cache backends
+    # or when the table already exists.
+    call_command('createcachetable', database=schema_editor.connection.alias, verbosity=0)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0008_recommendation_run_start'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_cache_table, migrations.RunPython.noop),
+    ]
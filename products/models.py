@@ -43,6 +43,8 @@ class Product(models.Model):
     """
     name = models.CharField(_('name'), max_length=200)
     slug = models.SlugField(_('slug'), max_length=200, unique=True, blank=True)
+    # Supplier stock-keeping unit; the key used by import_catalog when present
+    sku = models.CharField(_('SKU'), max_length=64, unique=True, null=True, blank=True)
     category = models.ForeignKey(
         Category,
         on_delete=models.SET_NULL,
@@ -61,6 +63,15 @@ class Product(models.Model):
     stock_quantity = models.PositiveIntegerField(_('stock quantity'), default=0)
     is_available = models.BooleanField(_('is available'), default=True)
     country_of_origin = models.CharField(_('country of origin'), max_length=100, blank=True)
+    # Denormalized review aggregates, maintained by products.ratings
+    rating_sum = models.PositiveIntegerField(_('rating sum'), default=0, editable=False)
+    review_count = models.PositiveIntegerField(_('review count'), default=0, editable=False)
+    average_rating = models.FloatField(_('average rating'), default=0, editable=False)
+    rating_1_count = models.PositiveIntegerField(_('1 star reviews'), default=0, editable=False)
+    rating_2_count = models.PositiveIntegerField(_('2 star reviews'), default=0, editable=False)
+    rating_3_count = models.PositiveIntegerField(_('3 star reviews'), default=0, editable=False)
+    rating_4_count = models.PositiveIntegerField(_('4 star reviews'), default=0, editable=False)
+    rating_5_count = models.PositiveIntegerField(_('5 star reviews'), default=0, editable=False)
     created_at = models.DateTimeField(_('created at'), auto_now_add=True)
     updated_at = models.DateTimeField(_('updated at'), auto_now=True)
 
@@ -72,42 +83,103 @@ class Product(models.Model):
             models.Index(fields=['slug']),
             models.Index(fields=['category', 'is_available']),
             models.Index(fields=['name']),
+            # Keyset pagination orderings (see products.pagination)
+            models.Index(fields=['created_at', 'id']),
+            models.Index(fields=['price', 'id']),
+            models.Index(fields=['name', 'id']),
         ]
 
+    # Fields whose stored values are remembered so signal handlers can react to changes
+    TRACKED_FIELDS = ('category_id', 'price', 'is_available')
+
     def __str__(self):
         return self.name
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = {
+            name: value for name, value in zip(field_names, values) if name in cls.TRACKED_FIELDS
+        }
+        return instance
+
     def save(self, *args, **kwargs):
         if not self.slug:
             self.slug = slugify(self.name)
         super().save(*args, **kwargs)
+        # post_save handlers have seen the change; the saved values are now the baseline
+        self._loaded_values = {name: getattr(self, name) for name in self.TRACKED_FIELDS}
 
     def get_absolute_url(self):
         return reverse('products:product_detail', kwargs={'slug': self.slug})
 
     def get_primary_image(self):
-        """Get the primary product image."""
-        primary_image = self.images.filter(is_primary=True).first()
-        if primary_image:
-            return primary_image.image
-        return self.image
+        """
+        Get the primary product image.
+        Reuses images loaded with prefetch_related('images') and memoizes the
+        result, so templates can call this repeatedly without extra queries.
+        """
+        if not hasattr(self, '_primary_image'):
+            prefetched = getattr(self, '_prefetched_objects_cache', {}).get('images')
+            if prefetched is not None:
+                primary_image = next((image for image in prefetched if image.is_primary), None)
+            else:
+                primary_image = self.images.filter(is_primary=True).first()
+            self._primary_image = primary_image.image if primary_image else self.image
+        return self._primary_image
 
     def get_average_rating(self):
-        """Calculate average rating from reviews."""
-        reviews = self.reviews.all()
-        if reviews.exists():
-            return round(sum(review.rating for review in reviews) / reviews.count(), 1)
-        return 0
+        """Get the stored average rating (0 when there are no reviews)."""
+        return self.average_rating
 
     def get_review_count(self):
-        """Get total number of reviews."""
-        return self.reviews.count()
+        """Get the stored total number of reviews."""
+        return self.review_count
+
+    def get_rating_histogram(self):
+        """Get review counts per star rating as {1: n, ..., 5: n}."""
+        return {stars: getattr(self, f'rating_{stars}_count') for stars in range(1, 6)}
 
     def is_in_stock(self):
         """Check if product is in stock."""
         return self.is_available and self.stock_quantity > 0
 
 
+class PriceStatistics(models.Model):
+    """
+    Precomputed price range and histogram of available products.
+    One row per category plus one global row (scope 'all'), maintained by
+    products.price_stats.
+    """
+    GLOBAL_SCOPE = 'all'
+
+    scope = models.CharField(_('scope'), max_length=40, unique=True)
+    category = models.OneToOneField(
+        Category,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='price_statistics',
+        verbose_name=_('category')
+    )
+    product_count = models.PositiveIntegerField(_('product count'), default=0)
+    min_price = models.DecimalField(_('min price'), max_digits=10, decimal_places=2, null=True, blank=True)
+    max_price = models.DecimalField(_('max price'), max_digits=10, decimal_places=2, null=True, blank=True)
+    histogram = models.JSONField(_('histogram'), default=list, blank=True)
+    updated_at = models.DateTimeField(_('updated at'), auto_now=True)
+
+    class Meta:
+        verbose_name = _('price statistics')
+        verbose_name_plural = _('price statistics')
+
+    def __str__(self):
+        return f"Price statistics for {self.scope}"
+
+    @classmethod
+    def scope_for(cls, category_id=None):
+        return f'category:{category_id}' if category_id else cls.GLOBAL_SCOPE
+
+
 class ProductImage(models.Model):
     """
     Additional product images.
@@ -179,9 +251,86 @@ class Review(models.Model):
     def __str__(self):
         return f"Review by {self.user.email} for {self.product.name}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored values so rating aggregates can be adjusted on edit
+        instance._original_product_id = instance.__dict__.get('product_id')
+        instance._original_rating = instance.__dict__.get('rating')
+        return instance
+
+
+class ProductCoOccurrence(models.Model):
+    """
+    How often two products were added to the same cart.
+    Stored in both directions so one indexed scan gives a product's partners.
+    """
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        related_name='co_occurrences',
+        verbose_name=_('product')
+    )
+    related = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name=_('related product')
+    )
+    count = models.PositiveIntegerField(_('count'), default=0)
+
+    class Meta:
+        verbose_name = _('product co-occurrence')
+        verbose_name_plural = _('product co-occurrences')
+        unique_together = ['product', 'related']
+        indexes = [
+            models.Index(fields=['product', '-count']),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id} + {self.related_id} ({self.count})"
+
+
+class ProductRecommendation(models.Model):
+    """
+    Precomputed "frequently added together" product ids, best first.
+    """
+    product = models.OneToOneField(
+        Product,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='recommendation',
+        verbose_name=_('product')
+    )
+    related_ids = models.JSONField(_('related product ids'), default=list)
+    updated_at = models.DateTimeField(_('updated at'), auto_now=True)
 
+    class Meta:
+        verbose_name = _('product recommendation')
+        verbose_name_plural = _('product recommendations')
 
+    def __str__(self):
+        return f"Recommendations for product {self.product_id}"
 
 
+class RecommendationRun(models.Model):
+    """
+    One run of the co-occurrence job. last_cart_item_id is saved with each
+    merged batch and is where the next incremental run resumes; an
+    interrupted run's start_cart_item_id is carried over so the next run
+    refreshes the lists the interrupted one never got to.
+    """
+    start_cart_item_id = models.BigIntegerField(_('start cart item id'), default=0)
+    last_cart_item_id = models.BigIntegerField(_('last cart item id'), default=0)
+    cart_items_processed = models.PositiveIntegerField(_('cart items processed'), default=0)
+    products_refreshed = models.PositiveIntegerField(_('products refreshed'), default=0)
+    started_at = models.DateTimeField(_('started at'), auto_now_add=True)
+    finished_at = models.DateTimeField(_('finished at'), null=True, blank=True)
 
+    class Meta:
+        verbose_name = _('recommendation run')
+        verbose_name_plural = _('recommendation runs')
+        ordering = ['-started_at']
 
+    def __str__(self):
+        return f"Recommendation run {self.pk} (up to cart item {self.last_cart_item_id})"
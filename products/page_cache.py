@@ -0,0 +1,138 @@
+"""
+Full-page cache for anonymous catalog traffic.
+
+Pages are keyed on the view, its URL kwargs and the normalized catalog GET
+parameters, and tagged with the products and categories they show. Each tag
+has a version (see products.caching); a cached page records the versions it
+was rendered with and is served only while all of them are unchanged. Writes
+bump the tags they affect, so exactly the dependent pages are purged.
+
+Requests from logged-in users, guests with a cart or pending messages, and
+non-GET requests always bypass the cache. CSRF tokens are swapped for a
+placeholder when storing and re-issued per visitor when serving.
+"""
+import hashlib
+import re
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
+
+from cart.storage import get_guest_cart_storage
+
+from .caching import bump_cache_version, get_cache_versions
+
+PAGE_CACHE_PARAMS = ('search', 'category', 'country', 'min_price', 'max_price', 'in_stock', 'sort', 'page', 'cursor')
+
+# Tag carried by every cached page, for bulk maintenance operations
+ALL_PAGES_TAG = 'pages'
+# Tag carried by pages that aggregate over the whole catalog (product list, facets)
+PRODUCT_LIST_TAG = 'product-list'
+# Tag carried by every page rendering the category navigation (names and product counts)
+CATEGORY_NAV_TAG = 'category-nav'
+
+CSRF_PLACEHOLDER = '__PAGE_CACHE_CSRF_TOKEN__'
+CSRF_INPUT_RE = re.compile(r'name="csrfmiddlewaretoken" value="([^"]+)"')
+
+
+def product_tag(product_id):
+    return f'product:{product_id}'
+
+
+def category_tag(category_id):
+    return f'category:{category_id}'
+
+
+def _tag_version_name(tag):
+    return f'page-tag:{tag}'
+
+
+def purge_tags(*tags):
+    """Invalidate every cached page carrying any of the tags."""
+    for tag in set(tags):
+        bump_cache_version(_tag_version_name(tag))
+
+
+def purge_all_pages():
+    purge_tags(ALL_PAGES_TAG)
+
+
+def tag_page(request, *tags):
+    """Record tags for the page being rendered (no-op outside cached views)."""
+    page_tags = getattr(request, '_page_cache_tags', None)
+    if page_tags is not None:
+        page_tags.update(tag for tag in tags if tag)
+
+
+def page_cache_key(view_name, request, view_kwargs):
+    params = [
+        f'{name}={request.GET.get(name, "").strip()}'
+        for name in PAGE_CACHE_PARAMS
+        if request.GET.get(name, '').strip()
+    ]
+    kwargs = [f'{name}={value}' for name, value in sorted(view_kwargs.items())]
+    digest = hashlib.md5('&'.join(kwargs + params).encode()).hexdigest()
+    return f'makola:page:{view_name}:{digest}'
+
+
+def is_cacheable_request(request):
+    if request.method not in ('GET', 'HEAD'):
+        return False
+    if request.user.is_authenticated:
+        return False
+    if request.COOKIES.get('messages'):
+        return False
+    if request.session.get('_messages') or get_guest_cart_storage(request).load():
+        return False
+    return True
+
+
+def _serve(request, entry):
+    content = entry['content']
+    if CSRF_PLACEHOLDER in content:
+        content = content.replace(CSRF_PLACEHOLDER, get_token(request))
+    response = HttpResponse(content, content_type=entry['content_type'], status=entry['status'])
+    response['X-Page-Cache'] = 'hit'
+    return response
+
+
+def _store(key, request, response):
+    content = response.content.decode(response.charset)
+    match = CSRF_INPUT_RE.search(content)
+    if match:
+        content = content.replace(match.group(1), CSRF_PLACEHOLDER)
+
+    tags = request._page_cache_tags | {ALL_PAGES_TAG}
+    entry = {
+        'content': content,
+        'content_type': response['Content-Type'],
+        'status': response.status_code,
+        'tags': get_cache_versions([_tag_version_name(tag) for tag in tags]),
+    }
+    cache.set(key, entry, getattr(settings, 'PAGE_CACHE_TIMEOUT', 600))
+
+
+def cache_anonymous_page(view_name):
+    """Decorator caching a catalog view's rendered page for anonymous visitors."""
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if not getattr(settings, 'PAGE_CACHE_ENABLED', True) or not is_cacheable_request(request):
+                return view_func(request, *args, **kwargs)
+
+            key = page_cache_key(view_name, request, kwargs)
+            entry = cache.get(key)
+            if entry is not None:
+                current = get_cache_versions(list(entry['tags']))
+                if current == entry['tags']:
+                    return _serve(request, entry)
+
+            request._page_cache_tags = set()
+            response = view_func(request, *args, **kwargs)
+            if response.status_code == 200 and not response.streaming:
+                _store(key, request, response)
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,175 @@
+"""
+Pagination for catalog listings.
+
+Besides Django's offset Paginator, catalog pages support keyset (cursor)
+pagination: each page is fetched with a WHERE clause on the sort key plus an
+id tiebreak instead of OFFSET, so page N costs the same as page 1 and no
+COUNT(*) is needed. Cursors are signed, opaque tokens carried in the URL.
+"""
+from django.conf import settings
+from django.core import signing
+from django.core.paginator import Paginator
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+# Orderings per sort option; the trailing id makes every ordering total
+SORT_ORDERINGS = {
+    'newest': ('-created_at', '-id'),
+    'price_low': ('price', 'id'),
+    'price_high': ('-price', '-id'),
+    'name': ('name', 'id'),
+}
+
+CURSOR_SALT = 'products.pagination.cursor'
+
+
+class InvalidCursor(Exception):
+    """Raised when a cursor token is malformed, tampered with or for another sort."""
+
+
+def encode_cursor(sort_by, values, backwards=False):
+    """Encode sort key values into an opaque URL-safe token."""
+    payload = {'s': sort_by, 'v': [str(value) for value in values]}
+    if backwards:
+        payload['b'] = 1
+    return signing.dumps(payload, salt=CURSOR_SALT, compress=True)
+
+
+def decode_cursor(token, sort_by, model):
+    """Decode a cursor token into (typed key values, backwards)."""
+    try:
+        payload = signing.loads(token, salt=CURSOR_SALT)
+    except signing.BadSignature as e:
+        raise InvalidCursor('Bad cursor signature') from e
+    ordering = SORT_ORDERINGS[sort_by]
+    if payload.get('s') != sort_by or len(payload.get('v', [])) != len(ordering):
+        raise InvalidCursor('Cursor does not match the current sort')
+    try:
+        values = [
+            model._meta.get_field(field.lstrip('-')).to_python(value)
+            for field, value in zip(ordering, payload['v'])
+        ]
+    except Exception as e:
+        raise InvalidCursor('Bad cursor value') from e
+    return values, bool(payload.get('b'))
+
+
+def keyset_filter(ordering, values):
+    """
+    Build the Q object selecting rows strictly after values in ordering.
+    For (a, b) ascending this is a > x OR (a = x AND b > y).
+    """
+    condition = Q()
+    equal = Q()
+    for field, value in zip(ordering, values):
+        name = field.lstrip('-')
+        lookup = 'lt' if field.startswith('-') else 'gt'
+        condition |= equal & Q(**{f'{name}__{lookup}': value})
+        equal &= Q(**{name: value})
+    return condition
+
+
+def reverse_ordering(ordering):
+    return tuple(field[1:] if field.startswith('-') else f'-{field}' for field in ordering)
+
+
+class KeysetPage:
+    """A page of results from KeysetPaginator, iterable like a Django Page."""
+
+    is_keyset = True
+
+    def __init__(self, object_list, paginator, has_next, has_previous):
+        self.object_list = object_list
+        self.paginator = paginator
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+    def _cursor_for(self, obj, backwards):
+        values = [getattr(obj, field.lstrip('-')) for field in self.paginator.ordering]
+        return encode_cursor(self.paginator.sort_by, values, backwards=backwards)
+
+    @cached_property
+    def next_cursor(self):
+        if not self._has_next:
+            return None
+        return self._cursor_for(self.object_list[-1], backwards=False)
+
+    @cached_property
+    def previous_cursor(self):
+        if not self._has_previous:
+            return None
+        return self._cursor_for(self.object_list[0], backwards=True)
+
+
+class KeysetPaginator:
+    """
+    Cursor paginator for one of the SORT_ORDERINGS.
+    The total count is computed lazily, only if a template asks for it.
+    """
+
+    def __init__(self, queryset, per_page, sort_by):
+        self.sort_by = sort_by
+        self.ordering = SORT_ORDERINGS[sort_by]
+        self.queryset = queryset.order_by(*self.ordering)
+        self.per_page = per_page
+
+    @cached_property
+    def count(self):
+        return self.queryset.count()
+
+    def get_page(self, cursor=None):
+        """Return the page after (or before) cursor; bad cursors restart at page one."""
+        values, backwards = None, False
+        if cursor:
+            try:
+                values, backwards = decode_cursor(cursor, self.sort_by, self.queryset.model)
+            except InvalidCursor:
+                values = None
+
+        if values is None:
+            rows = list(self.queryset[:self.per_page + 1])
+            return KeysetPage(rows[:self.per_page], self, len(rows) > self.per_page, False)
+
+        if backwards:
+            ordering = reverse_ordering(self.ordering)
+            queryset = self.queryset.filter(keyset_filter(ordering, values)).order_by(*ordering)
+            rows = list(queryset[:self.per_page + 1])
+            has_previous = len(rows) > self.per_page
+            rows = rows[:self.per_page][::-1]
+            return KeysetPage(rows, self, True, has_previous)
+
+        queryset = self.queryset.filter(keyset_filter(self.ordering, values))
+        rows = list(queryset[:self.per_page + 1])
+        return KeysetPage(rows[:self.per_page], self, len(rows) > self.per_page, True)
+
+
+def paginate_catalog(request, queryset, sort_by, per_page=12):
+    """
+    Paginate a catalog listing.
+    Keyset pagination is used when CATALOG_PAGINATION is 'cursor' or the
+    request carries a cursor, for every sort with a keyset ordering; other
+    requests use Django's offset Paginator.
+    """
+    use_cursor = getattr(settings, 'CATALOG_PAGINATION', 'offset') == 'cursor' or 'cursor' in request.GET
+    if use_cursor and sort_by in SORT_ORDERINGS:
+        return KeysetPaginator(queryset, per_page, sort_by).get_page(request.GET.get('cursor'))
+    paginator = Paginator(queryset, per_page)
+    return paginator.get_page(request.GET.get('page'))
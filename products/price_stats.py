@@ -0,0 +1,147 @@
+"""
+Precomputed price statistics for the price filter.
+
+PriceStatistics rows hold the product count, min/max price and a fixed-bucket
+histogram (the facet price buckets) of available products, globally and per
+category. Product save/delete signals adjust them incrementally: counts and
+buckets move by one, and min/max are only recomputed for a scope when the
+removed price was at its boundary. `rebuild_price_statistics` recomputes
+everything with two grouped queries.
+"""
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, Max, Min, Q
+
+from .facets import get_price_buckets
+from .models import Category, PriceStatistics, Product
+
+
+def _bucket_index(price, buckets):
+    for index, (low, high) in enumerate(buckets):
+        if price >= low and (high is None or price < high):
+            return index
+    return None
+
+
+def _aggregates(buckets):
+    aggregates = {
+        'product_count': Count('id'),
+        'min_price': Min('price'),
+        'max_price': Max('price'),
+    }
+    for index, (low, high) in enumerate(buckets):
+        condition = Q(price__gte=low)
+        if high is not None:
+            condition &= Q(price__lt=high)
+        aggregates[f'bucket_{index}'] = Count('id', filter=condition)
+    return aggregates
+
+
+def _to_fields(row, buckets):
+    return {
+        'product_count': row['product_count'] or 0,
+        'min_price': row['min_price'],
+        'max_price': row['max_price'],
+        'histogram': [row[f'bucket_{index}'] or 0 for index in range(len(buckets))],
+    }
+
+
+def refresh_price_statistics(category_id=None):
+    """Recompute one scope (a category, or the whole catalog) with one aggregate query."""
+    buckets = get_price_buckets()
+    products = Product.objects.filter(is_available=True)
+    if category_id:
+        products = products.filter(category_id=category_id)
+    fields = _to_fields(products.aggregate(**_aggregates(buckets)), buckets)
+    stats, created = PriceStatistics.objects.update_or_create(
+        scope=PriceStatistics.scope_for(category_id),
+        defaults={'category_id': category_id, **fields},
+    )
+    return stats
+
+
+def rebuild_price_statistics():
+    """Recompute every scope: one grouped query per category plus one global query."""
+    buckets = get_price_buckets()
+    aggregates = _aggregates(buckets)
+    available = Product.objects.filter(is_available=True)
+
+    rows = available.filter(category__isnull=False).order_by().values('category_id').annotate(**aggregates)
+    per_category = {row['category_id']: _to_fields(row, buckets) for row in rows}
+    empty = _to_fields({'product_count': 0, 'min_price': None, 'max_price': None,
+                        **{f'bucket_{index}': 0 for index in range(len(buckets))}}, buckets)
+
+    stats = [PriceStatistics(
+        scope=PriceStatistics.GLOBAL_SCOPE,
+        **_to_fields(available.aggregate(**aggregates), buckets),
+    )]
+    for category_id in Category.objects.values_list('id', flat=True):
+        stats.append(PriceStatistics(
+            scope=PriceStatistics.scope_for(category_id),
+            category_id=category_id,
+            **per_category.get(category_id, empty),
+        ))
+
+    with transaction.atomic():
+        PriceStatistics.objects.all().delete()
+        PriceStatistics.objects.bulk_create(stats, batch_size=500)
+    return len(stats)
+
+
+def get_price_statistics(category_id=None):
+    """Return the statistics row for a scope, building it on first use."""
+    stats = PriceStatistics.objects.filter(scope=PriceStatistics.scope_for(category_id)).first()
+    if stats is None or len(stats.histogram) != len(get_price_buckets()):
+        stats = refresh_price_statistics(category_id)
+    return stats
+
+
+def _adjust_scope(category_id, removed=None, added=None):
+    buckets = get_price_buckets()
+    with transaction.atomic():
+        stats = PriceStatistics.objects.select_for_update().filter(
+            scope=PriceStatistics.scope_for(category_id)
+        ).first()
+        at_boundary = removed is not None and stats is not None and removed in (stats.min_price, stats.max_price)
+        if stats is None or len(stats.histogram) != len(buckets) or at_boundary:
+            refresh_price_statistics(category_id)
+            return
+
+        histogram = list(stats.histogram)
+        if removed is not None:
+            stats.product_count -= 1
+            index = _bucket_index(removed, buckets)
+            if index is not None:
+                histogram[index] -= 1
+        if added is not None:
+            stats.product_count += 1
+            index = _bucket_index(added, buckets)
+            if index is not None:
+                histogram[index] += 1
+            stats.min_price = added if stats.min_price is None else min(stats.min_price, added)
+            stats.max_price = added if stats.max_price is None else max(stats.max_price, added)
+        stats.histogram = histogram
+        stats.save()
+
+
+def apply_price_change(old=None, new=None):
+    """
+    Move one product between price statistics.
+    old and new are (category_id, price) pairs for the product's previous and
+    current state, or None when it was/is not an available product.
+    """
+    old = (old[0], Decimal(str(old[1]))) if old else None
+    new = (new[0], Decimal(str(new[1]))) if new else None
+    if old == new:
+        return
+
+    _adjust_scope(None, removed=old and old[1], added=new and new[1])
+    if old and new and old[0] == new[0]:
+        if old[0]:
+            _adjust_scope(old[0], removed=old[1], added=new[1])
+        return
+    if old and old[0]:
+        _adjust_scope(old[0], removed=old[1])
+    if new and new[0]:
+        _adjust_scope(new[0], added=new[1])
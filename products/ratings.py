@@ -0,0 +1,118 @@
+"""
+Denormalized rating aggregates for products.
+
+Product rows carry rating_sum, review_count, average_rating and a 1-5 star
+histogram so catalog pages can show ratings without touching the reviews
+table. The counters are adjusted with F() expressions whenever a review is
+created, edited or deleted, and can be rebuilt with `sync_product_ratings`.
+"""
+from django.db import transaction
+from django.db.models import Case, Count, F, FloatField, Q, Sum, Value, When
+from django.db.models.functions import Cast, Round
+
+from .models import Product, Review
+
+RATING_VALUES = range(1, 6)
+
+
+def _histogram_field(rating):
+    return f'rating_{rating}_count'
+
+
+def average_rating_expression():
+    """SQL expression computing the average from the stored counters."""
+    return Case(
+        When(review_count__gt=0, then=Round(
+            Cast('rating_sum', FloatField()) / F('review_count'), 1
+        )),
+        default=Value(0.0),
+        output_field=FloatField(),
+    )
+
+
+def apply_rating_change(product_id, old_rating=None, new_rating=None):
+    """
+    Atomically move one review's contribution on a product.
+
+    Pass only new_rating for a created review, only old_rating for a deleted
+    one, and both for an edit.
+    """
+    if old_rating == new_rating:
+        return
+
+    updates = {}
+    sum_delta = (new_rating or 0) - (old_rating or 0)
+    count_delta = (new_rating is not None) - (old_rating is not None)
+    if sum_delta:
+        updates['rating_sum'] = F('rating_sum') + sum_delta
+    if count_delta:
+        updates['review_count'] = F('review_count') + count_delta
+    if old_rating is not None:
+        field = _histogram_field(old_rating)
+        updates[field] = F(field) - 1
+    if new_rating is not None:
+        field = _histogram_field(new_rating)
+        updates[field] = F(field) + 1
+
+    with transaction.atomic():
+        products = Product.objects.filter(pk=product_id)
+        products.update(**updates)
+        products.update(average_rating=average_rating_expression())
+
+
+def compute_rating_aggregates(product_ids=None):
+    """
+    Compute rating aggregates from the reviews table in one grouped query.
+
+    Returns {product_id: {field: value}} for products that have reviews.
+    """
+    reviews = Review.objects.all()
+    if product_ids is not None:
+        reviews = reviews.filter(product_id__in=product_ids)
+
+    histogram = {
+        _histogram_field(rating): Count('id', filter=Q(rating=rating))
+        for rating in RATING_VALUES
+    }
+    rows = reviews.order_by().values('product_id').annotate(
+        rating_sum=Sum('rating'),
+        review_count=Count('id'),
+        **histogram,
+    )
+
+    aggregates = {}
+    for row in rows:
+        product_id = row.pop('product_id')
+        row['average_rating'] = round(row['rating_sum'] / row['review_count'], 1)
+        aggregates[product_id] = row
+    return aggregates
+
+
+EMPTY_AGGREGATES = {
+    'rating_sum': 0,
+    'review_count': 0,
+    'average_rating': 0,
+    **{_histogram_field(rating): 0 for rating in RATING_VALUES},
+}
+AGGREGATE_FIELDS = list(EMPTY_AGGREGATES)
+
+
+def reconcile_ratings(batch_size=500, dry_run=False):
+    """
+    Compare stored aggregates against the reviews table and fix drift.
+
+    Returns the number of products whose stored aggregates were wrong.
+    """
+    aggregates = compute_rating_aggregates()
+    stale = []
+    products = Product.objects.only('id', *AGGREGATE_FIELDS).order_by('pk')
+    for product in products.iterator(chunk_size=batch_size):
+        expected = aggregates.get(product.pk, EMPTY_AGGREGATES)
+        if any(getattr(product, field) != value for field, value in expected.items()):
+            for field, value in expected.items():
+                setattr(product, field, value)
+            stale.append(product)
+
+    if not dry_run and stale:
+        Product.objects.bulk_update(stale, AGGREGATE_FIELDS, batch_size=batch_size)
+    return len(stale)
@@ -0,0 +1,168 @@
+"""
+"Frequently added together" recommendations built from cart history.
+
+The job walks cart.CartItem rows past the last run's watermark and pairs each
+new item with the items already in the same cart, adding to the pair counts
+in ProductCoOccurrence. Only products whose counts changed get their top-N
+list in ProductRecommendation recomputed, so each run costs what was added
+since the previous one rather than the whole cart history.
+
+The run's watermark is saved in the same transaction as each merged batch,
+so an interrupted run never has its batches counted twice; the next run
+picks up after the last merged batch and also refreshes the lists of every
+product on either side of a pair the interrupted run may have merged.
+"""
+from collections import Counter, defaultdict
+
+from django.apps import apps
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Product, ProductCoOccurrence, ProductRecommendation, RecommendationRun
+from .page_cache import product_tag, purge_tags
+
+DEFAULT_TOP_N = 8
+
+
+def _count_pairs(batch):
+    """Pair counts for a batch of (id, cart_id, product_id) cart items."""
+    CartItem = apps.get_model('cart', 'CartItem')
+    max_id = batch[-1][0]
+    cart_contents = defaultdict(list)
+    rows = CartItem.objects.filter(
+        cart_id__in={cart_id for _, cart_id, _ in batch}, id__lte=max_id
+    ).values_list('id', 'cart_id', 'product_id')
+    for item_id, cart_id, product_id in rows:
+        cart_contents[cart_id].append((item_id, product_id))
+
+    counts = Counter()
+    for item_id, cart_id, product_id in batch:
+        # Pair only with earlier items so every pair is counted once
+        for other_id, other_product_id in cart_contents[cart_id]:
+            if other_id < item_id and other_product_id != product_id:
+                counts[(product_id, other_product_id)] += 1
+                counts[(other_product_id, product_id)] += 1
+    return counts
+
+
+def _merge_counts(counts):
+    existing = {
+        (row.product_id, row.related_id): row
+        for row in ProductCoOccurrence.objects.filter(
+            product_id__in={product_id for product_id, _ in counts},
+            related_id__in={related_id for _, related_id in counts},
+        )
+    }
+    to_update, to_create = [], []
+    for (product_id, related_id), count in counts.items():
+        row = existing.get((product_id, related_id))
+        if row is None:
+            to_create.append(ProductCoOccurrence(product_id=product_id, related_id=related_id, count=count))
+        else:
+            row.count += count
+            to_update.append(row)
+    ProductCoOccurrence.objects.bulk_update(to_update, ['count'], batch_size=500)
+    ProductCoOccurrence.objects.bulk_create(to_create, batch_size=500)
+
+
+def refresh_recommendations(product_ids, top_n=DEFAULT_TOP_N, chunk_size=500):
+    """Rewrite the top-N related ids for the given products from the pair counts."""
+    product_ids = sorted(product_ids)
+    for start in range(0, len(product_ids), chunk_size):
+        chunk = product_ids[start:start + chunk_size]
+        related = defaultdict(list)
+        rows = ProductCoOccurrence.objects.filter(product_id__in=chunk).order_by(
+            'product_id', '-count', 'related_id'
+        ).values_list('product_id', 'related_id')
+        for product_id, related_id in rows:
+            if len(related[product_id]) < top_n:
+                related[product_id].append(related_id)
+
+        ProductRecommendation.objects.bulk_create(
+            [ProductRecommendation(product_id=product_id, related_ids=related[product_id]) for product_id in chunk],
+            update_conflicts=True,
+            unique_fields=['product'],
+            update_fields=['related_ids', 'updated_at'],
+        )
+    return len(product_ids)
+
+
+def compute_recommendations(batch_size=1000, top_n=DEFAULT_TOP_N, full=False):
+    """
+    Fold cart items added since the last run into the pair counts and refresh
+    the affected recommendation lists. With full=True, start over from the
+    first cart item.
+    """
+    CartItem = apps.get_model('cart', 'CartItem')
+    touched = set()
+    if full:
+        with transaction.atomic():
+            ProductCoOccurrence.objects.all().delete()
+            ProductRecommendation.objects.all().delete()
+        start_id = last_id = 0
+    else:
+        previous = RecommendationRun.objects.order_by('-id').first()
+        start_id = last_id = previous.last_cart_item_id if previous else 0
+        if previous and previous.finished_at is None:
+            # Interrupted: its merged batches are kept, but their lists were never refreshed
+            start_id = previous.start_cart_item_id
+            merged = CartItem.objects.filter(id__gt=start_id, id__lte=last_id).order_by().values('product_id')
+            touched.update(merged.values_list('product_id', flat=True).distinct())
+            # Their partners too, taken from the pair counts because the partner
+            # cart items may have been deleted since
+            touched.update(
+                ProductCoOccurrence.objects.filter(product_id__in=merged).order_by().values_list(
+                    'related_id', flat=True
+                ).distinct()
+            )
+
+    run = RecommendationRun.objects.create(start_cart_item_id=start_id, last_cart_item_id=last_id)
+    while True:
+        batch = list(
+            CartItem.objects.filter(id__gt=last_id).order_by('id').values_list('id', 'cart_id', 'product_id')[:batch_size]
+        )
+        if not batch:
+            break
+        counts = _count_pairs(batch)
+        last_id = batch[-1][0]
+        run.cart_items_processed += len(batch)
+        with transaction.atomic():
+            _merge_counts(counts)
+            RecommendationRun.objects.filter(pk=run.pk).update(
+                last_cart_item_id=last_id, cart_items_processed=run.cart_items_processed
+            )
+        touched.update(product_id for product_id, _ in counts)
+
+    run.products_refreshed = refresh_recommendations(touched, top_n=top_n)
+    if touched:
+        # Cached detail pages embed the old recommendations
+        purge_tags(*(product_tag(product_id) for product_id in touched))
+    run.last_cart_item_id = last_id
+    run.finished_at = timezone.now()
+    run.save()
+    return run
+
+
+def get_related_products(product, limit=4):
+    """
+    Recommended products for a detail page, topped up with the newest
+    available products from the same category.
+    """
+    related_ids = ProductRecommendation.objects.filter(product_id=product.id).values_list(
+        'related_ids', flat=True
+    ).first() or []
+
+    related = []
+    if related_ids:
+        found = Product.objects.filter(is_available=True).prefetch_related('images').in_bulk(related_ids)
+        related = [found[product_id] for product_id in related_ids if product_id in found][:limit]
+
+    if len(related) < limit and product.category_id:
+        fallback = Product.objects.filter(
+            category_id=product.category_id,
+            is_available=True
+        ).exclude(
+            id__in=[product.id, *(item.id for item in related)]
+        ).order_by('-created_at', '-id').prefetch_related('images')[:limit - len(related)]
+        related.extend(fallback)
+    return related
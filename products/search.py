@@ -0,0 +1,279 @@
+"""
+Full-text product search.
+
+All search goes through one backend API chosen by the PRODUCT_SEARCH_BACKEND
+setting (a dotted path), or automatically from the database vendor:
+
+- SQLiteFTS5SearchBackend: an FTS5 virtual table ranked with bm25(), for
+  local and development databases.
+- PostgresSearchBackend: a tsvector side table with a GIN index ranked with
+  ts_rank(), for production.
+- SimpleSearchBackend: the old icontains filter, used when neither index is
+  available.
+
+The index is kept in sync by Product save/delete signals and can be rebuilt
+with the `rebuild_search_index` command. Ranked lookups run inside the
+already-filtered queryset and return at most PRODUCT_SEARCH_MAX_RESULTS ids,
+so result size is bounded no matter how large the catalog grows while
+filters never see a truncated result. Facet counts use match_products(),
+which filters by the index without ranking or a cap.
+"""
+import logging
+import re
+
+from django.conf import settings
+from django.db import DatabaseError, connection
+from django.db.models import Case, IntegerField, Q, Value, When
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+SEARCH_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def tokenize(query):
+    """Split a user query into plain word tokens (no search operators)."""
+    return SEARCH_TOKEN_RE.findall(query.lower())[:10]
+
+
+def rank_queryset(queryset, ranked_ids):
+    """Restrict a queryset to ranked ids and order it by rank."""
+    if not ranked_ids:
+        return queryset.none()
+    rank = Case(
+        *[When(pk=pk, then=Value(position)) for position, pk in enumerate(ranked_ids)],
+        output_field=IntegerField(),
+    )
+    return queryset.filter(pk__in=ranked_ids).annotate(search_rank=rank).order_by('search_rank')
+
+
+def pk_subquery(queryset):
+    """SQL and params selecting the primary keys of a queryset, for IN (...) clauses."""
+    return queryset.order_by().values('pk').query.sql_with_params()
+
+
+class BaseSearchBackend:
+    """Interface shared by all product search backends."""
+
+    def __init__(self):
+        self.max_results = getattr(settings, 'PRODUCT_SEARCH_MAX_RESULTS', 500)
+
+    def is_available(self):
+        """Whether the backend's index exists on the current database."""
+        return True
+
+    def search(self, queryset, query):
+        """Filter a Product queryset to matches of query, ordered by relevance."""
+        tokens = tokenize(query)
+        if not tokens:
+            return queryset.none()
+        return rank_queryset(queryset, self.search_ids(tokens, queryset))
+
+    def match(self, queryset, query):
+        """Filter a Product queryset to all matches of query, unranked and uncapped."""
+        tokens = tokenize(query)
+        if not tokens:
+            return queryset.none()
+        sql, params = self.match_sql(tokens)
+        return queryset.filter(pk__in=RawSQL(sql, params))
+
+    def search_ids(self, tokens, queryset):
+        """Return up to max_results ids of matching products in queryset, best match first."""
+        raise NotImplementedError
+
+    def match_sql(self, tokens):
+        """SQL and params selecting the ids of all products matching tokens."""
+        raise NotImplementedError
+
+    def index_products(self, product_ids):
+        """Add or refresh index entries for the given products."""
+
+    def remove_products(self, product_ids):
+        """Drop index entries for the given products."""
+
+    def rebuild(self):
+        """Rebuild the whole index and return the number of indexed products."""
+        return 0
+
+
+class SimpleSearchBackend(BaseSearchBackend):
+    """Unindexed substring search (no ranking)."""
+
+    def search(self, queryset, query):
+        query = query.strip()
+        if not query:
+            return queryset.none()
+        return queryset.filter(
+            Q(name__icontains=query) |
+            Q(description__icontains=query) |
+            Q(country_of_origin__icontains=query)
+        )
+
+    match = search
+
+
+class SQLiteFTS5SearchBackend(BaseSearchBackend):
+    """SQLite FTS5 index; bm25 weights name matches above origin and description."""
+
+    table = 'products_product_fts'
+    batch_size = 500
+
+    def is_available(self):
+        return connection.vendor == 'sqlite' and self.table in connection.introspection.table_names()
+
+    def _match_expression(self, tokens):
+        return ' '.join(f'"{token}"*' for token in tokens)
+
+    def search_ids(self, tokens, queryset):
+        within, within_params = pk_subquery(queryset)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT rowid FROM {self.table} WHERE {self.table} MATCH %s AND rowid IN ({within}) '
+                f'ORDER BY bm25({self.table}, 10.0, 1.0, 3.0) LIMIT %s',
+                [self._match_expression(tokens), *within_params, self.max_results],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+    def match_sql(self, tokens):
+        return f'SELECT rowid FROM {self.table} WHERE {self.table} MATCH %s', [self._match_expression(tokens)]
+
+    def _batches(self, product_ids):
+        product_ids = list(product_ids)
+        for start in range(0, len(product_ids), self.batch_size):
+            batch = product_ids[start:start + self.batch_size]
+            yield batch, ', '.join(['%s'] * len(batch))
+
+    def index_products(self, product_ids):
+        with connection.cursor() as cursor:
+            for batch, placeholders in self._batches(product_ids):
+                cursor.execute(f'DELETE FROM {self.table} WHERE rowid IN ({placeholders})', batch)
+                cursor.execute(
+                    f'INSERT INTO {self.table} (rowid, name, description, country_of_origin) '
+                    f'SELECT id, name, description, country_of_origin FROM products_product '
+                    f'WHERE id IN ({placeholders})',
+                    batch,
+                )
+
+    def remove_products(self, product_ids):
+        with connection.cursor() as cursor:
+            for batch, placeholders in self._batches(product_ids):
+                cursor.execute(f'DELETE FROM {self.table} WHERE rowid IN ({placeholders})', batch)
+
+    def rebuild(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table}')
+            cursor.execute(
+                f'INSERT INTO {self.table} (rowid, name, description, country_of_origin) '
+                f'SELECT id, name, description, country_of_origin FROM products_product'
+            )
+            cursor.execute(f"INSERT INTO {self.table} ({self.table}) VALUES ('optimize')")
+            cursor.execute(f'SELECT COUNT(*) FROM {self.table}')
+            return cursor.fetchone()[0]
+
+
+class PostgresSearchBackend(BaseSearchBackend):
+    """PostgreSQL tsvector side table with a GIN index, ranked by ts_rank."""
+
+    table = 'products_product_search'
+    config = 'english'
+
+    def __init__(self):
+        super().__init__()
+        self.config = getattr(settings, 'PRODUCT_SEARCH_CONFIG', self.config)
+
+    def document_sql(self):
+        return (
+            f"setweight(to_tsvector('{self.config}', coalesce(name, '')), 'A') || "
+            f"setweight(to_tsvector('{self.config}', coalesce(country_of_origin, '')), 'B') || "
+            f"setweight(to_tsvector('{self.config}', coalesce(description, '')), 'C')"
+        )
+
+    def is_available(self):
+        return connection.vendor == 'postgresql' and self.table in connection.introspection.table_names()
+
+    def _tsquery(self, tokens):
+        return ' & '.join(f'{token}:*' for token in tokens)
+
+    def search_ids(self, tokens, queryset):
+        within, within_params = pk_subquery(queryset)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT product_id FROM {self.table}, to_tsquery('{self.config}', %s) query "
+                f"WHERE document @@ query AND product_id IN ({within}) "
+                f"ORDER BY ts_rank(document, query) DESC, product_id LIMIT %s",
+                [self._tsquery(tokens), *within_params, self.max_results],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+    def match_sql(self, tokens):
+        return (
+            f"SELECT product_id FROM {self.table} WHERE document @@ to_tsquery('{self.config}', %s)",
+            [self._tsquery(tokens)],
+        )
+
+    def index_products(self, product_ids):
+        product_ids = list(product_ids)
+        if not product_ids:
+            return
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {self.table} (product_id, document) '
+                f'SELECT id, {self.document_sql()} FROM products_product WHERE id = ANY(%s) '
+                f'ON CONFLICT (product_id) DO UPDATE SET document = EXCLUDED.document',
+                [product_ids],
+            )
+
+    def remove_products(self, product_ids):
+        product_ids = list(product_ids)
+        if not product_ids:
+            return
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table} WHERE product_id = ANY(%s)', [product_ids])
+
+    def rebuild(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'TRUNCATE {self.table}')
+            cursor.execute(
+                f'INSERT INTO {self.table} (product_id, document) '
+                f'SELECT id, {self.document_sql()} FROM products_product'
+            )
+            return cursor.rowcount
+
+
+VENDOR_BACKENDS = {
+    'sqlite': SQLiteFTS5SearchBackend,
+    'postgresql': PostgresSearchBackend,
+}
+
+_backend = None
+
+
+def get_search_backend():
+    """Return the configured search backend, falling back to SimpleSearchBackend."""
+    global _backend
+    if _backend is None:
+        backend_path = getattr(settings, 'PRODUCT_SEARCH_BACKEND', '')
+        if backend_path:
+            backend = import_string(backend_path)()
+        else:
+            backend_class = VENDOR_BACKENDS.get(connection.vendor, SimpleSearchBackend)
+            backend = backend_class()
+            try:
+                if not backend.is_available():
+                    logger.warning(f'{backend_class.__name__} index not found; using unranked search')
+                    backend = SimpleSearchBackend()
+            except DatabaseError:
+                backend = SimpleSearchBackend()
+        _backend = backend
+    return _backend
+
+
+def search_products(queryset, query):
+    """Filter and rank a Product queryset for a free-text query."""
+    return get_search_backend().search(queryset, query)
+
+
+def match_products(queryset, query):
+    """Filter a Product queryset to every match of a free-text query, without ranking."""
+    return get_search_backend().match(queryset, query)
@@ -0,0 +1,155 @@
+"""
+Signal handlers for products app.
+"""
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .caching import CATALOG, bump_cache_version
+from .models import Category, Product, ProductImage, Review
+from .page_cache import CATEGORY_NAV_TAG, PRODUCT_LIST_TAG, category_tag, product_tag, purge_all_pages, purge_tags
+from .price_stats import apply_price_change, rebuild_price_statistics, refresh_price_statistics
+from .ratings import apply_rating_change
+from .search import get_search_backend
+
+
+def catalog_bulk_changed(prices=True):
+    """
+    Apply the catalog-wide effects of the signals below after bulk writes that
+    bypass them (queryset.update(), bulk_create()): rebuild price statistics
+    (unless prices=False), and invalidate catalog caches and cached pages.
+    Call once, after the whole bulk operation.
+    """
+    if prices:
+        rebuild_price_statistics()
+    bump_cache_version(CATALOG)
+    purge_all_pages()
+
+
+@receiver(post_save, sender=Review)
+def update_ratings_on_review_save(sender, instance, created, raw=False, **kwargs):
+    """Keep product rating aggregates in step with created or edited reviews."""
+    if raw:
+        return
+    old_product_id = getattr(instance, '_original_product_id', None)
+    old_rating = getattr(instance, '_original_rating', None)
+
+    if created or old_product_id is None:
+        apply_rating_change(instance.product_id, new_rating=instance.rating)
+    elif old_product_id != instance.product_id:
+        apply_rating_change(old_product_id, old_rating=old_rating)
+        apply_rating_change(instance.product_id, new_rating=instance.rating)
+    else:
+        apply_rating_change(instance.product_id, old_rating=old_rating, new_rating=instance.rating)
+
+    instance._original_product_id = instance.product_id
+    instance._original_rating = instance.rating
+
+
+@receiver(post_delete, sender=Review)
+def update_ratings_on_review_delete(sender, instance, **kwargs):
+    """Remove a deleted review's contribution from its product."""
+    old_rating = getattr(instance, '_original_rating', None) or instance.rating
+    product_id = getattr(instance, '_original_product_id', None) or instance.product_id
+    apply_rating_change(product_id, old_rating=old_rating)
+
+
+@receiver(post_save, sender=Product)
+def update_search_index_on_product_save(sender, instance, raw=False, **kwargs):
+    """Refresh the product's full-text search entry."""
+    if not raw:
+        get_search_backend().index_products([instance.pk])
+
+
+@receiver(post_delete, sender=Product)
+def update_search_index_on_product_delete(sender, instance, **kwargs):
+    """Drop the deleted product from the full-text search index."""
+    get_search_backend().remove_products([instance.pk])
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def bump_catalog_version(sender, raw=False, **kwargs):
+    """Invalidate cached catalog aggregates (category counts) on any catalog write."""
+    if not raw:
+        bump_cache_version(CATALOG)
+
+
+def _price_state(values):
+    """(category_id, price) for an available product, else None."""
+    if not values['is_available']:
+        return None
+    return values['category_id'], values['price']
+
+
+@receiver(post_save, sender=Product)
+def update_price_statistics_on_product_save(sender, instance, created, raw=False, **kwargs):
+    """Adjust price statistics when a product's price, category or availability changes."""
+    if raw:
+        return
+    current = {name: getattr(instance, name) for name in Product.TRACKED_FIELDS}
+    loaded = getattr(instance, '_loaded_values', None)
+    if created:
+        apply_price_change(None, _price_state(current))
+    elif loaded is None or len(loaded) < len(Product.TRACKED_FIELDS):
+        # Previous state unknown (instance not loaded from the database)
+        refresh_price_statistics()
+        if instance.category_id:
+            refresh_price_statistics(instance.category_id)
+    else:
+        apply_price_change(_price_state(loaded), _price_state(current))
+
+
+@receiver(post_delete, sender=Product)
+def update_price_statistics_on_product_delete(sender, instance, **kwargs):
+    """Remove a deleted product from price statistics."""
+    values = getattr(instance, '_loaded_values', None)
+    if values is None or len(values) < len(Product.TRACKED_FIELDS):
+        values = {name: getattr(instance, name) for name in Product.TRACKED_FIELDS}
+    apply_price_change(_price_state(values), None)
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def purge_product_pages(sender, instance, signal, created=False, raw=False, **kwargs):
+    """
+    Purge cached pages showing the product, its old and new category, and
+    listings; and every page's category nav when its product counts change.
+    """
+    if raw:
+        return
+    loaded = getattr(instance, '_loaded_values', None) or {}
+    tags = [
+        product_tag(instance.pk),
+        category_tag(instance.category_id),
+        category_tag(loaded.get('category_id', instance.category_id)),
+        PRODUCT_LIST_TAG,
+    ]
+    counts_changed = (
+        created
+        or signal is post_delete
+        or len(loaded) < len(Product.TRACKED_FIELDS)
+        or (loaded['category_id'], loaded['is_available']) != (instance.category_id, instance.is_available)
+    )
+    if counts_changed:
+        tags.append(CATEGORY_NAV_TAG)
+    purge_tags(*tags)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def purge_category_pages(sender, instance, raw=False, **kwargs):
+    """Purge the category's pages and every page rendering the category nav."""
+    if not raw:
+        purge_tags(category_tag(instance.pk), PRODUCT_LIST_TAG, CATEGORY_NAV_TAG)
+
+
+@receiver(post_save, sender=ProductImage)
+@receiver(post_delete, sender=ProductImage)
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def purge_pages_for_product_content(sender, instance, raw=False, **kwargs):
+    """Images and reviews only affect pages that show their product."""
+    if not raw:
+        purge_tags(product_tag(instance.product_id))
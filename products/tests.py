@@ -0,0 +1,410 @@
+"""
+Tests for products app.
+"""
+from decimal import Decimal
+from io import StringIO
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from cart.models import Cart, CartItem
+
+from .catalog_import import import_catalog, read_catalog_file
+from .facets import get_catalog_facets
+from .filters import apply_catalog_filters, normalize_catalog_filters
+from .models import Category, Product, ProductImage, ProductRecommendation, Review
+from .page_cache import CATEGORY_NAV_TAG, purge_tags
+from .recommendations import compute_recommendations
+from .search import get_search_backend
+
+User = get_user_model()
+
+
+class PrimaryImageQueryCountTests(TestCase):
+    """Catalog grids must resolve primary images without per-product queries."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(name='Grains & Flour')
+        for index in range(12):
+            product = Product.objects.create(
+                name=f'Product {index}',
+                category=cls.category,
+                description='Test product',
+                price=index + 1,
+                stock_quantity=10,
+            )
+            ProductImage.objects.create(product=product, image=f'products/{index}-a.jpg')
+            if index % 2:
+                ProductImage.objects.create(
+                    product=product, image=f'products/{index}-b.jpg', is_primary=True
+                )
+
+    def test_prefetched_grid_needs_no_queries_per_product(self):
+        products = list(
+            Product.objects.filter(is_available=True)
+            .select_related('category')
+            .prefetch_related('images')
+        )
+        with self.assertNumQueries(0):
+            for product in products:
+                # Templates call it once for the check and once for the URL
+                if product.get_primary_image():
+                    product.get_primary_image().name
+
+    def test_prefetched_result_matches_primary_image(self):
+        products = Product.objects.prefetch_related('images')
+        for product in products:
+            index = product.name.split()[-1]
+            expected = f'products/{index}-b.jpg' if int(index) % 2 else ''
+            self.assertEqual(product.get_primary_image().name or '', expected)
+
+    def test_without_prefetch_queries_once_per_product(self):
+        product = Product.objects.get(name='Product 1')
+        with self.assertNumQueries(1):
+            product.get_primary_image()
+            product.get_primary_image()
+
+
+class ProductRatingAggregateTests(TestCase):
+    """Review writes keep the denormalized rating aggregates on Product in step."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.product = Product.objects.create(name='Egusi Seeds', description='Test product', price=5)
+        cls.users = [
+            User.objects.create_user(username=f'reviewer{index}', email=f'reviewer{index}@example.com')
+            for index in range(3)
+        ]
+
+    def assertAggregates(self, review_count, average_rating, **histogram):
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.review_count, review_count)
+        self.assertEqual(self.product.average_rating, average_rating)
+        for rating in range(1, 6):
+            self.assertEqual(getattr(self.product, f'rating_{rating}_count'), histogram.get(f'stars_{rating}', 0))
+
+    def test_create_edit_and_delete_review(self):
+        Review.objects.create(product=self.product, user=self.users[0], rating=5, comment='Great')
+        review = Review.objects.create(product=self.product, user=self.users[1], rating=2, comment='Meh')
+        self.assertAggregates(2, 3.5, stars_5=1, stars_2=1)
+
+        # Edit a review loaded from the database, as the review form does
+        review = Review.objects.get(pk=review.pk)
+        review.rating = 4
+        review.save()
+        self.assertAggregates(2, 4.5, stars_5=1, stars_4=1)
+
+        Review.objects.get(pk=review.pk).delete()
+        self.assertAggregates(1, 5.0, stars_5=1)
+
+    def test_sync_product_ratings_repairs_drift(self):
+        Review.objects.create(product=self.product, user=self.users[0], rating=4, comment='Good')
+        Review.objects.create(product=self.product, user=self.users[1], rating=3, comment='Fine')
+        Product.objects.filter(pk=self.product.pk).update(review_count=9, rating_sum=1, average_rating=0.1)
+
+        call_command('sync_product_ratings', '--dry-run', stdout=StringIO())
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.review_count, 9)
+
+        call_command('sync_product_ratings', stdout=StringIO())
+        self.assertAggregates(2, 3.5, stars_4=1, stars_3=1)
+
+
+@override_settings(PAGE_CACHE_ENABLED=False)
+class ProductListQueryCountTests(TestCase):
+    """The catalog page runs a fixed number of queries however many products it shows."""
+
+    def setUp(self):
+        cache.clear()
+        self.category = Category.objects.create(name='Seasonings')
+
+    def add_products(self, count):
+        start = Product.objects.count()
+        for index in range(start, start + count):
+            product = Product.objects.create(
+                name=f'Spice {index}', category=self.category, description='Test product', price=index + 1
+            )
+            ProductImage.objects.create(product=product, image=f'products/{index}-a.jpg')
+            ProductImage.objects.create(product=product, image=f'products/{index}-b.jpg', is_primary=True)
+
+    def get_list(self):
+        cache.clear()
+        return self.client.get(reverse('products:product_list'))
+
+    def test_query_count_does_not_grow_with_products(self):
+        self.add_products(3)
+        with CaptureQueriesContext(connection) as few:
+            self.get_list()
+
+        self.add_products(9)
+        with self.assertNumQueries(len(few)):
+            response = self.get_list()
+        self.assertEqual(len(response.context['page_obj']), 12)
+
+
+class CatalogSearchFilterTests(TestCase):
+    """Search results are capped after the catalog filters, never before."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.fish = Category.objects.create(name='Seafood')
+        cls.snacks = Category.objects.create(name='Snacks')
+        for index in range(6):
+            Product.objects.create(name=f'Smoked Catfish {index}', category=cls.fish,
+                                   description='Whole smoked catfish', price=10)
+        for index in range(2):
+            # Weaker matches: the term only appears in the description
+            Product.objects.create(name=f'Fish Crisps {index}', category=cls.snacks,
+                                   description='Crisps flavoured with catfish', price=3)
+
+    def setUp(self):
+        cache.clear()
+        self.backend = get_search_backend()
+        self.max_results = self.backend.max_results
+        self.backend.max_results = 3
+
+    def tearDown(self):
+        self.backend.max_results = self.max_results
+
+    def test_narrow_filter_finds_matches_outside_the_unfiltered_top_results(self):
+        filters = normalize_catalog_filters({'search': 'catfish', 'category': 'snacks'})
+        products = apply_catalog_filters(Product.objects.all(), filters)
+        self.assertEqual(sorted(product.name for product in products), ['Fish Crisps 0', 'Fish Crisps 1'])
+
+    def test_cap_applies_to_the_final_result(self):
+        filters = normalize_catalog_filters({'search': 'catfish'})
+        self.assertEqual(len(apply_catalog_filters(Product.objects.all(), filters)), 3)
+
+    def test_facet_counts_cover_every_match(self):
+        facets = get_catalog_facets(Product.objects.all(), normalize_catalog_filters({'search': 'catfish'}))
+        counts = {category['slug']: category['count'] for category in facets['categories']}
+        self.assertEqual(counts['seafood'], 6)
+        self.assertEqual(counts['snacks'], 2)
+
+
+class CatalogFacetLinkTests(TestCase):
+    """Following a facet link lists exactly the products the facet counted."""
+
+    @classmethod
+    def setUpTestData(cls):
+        for index, (price, country) in enumerate([(4, 'Ghana'), (5, 'Ghana'), (9.99, 'Nigeria'), (10, 'Kenya')]):
+            Product.objects.create(name=f'Item {index}', description='Test product', price=price,
+                                   country_of_origin=country)
+
+    def setUp(self):
+        cache.clear()
+
+    def listed(self, params):
+        return apply_catalog_filters(Product.objects.all(), normalize_catalog_filters(params)).count()
+
+    def test_price_bucket_links_match_counts(self):
+        facets = get_catalog_facets(Product.objects.all(), normalize_catalog_filters({}))
+        for bucket in facets['prices']:
+            params = {'min_price': str(bucket['min'])}
+            if bucket['max_price'] is not None:
+                params['max_price'] = str(bucket['max_price'])
+            self.assertEqual(self.listed(params), bucket['count'], bucket)
+
+    def test_country_links_filter_by_country(self):
+        facets = get_catalog_facets(Product.objects.all(), normalize_catalog_filters({'country': 'Ghana'}))
+        counts = {country['name']: country['count'] for country in facets['countries']}
+        # The country facet ignores its own filter, so the alternatives stay visible
+        self.assertEqual(counts, {'Ghana': 2, 'Nigeria': 1, 'Kenya': 1})
+        for name, count in counts.items():
+            self.assertEqual(self.listed({'country': name}), count)
+
+
+class CatalogImportTests(TestCase):
+    """Upserts from supplier files, keyed on SKU or slug."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(name='Spices')
+        cls.pepper = Product.objects.create(name='Pepper', sku='SP-1', description='Hot', price=5,
+                                            stock_quantity=3, category=cls.category)
+        cls.shea = Product.objects.create(name='Shea Butter', description='Raw', price=12)
+
+    def setUp(self):
+        cache.clear()
+
+    def run_import(self, rows, **kwargs):
+        return import_catalog(enumerate(rows, start=2), **kwargs)
+
+    def test_upsert_on_sku(self):
+        report = self.run_import([
+            {'sku': 'SP-1', 'name': 'Black Pepper', 'price': '6.50'},
+            {'sku': 'SP-2', 'name': 'Ginger', 'price': '3', 'category': 'spices'},
+        ])
+
+        self.assertEqual((report['created'], report['updated'], report['failed']), (1, 1, 0))
+        self.pepper.refresh_from_db()
+        self.assertEqual((self.pepper.name, self.pepper.price, self.pepper.slug), ('Black Pepper', Decimal('6.50'), 'pepper'))
+        ginger = Product.objects.get(sku='SP-2')
+        self.assertEqual((ginger.slug, ginger.category), ('ginger', self.category))
+
+        report = self.run_import([{'sku': 'SP-1', 'name': 'Black Pepper', 'price': '6.5'}])
+        self.assertEqual((report['created'], report['updated'], report['unchanged']), (0, 0, 1))
+
+    def test_rows_without_known_sku_fall_back_to_slug(self):
+        report = self.run_import([
+            {'slug': 'shea-butter', 'sku': 'SB-1', 'price': '11'},
+            {'sku': 'SB-2', 'name': 'Shea Butter', 'price': '20'},
+        ])
+
+        self.assertEqual((report['created'], report['updated'], report['failed']), (1, 1, 0))
+        self.shea.refresh_from_db()
+        self.assertEqual((self.shea.sku, self.shea.price), ('SB-1', Decimal('11.00')))
+        # A new SKU whose name clashes with an existing slug gets a suffixed one
+        self.assertEqual(Product.objects.get(sku='SB-2').slug, 'shea-butter-2')
+
+    def test_name_only_rows_never_overwrite_existing_products(self):
+        report = self.run_import([
+            {'name': 'Shea Butter', 'price': '1'},
+            {'name': 'Shea Butter', 'price': '2'},
+        ])
+
+        self.assertEqual((report['created'], report['updated']), (2, 0))
+        self.shea.refresh_from_db()
+        self.assertEqual(self.shea.price, Decimal('12.00'))
+        self.assertEqual(
+            list(Product.objects.filter(name='Shea Butter').order_by('id').values_list('slug', flat=True)),
+            ['shea-butter', 'shea-butter-2', 'shea-butter-3'],
+        )
+
+    def test_new_categories_get_unique_slugs(self):
+        Category.objects.create(name='Old Fish', slug='dried-fish')
+        report = self.run_import([
+            {'sku': 'DF-1', 'name': 'Kobi', 'price': '4', 'category': 'Dried Fish'},
+            {'sku': 'DF-2', 'name': 'Momoni', 'price': '5', 'category': 'Dried-Fish'},
+            {'sku': 'DF-3', 'name': 'Koobi', 'price': '6', 'category': 'dried fish'},
+            {'sku': 'DF-4', 'name': 'Pepper', 'price': '6', 'category': 'SPICES'},
+        ], create_categories=True)
+
+        self.assertEqual((report['created'], report['failed']), (4, 0))
+        categories = dict(Product.objects.filter(sku__startswith='DF-').values_list('sku', 'category__slug'))
+        self.assertEqual(categories, {'DF-1': 'dried-fish-2', 'DF-2': 'dried-fish-3', 'DF-3': 'dried-fish-2',
+                                      'DF-4': 'spices'})
+
+    def test_partial_price_book_only_changes_its_columns(self):
+        rows = read_catalog_file(StringIO('sku,price\nSP-1,9.99\nSP-9,4\n'))
+        report = import_catalog(rows)
+
+        self.assertEqual((report['updated'], report['created'], report['failed']), (1, 0, 1))
+        self.assertEqual(report['errors'], [(3, 'new product needs name')])
+        self.pepper.refresh_from_db()
+        self.assertEqual(self.pepper.price, Decimal('9.99'))
+        self.assertEqual((self.pepper.name, self.pepper.description, self.pepper.stock_quantity), ('Pepper', 'Hot', 3))
+        self.assertEqual(self.pepper.category, self.category)
+
+    def test_duplicate_keys_in_a_chunk_merge_in_order(self):
+        report = self.run_import([
+            {'sku': 'SP-3', 'name': 'Cloves', 'price': '2'},
+            {'sku': 'SP-3', 'price': '2.50', 'stock_quantity': '8'},
+            {'sku': 'SP-1', 'price': '7'},
+            {'sku': 'SP-1', 'stock_quantity': '0'},
+        ])
+
+        self.assertEqual((report['created'], report['updated'], report['failed']), (1, 1, 0))
+        cloves = Product.objects.get(sku='SP-3')
+        self.assertEqual((cloves.name, cloves.price, cloves.stock_quantity), ('Cloves', Decimal('2.50'), 8))
+        self.pepper.refresh_from_db()
+        self.assertEqual((self.pepper.price, self.pepper.stock_quantity), (Decimal('7.00'), 0))
+
+    def test_bad_rows_are_reported_not_fatal(self):
+        report = self.run_import([
+            {'sku': 'X-1', 'name': 'Bad', 'price': 'NaN'},
+            {'sku': 'X-2', 'name': 'Bad', 'price': 'Infinity'},
+            {'sku': 'X-3', 'name': 'Bad', 'price': 'abc'},
+            {'sku': 'X-4', 'name': 'Bad', 'price': '-1'},
+            {'sku': 'X-5', 'name': 'Bad', 'price': '1', 'stock_quantity': 'many'},
+            {'sku': 'X-6', 'name': 'Bad', 'price': '1', 'category': 'Unknown'},
+            None,
+            {'price': '1'},
+            {'sku': 'X-7', 'name': 'Good', 'price': '1'},
+        ], chunk_size=4)
+
+        self.assertEqual((report['created'], report['failed']), (1, 8))
+        self.assertEqual([line_number for line_number, message in report['errors']], list(range(2, 10)))
+        self.assertEqual(report['errors'][0], (2, "invalid price 'NaN'"))
+        self.assertEqual(report['errors'][6], (8, 'unreadable row'))
+        self.assertEqual(list(Product.objects.filter(sku__startswith='X-').values_list('sku', flat=True)), ['X-7'])
+
+
+
+@override_settings(PAGE_CACHE_ENABLED=True)
+class CategoryNavPageCacheTests(TestCase):
+    """Cached pages rendering the category nav are purged when it changes."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.spices = Category.objects.create(name='Spices')
+        cls.grains = Category.objects.create(name='Grains')
+        cls.pepper = Product.objects.create(name='Pepper', description='Hot', price=5, category=cls.spices)
+        cls.rice = Product.objects.create(name='Rice', description='Long grain', price=8, category=cls.grains)
+
+    def setUp(self):
+        cache.clear()
+
+    def get_list(self):
+        return self.client.get(reverse('products:product_list'), {'category': self.spices.slug})
+
+    def get_detail(self):
+        return self.client.get(reverse('products:product_detail', kwargs={'slug': self.pepper.slug}))
+
+    def test_category_rename_purges_pages_showing_the_nav(self):
+        self.get_list()
+        self.assertEqual(self.get_list()['X-Page-Cache'], 'hit')
+
+        self.grains.name = 'Cereals'
+        self.grains.save()
+
+        response = self.get_list()
+        self.assertNotIn('X-Page-Cache', response)
+        self.assertContains(response, 'Cereals')
+
+    def test_only_pages_rendering_the_nav_are_tagged(self):
+        self.get_list()
+        self.get_detail()
+        purge_tags(CATEGORY_NAV_TAG)
+        self.assertNotIn('X-Page-Cache', self.get_list())
+        self.assertEqual(self.get_detail()['X-Page-Cache'], 'hit')
+
+    def test_product_count_changes_purge_the_nav(self):
+        with patch('products.signals.purge_tags') as purge:
+            self.rice.description = 'Short grain'
+            self.rice.save()
+            self.assertNotIn(CATEGORY_NAV_TAG, purge.call_args.args)
+
+            self.rice.is_available = False
+            self.rice.save()
+            self.assertIn(CATEGORY_NAV_TAG, purge.call_args.args)
+
+
+class RecommendationRecoveryTests(TestCase):
+    """A run after an interrupted one refreshes every product whose pair counts changed."""
+
+    def test_interrupted_run_partners_are_refreshed(self):
+        yam, rice, oil = [Product.objects.create(name=name, description='Test product', price=1)
+                          for name in ('Yam', 'Rice', 'Oil')]
+        cart = Cart.objects.create(user=User.objects.create_user(username='shopper', email='shopper@example.com'))
+        first = CartItem.objects.create(cart=cart, product=yam, price_at_addition=1)
+        compute_recommendations()
+
+        CartItem.objects.create(cart=cart, product=rice, price_at_addition=1)
+        CartItem.objects.create(cart=cart, product=oil, price_at_addition=1)
+        with patch('products.recommendations.refresh_recommendations', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                compute_recommendations(batch_size=1)
+        # The partner's cart item is gone by the time the next run recovers
+        first.delete()
+
+        compute_recommendations()
+        related_ids = ProductRecommendation.objects.get(product=yam).related_ids
+        self.assertEqual(sorted(related_ids), sorted([rice.id, oil.id]))
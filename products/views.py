@@ -2,136 +2,62 @@
 Views for products app.
 """
 from django.shortcuts import render, get_object_or_404, redirect
-from django.db.models import Q, Count, Max
 from django.core.paginator import Paginator
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from .models import Category, Product, Review
+from .caching import get_categories_with_counts
+from .facets import get_catalog_facets
+from .filters import apply_catalog_filters, normalize_catalog_filters
 from .forms import ReviewForm
+from .hero import get_hero_images
+from .page_cache import PRODUCT_LIST_TAG, cache_anonymous_page, category_tag, product_tag, tag_page
+from .pagination import SORT_ORDERINGS, paginate_catalog
+from .price_stats import get_price_statistics
+from .recommendations import get_related_products
 
 
+def _pagination_query(request):
+    """Current query string without page/cursor, for building page links."""
+    query = request.GET.copy()
+    query.pop('page', None)
+    query.pop('cursor', None)
+    return query.urlencode()
+
+
+@cache_anonymous_page('product_list')
 def product_list_view(request):
     """
     Display list of products with filtering and search.
     """
-    import os
-    from django.conf import settings
-    
     products = Product.objects.filter(is_available=True).select_related('category').prefetch_related('images')
     
-    # Get hero images for carousel
-    hero_images = []
-    try:
-        # Use STATICFILES_DIRS for development (where files actually are)
-        logo_dir = os.path.join(settings.STATICFILES_DIRS[0], 'logo')
-        
-        if os.path.exists(logo_dir):
-            import glob
-            from django.templatetags.static import static
-            
-            # Images to exclude
-            excluded_images = [
-                'Image_12-2-25_at_7.25_PM.jpg',  # Lady in grocery/shopping - exclude
-            ]
-            
-            # Priority images to include - store exterior should be first
-            priority_images = [
-                'Image_12-2-25_at_3.39_PM.jpg',  # Store exterior - FIRST
-                'Image_12-2-25_at_4.11_PM.jpg',  # Kitchen lady attending to customer - KEEP
-                'Image_12-2-25_at_3.57_PM_2.jpg',  # Cooked food area
-                'Image_12-2-25_at_4.11_PM_2.jpg',  # Cooked food area
-                # Man with mask - will be added from other images if not in priority
-            ]
-            
-            # First, add priority images (store exterior will be first)
-            for priority_img in priority_images:
-                priority_path = os.path.join(logo_dir, priority_img)
-                if os.path.exists(priority_path):
-                    static_path = f'logo/{priority_img}'
-                    hero_images.append(static(static_path))
-            
-            # Then add other images, excluding excluded images and already added priority images
-            # This will include the man with mask image if it exists
-            image_files = sorted(glob.glob(os.path.join(logo_dir, '*.jpg')))
-            for img_file in image_files:
-                filename = os.path.basename(img_file)
-                
-                # Skip excluded images and already added priority images
-                if filename in excluded_images or filename in priority_images:
-                    continue
-                
-                # Limit total to 10 images
-                if len(hero_images) >= 10:
-                    break
-                    
-                static_path = f'logo/{filename}'
-                hero_images.append(static(static_path))
-            
-            # Remove index 2 (3rd image, 0-indexed)
-            if len(hero_images) > 2:
-                hero_images.pop(2)
-                
-    except Exception as e:
-        # If there's any error, just use empty list
-        import traceback
-        print(f"Error loading hero images: {e}")
-        print(traceback.format_exc())
-        hero_images = []
+    # Get hero images for carousel (from the cached hero manifest)
+    hero_images = get_hero_images()
     
-    # Search functionality
-    search_query = request.GET.get('search', '')
-    if search_query:
-        products = products.filter(
-            Q(name__icontains=search_query) |
-            Q(description__icontains=search_query) |
-            Q(country_of_origin__icontains=search_query)
-        )
-    
-    # Category filter
-    category_slug = request.GET.get('category', '')
-    if category_slug:
-        products = products.filter(category__slug=category_slug)
-    
-    # Price range filter
+    # Search, category, price range and availability filters
+    filters = normalize_catalog_filters(request.GET)
+    search_query = filters['search']
+    category_slug = filters['category']
     min_price = request.GET.get('min_price', '')
     max_price = request.GET.get('max_price', '')
-    if min_price:
-        try:
-            products = products.filter(price__gte=float(min_price))
-        except ValueError:
-            pass
-    if max_price:
-        try:
-            products = products.filter(price__lte=float(max_price))
-        except ValueError:
-            pass
-    
-    # Availability filter
     in_stock_only = request.GET.get('in_stock', '')
-    if in_stock_only:
-        products = products.filter(stock_quantity__gt=0)
+    products = apply_catalog_filters(products, filters)
     
-    # Sorting
-    sort_by = request.GET.get('sort', 'newest')
-    if sort_by == 'price_low':
-        products = products.order_by('price')
-    elif sort_by == 'price_high':
-        products = products.order_by('-price')
-    elif sort_by == 'name':
-        products = products.order_by('name')
-    else:  # newest
-        products = products.order_by('-created_at')
+    # Sorting (search results default to relevance order)
+    sort_by = request.GET.get('sort', 'relevance' if search_query else 'newest')
+    if sort_by == 'relevance' and search_query:
+        pass  # already ranked by the search backend
+    else:
+        if sort_by not in SORT_ORDERINGS:
+            sort_by = 'newest'
+        products = products.order_by(*SORT_ORDERINGS[sort_by])
     
-    # Pagination
-    paginator = Paginator(products, 12)  # 12 products per page
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # Pagination (offset or keyset, 12 products per page)
+    page_obj = paginate_catalog(request, products, sort_by, per_page=12)
     
     # Get all categories for filter sidebar (show all, even with 0 products)
-    # Convert to list to ensure queryset is evaluated
-    categories = list(Category.objects.filter(is_active=True).annotate(
-        product_count=Count('products', filter=Q(products__is_available=True))
-    ).order_by('name'))
+    categories = get_categories_with_counts()
     
     # Debug: Log if categories are empty
     if not categories:
@@ -139,38 +65,49 @@ def product_list_view(request):
         logger = logging.getLogger(__name__)
         logger.warning(f"No active categories found in database. Total categories: {Category.objects.count()}")
     
-    # Calculate max price for filter
-    max_product_price = Product.objects.filter(is_available=True).aggregate(
-        max_price=Max('price')
-    )['max_price'] or 0
+    # Facet counts for the current filters (cached per filter combination)
+    facets = get_catalog_facets(Product.objects.filter(is_available=True), filters)
+    
+    # Max price for the price filter, from precomputed price statistics
+    selected = next((category for category in categories if category.slug == category_slug), None)
+    price_stats = get_price_statistics(selected.id if selected else None)
+    max_product_price = price_stats.max_price or 0
+    
+    # Page cache: the listing depends on the whole catalog and on the products shown
+    tag_page(request, PRODUCT_LIST_TAG, *[product_tag(product.id) for product in page_obj])
     
     context = {
         'page_obj': page_obj,
         'categories': categories if categories else [],  # Ensure it's never None
         'search_query': search_query,
         'selected_category': category_slug,
+        'selected_country': filters['country'],
         'min_price': min_price,
         'max_price': max_price,
         'max_product_price': max_product_price,
         'in_stock_only': in_stock_only,
+        'facets': facets,
         'sort_by': sort_by,
         'hero_images': hero_images,
+        'pagination_query': _pagination_query(request),
     }
     
     return render(request, 'products/product_list.html', context)
 
 
+@cache_anonymous_page('product_detail')
 def product_detail_view(request, slug):
     """
     Display product detail page with reviews.
     """
-    product = get_object_or_404(Product, slug=slug, is_available=True)
-    
-    # Get related products (same category)
-    related_products = Product.objects.filter(
-        category=product.category,
+    product = get_object_or_404(
+        Product.objects.select_related('category').prefetch_related('images'),
+        slug=slug,
         is_available=True
-    ).exclude(id=product.id)[:4]
+    )
+    
+    # Frequently added together, topped up from the same category
+    related_products = get_related_products(product, limit=4)
     
     # Get reviews with pagination
     reviews = Review.objects.filter(product=product).select_related('user')
@@ -183,6 +120,13 @@ def product_detail_view(request, slug):
     if request.user.is_authenticated:
         user_review = Review.objects.filter(product=product, user=request.user).first()
     
+    tag_page(
+        request,
+        product_tag(product.id),
+        category_tag(product.category_id),
+        *[product_tag(related.id) for related in related_products]
+    )
+    
     context = {
         'product': product,
         'related_products': related_products,
@@ -195,6 +139,7 @@ def product_detail_view(request, slug):
     return render(request, 'products/product_detail.html', context)
 
 
+@cache_anonymous_page('category_detail')
 def category_detail_view(request, slug):
     """
     Display products in a specific category.
@@ -207,31 +152,24 @@ def category_detail_view(request, slug):
     
     # Sorting
     sort_by = request.GET.get('sort', 'newest')
-    if sort_by == 'price_low':
-        products = products.order_by('price')
-    elif sort_by == 'price_high':
-        products = products.order_by('-price')
-    elif sort_by == 'name':
-        products = products.order_by('name')
-    else:
-        products = products.order_by('-created_at')
+    if sort_by not in SORT_ORDERINGS:
+        sort_by = 'newest'
+    products = products.order_by(*SORT_ORDERINGS[sort_by])
     
-    # Pagination
-    paginator = Paginator(products, 12)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # Pagination (offset or keyset)
+    page_obj = paginate_catalog(request, products, sort_by, per_page=12)
     
     # Get all categories for any filter sidebar (if needed)
-    # Convert to list to ensure queryset is evaluated
-    categories = list(Category.objects.filter(is_active=True).annotate(
-        product_count=Count('products', filter=Q(products__is_available=True))
-    ).order_by('name'))
+    categories = get_categories_with_counts()
+    
+    tag_page(request, category_tag(category.id), *[product_tag(product.id) for product in page_obj])
     
     context = {
         'category': category,
         'page_obj': page_obj,
         'sort_by': sort_by,
         'categories': categories,  # Add categories to context
+        'pagination_query': _pagination_query(request),
     }
     
     return render(request, 'products/category_detail.html', context)
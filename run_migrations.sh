@@ -13,6 +13,10 @@ echo ""
 echo "Collecting static files..."
 npx @railway/cli run python manage.py collectstatic --noinput
 
+echo ""
+echo "Building hero image manifest..."
+npx @railway/cli run python manage.py build_hero_manifest
+
 echo ""
 echo "✅ Setup complete!"
 echo ""
@@ -9,6 +9,9 @@ python manage.py migrate --noinput
 echo "Collecting static files..."
 python manage.py collectstatic --noinput
 
+echo "Building hero image manifest..."
+python manage.py build_hero_manifest
+
 echo "Creating categories (if not exists)..."
 python manage.py create_categories || echo "Categories already exist or error occurred"
 
@@ -2,7 +2,8 @@
 Admin configuration for store app.
 """
 from django.contrib import admin
-from .models import NewsletterSubscriber
+from django.utils import timezone
+from .models import NewsletterCampaign, NewsletterSubscriber, OutboxMessage
 
 
 @admin.register(NewsletterSubscriber)
@@ -27,8 +28,30 @@ class NewsletterSubscriberAdmin(admin.ModelAdmin):
     deactivate_subscribers.short_description = 'Deactivate selected subscribers'
 
 
-
-
-
-
+@admin.register(OutboxMessage)
+class OutboxMessageAdmin(admin.ModelAdmin):
+    """Admin for OutboxMessage model."""
+    list_display = ['subject', 'status', 'attempts', 'next_attempt_at', 'created_at', 'sent_at']
+    list_filter = ['status', 'created_at']
+    search_fields = ['subject', 'recipients']
+    readonly_fields = ['created_at', 'sent_at', 'last_error']
+    actions = ['retry_messages']
+
+    def retry_messages(self, request, queryset):
+        """Queue selected messages for immediate redelivery."""
+        count = queryset.exclude(status=OutboxMessage.SENT).update(
+            status=OutboxMessage.PENDING,
+            attempts=0,
+            next_attempt_at=timezone.now()
+        )
+        self.message_user(request, f'{count} messages queued for delivery.')
+    retry_messages.short_description = 'Retry selected messages'
+
+
+@admin.register(NewsletterCampaign)
+class NewsletterCampaignAdmin(admin.ModelAdmin):
+    """Admin for NewsletterCampaign model (progress is written by send_newsletter)."""
+    list_display = ['name', 'subject', 'sent_count', 'failed_count', 'started_at', 'finished_at']
+    search_fields = ['name', 'subject']
+    readonly_fields = ['last_subscriber_id', 'sent_count', 'failed_count', 'started_at', 'finished_at']
 
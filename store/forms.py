@@ -60,6 +60,11 @@ class NewsletterForm(forms.ModelForm):
             Submit('submit', 'Subscribe', css_class='btn btn-primary')
         )
 
+    def validate_unique(self):
+        # Existing addresses are handled by the upsert in import_subscribers
+        # (already subscribed / resubscribed), not rejected as duplicates
+        pass
+
 
 
 
@@ -0,0 +1,66 @@
+"""
+Management command to import newsletter subscribers from a CSV or JSONL file.
+The file is streamed; addresses are normalized, de-duplicated and written in
+batches with one upsert each, re-activating unsubscribed addresses.
+"""
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from store.subscribers import import_subscribers, read_subscriber_file
+
+
+class Command(BaseCommand):
+    help = 'Import newsletter subscribers from a CSV or JSONL file'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path',
+            help="CSV or JSONL file with one address per row ('-' reads stdin)",
+        )
+        parser.add_argument(
+            '--format',
+            choices=['csv', 'jsonl'],
+            default=None,
+            help='File format (default: from the file extension, csv for stdin)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Number of addresses written per upsert',
+        )
+        parser.add_argument(
+            '--no-reactivate',
+            action='store_true',
+            help='Leave addresses that unsubscribed inactive instead of re-activating them',
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options['format']
+        if file_format is None:
+            file_format = 'jsonl' if path.endswith(('.jsonl', '.ndjson')) else 'csv'
+
+        def report(number, counts):
+            self.stdout.write(
+                f"Batch {number}: {counts['inserted']} inserted, "
+                f"{counts['reactivated']} reactivated, {counts['skipped']} skipped"
+            )
+
+        try:
+            file = sys.stdin if path == '-' else open(path, newline='', encoding='utf-8-sig')
+        except OSError as exc:
+            raise CommandError(f'Cannot read {path}: {exc}')
+        with file:
+            totals = import_subscribers(
+                read_subscriber_file(file, file_format),
+                batch_size=options['batch_size'],
+                reactivate=not options['no_reactivate'],
+                on_batch=report,
+            )
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported subscribers: {totals['inserted']} inserted, {totals['reactivated']} reactivated, "
+            f"{totals['skipped']} skipped, {totals['duplicate']} duplicates, {totals['invalid']} invalid"
+        ))
@@ -0,0 +1,101 @@
+"""
+Management command to send a newsletter to all active subscribers.
+Streams subscribers in chunks, renders the message once and sends over a pool
+of persistent mail connections at a configurable rate. Progress is stored per
+campaign, so rerunning an interrupted campaign resumes where it stopped. The
+run stops (and the campaign stays unfinished) when the mail server keeps
+failing.
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from store.models import NewsletterCampaign, NewsletterSubscriber
+from store.newsletter import MailServerUnavailable, render_newsletter, send_newsletter
+
+
+class Command(BaseCommand):
+    help = 'Send a newsletter to active subscribers (resumable per campaign)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('campaign', help='Campaign name; reuse it to resume an interrupted run')
+        parser.add_argument('--subject', help='Email subject (required for a new campaign)')
+        parser.add_argument(
+            '--template',
+            required=True,
+            help='Template for the plain-text body, e.g. store/emails/newsletter.txt',
+        )
+        parser.add_argument('--html-template', help='Optional template for an HTML alternative')
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=1000,
+            help='Subscribers loaded and sent per chunk',
+        )
+        parser.add_argument(
+            '--connections',
+            type=int,
+            default=4,
+            help='Number of parallel mail connections',
+        )
+        parser.add_argument(
+            '--rate',
+            type=float,
+            default=0,
+            help='Maximum messages per second across all connections (0 = unlimited)',
+        )
+        parser.add_argument(
+            '--max-failures',
+            type=int,
+            default=20,
+            help='Stop after this many consecutive connection failures (0 = never stop)',
+        )
+        parser.add_argument(
+            '--backend',
+            default=None,
+            help='Email backend to use instead of EMAIL_BACKEND',
+        )
+
+    def handle(self, *args, **options):
+        campaign = NewsletterCampaign.objects.filter(name=options['campaign']).first()
+        if campaign is None:
+            if not options['subject']:
+                raise CommandError('--subject is required for a new campaign')
+            campaign = NewsletterCampaign.objects.create(name=options['campaign'], subject=options['subject'])
+        elif campaign.finished_at:
+            self.stdout.write(self.style.WARNING(f'Campaign "{campaign.name}" already finished'))
+            return
+        else:
+            self.stdout.write(f'Resuming "{campaign.name}" after subscriber {campaign.last_subscriber_id}')
+
+        body, html_body = render_newsletter(campaign.subject, options['template'], options['html_template'])
+        remaining = NewsletterSubscriber.objects.filter(is_active=True, id__gt=campaign.last_subscriber_id).count()
+        self.stdout.write(f'Sending "{campaign.subject}" to {remaining} subscribers...')
+
+        def report(campaign, sent, failed):
+            self.stdout.write(
+                f'  up to subscriber {campaign.last_subscriber_id}: {sent} sent, {failed} failed '
+                f'(total {campaign.sent_count} sent)'
+            )
+
+        try:
+            campaign = send_newsletter(
+                campaign,
+                body,
+                html_body,
+                chunk_size=options['chunk_size'],
+                connections=options['connections'],
+                rate=options['rate'],
+                backend=options['backend'],
+                on_chunk=report,
+                max_failures=options['max_failures'],
+            )
+        except MailServerUnavailable as exc:
+            raise CommandError(
+                f'Stopped "{campaign.name}" after subscriber {campaign.last_subscriber_id}: {exc}. '
+                f'Rerun the command to resume.'
+            )
+
+        if campaign.failed_count:
+            self.stdout.write(self.style.WARNING(
+                f'{campaign.failed_count} messages failed and were queued in the outbox for retry'
+            ))
+        self.stdout.write(self.style.SUCCESS(f'Campaign "{campaign.name}": {campaign.sent_count} sent'))
@@ -0,0 +1,65 @@
+"""
+Management command to deliver queued outbox emails.
+Sends due messages in batches over one mail connection and retries failures
+with exponential backoff. Run it from cron, or with --loop as a worker.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from store.outbox import deliver_outbox
+
+
+class Command(BaseCommand):
+    help = 'Send pending emails from the outbox'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=100,
+            help='Number of messages claimed and sent per batch',
+        )
+        parser.add_argument(
+            '--max-attempts',
+            type=int,
+            default=5,
+            help='Mark a message failed after this many attempts',
+        )
+        parser.add_argument(
+            '--backend',
+            default=None,
+            help='Email backend to use instead of EMAIL_BACKEND '
+                 '(e.g. django.core.mail.backends.locmem.EmailBackend)',
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep polling for new messages instead of exiting when the outbox is empty',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=5,
+            help='Seconds to wait between polls with --loop',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            counts = deliver_outbox(
+                batch_size=options['batch_size'],
+                max_attempts=options['max_attempts'],
+                backend=options['backend'],
+            )
+            if any(counts.values()):
+                self.stdout.write(
+                    f"Sent {counts['sent']}, retrying {counts['retried']}, failed {counts['failed']}"
+                )
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+
+        if counts['failed']:
+            self.stdout.write(self.style.WARNING(f"{counts['failed']} messages failed permanently"))
+        else:
+            self.stdout.write(self.style.SUCCESS('Outbox processed'))
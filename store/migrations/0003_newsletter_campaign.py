@@ -0,0 +1,31 @@
+# Generated by Django 4.2.30 on 2026-10-18 07:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0002_outbox_message'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NewsletterCampaign',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True, verbose_name='name')),
+                ('subject', models.CharField(max_length=255, verbose_name='subject')),
+                ('last_subscriber_id', models.BigIntegerField(default=0, verbose_name='last subscriber id')),
+                ('sent_count', models.PositiveIntegerField(default=0, verbose_name='sent')),
+                ('failed_count', models.PositiveIntegerField(default=0, verbose_name='failed')),
+                ('started_at', models.DateTimeField(auto_now_add=True, verbose_name='started at')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='finished at')),
+            ],
+            options={
+                'verbose_name': 'newsletter campaign',
+                'verbose_name_plural': 'newsletter campaigns',
+                'ordering': ['-started_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-18 07:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0003_newsletter_campaign'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='outboxmessage',
+            name='html_body',
+            field=models.TextField(blank=True, verbose_name='HTML body'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-18 07:39
+
+from django.db import migrations, models
+import django.db.models.functions.text
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0004_outbox_html_body'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='newslettersubscriber',
+            index=models.Index(django.db.models.functions.text.Lower('email'), name='store_subscriber_email_lower'),
+        ),
+    ]
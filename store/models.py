@@ -2,6 +2,8 @@
 Store models for Makola Marketplace.
 """
 from django.db import models
+from django.db.models.functions import Lower
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
 
@@ -18,13 +20,72 @@ class NewsletterSubscriber(models.Model):
         verbose_name = _('newsletter subscriber')
         verbose_name_plural = _('newsletter subscribers')
         ordering = ['-subscribed_at']
+        indexes = [
+            # Case-insensitive lookups by store.subscribers (older rows may be mixed-case)
+            models.Index(Lower('email'), name='store_subscriber_email_lower'),
+        ]
 
     def __str__(self):
         return self.email
 
 
+class OutboxMessage(models.Model):
+    """
+    An email waiting to be delivered by the send_outbox command.
+    Views enqueue messages in the same transaction as the write they describe.
+    """
+    PENDING = 'pending'
+    SENT = 'sent'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (PENDING, _('Pending')),
+        (SENT, _('Sent')),
+        (FAILED, _('Failed')),
+    ]
+
+    subject = models.CharField(_('subject'), max_length=255)
+    body = models.TextField(_('body'))
+    # Optional text/html alternative to body
+    html_body = models.TextField(_('HTML body'), blank=True)
+    from_email = models.CharField(_('from email'), max_length=254)
+    recipients = models.JSONField(_('recipients'), default=list)
+    status = models.CharField(_('status'), max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveIntegerField(_('attempts'), default=0)
+    next_attempt_at = models.DateTimeField(_('next attempt at'), default=timezone.now)
+    last_error = models.TextField(_('last error'), blank=True)
+    created_at = models.DateTimeField(_('created at'), auto_now_add=True)
+    sent_at = models.DateTimeField(_('sent at'), null=True, blank=True)
 
+    class Meta:
+        verbose_name = _('outbox message')
+        verbose_name_plural = _('outbox messages')
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+        ]
 
+    def __str__(self):
+        return f"{self.subject} to {', '.join(self.recipients)} ({self.status})"
 
 
+class NewsletterCampaign(models.Model):
+    """
+    Progress of one newsletter send. Subscribers are mailed in id order, so
+    an interrupted run resumes after last_subscriber_id.
+    """
+    name = models.CharField(_('name'), max_length=100, unique=True)
+    subject = models.CharField(_('subject'), max_length=255)
+    last_subscriber_id = models.BigIntegerField(_('last subscriber id'), default=0)
+    sent_count = models.PositiveIntegerField(_('sent'), default=0)
+    failed_count = models.PositiveIntegerField(_('failed'), default=0)
+    started_at = models.DateTimeField(_('started at'), auto_now_add=True)
+    finished_at = models.DateTimeField(_('finished at'), null=True, blank=True)
+
+    class Meta:
+        verbose_name = _('newsletter campaign')
+        verbose_name_plural = _('newsletter campaigns')
+        ordering = ['-started_at']
+
+    def __str__(self):
+        return self.name
 
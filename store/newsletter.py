@@ -0,0 +1,201 @@
+"""
+Bulk newsletter delivery.
+
+Active subscribers are read in id-ordered keyset chunks, so memory stays
+bounded however large the list is. The message is rendered once and sent to
+each subscriber individually by a small pool of threads, each holding one
+persistent mail connection, throttled to a shared rate. After every chunk the
+campaign's progress is saved; a rerun continues after the last finished
+chunk. Messages that fail are handed to the outbox for retries.
+
+When the mail server itself is failing (max_failures consecutive connection
+errors), remaining sends are skipped, progress is saved up to the last
+attempted subscriber and MailServerUnavailable is raised, leaving the
+campaign unfinished so a rerun resumes once the server is back.
+"""
+import smtplib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db.models import F
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from .models import NewsletterCampaign, NewsletterSubscriber, OutboxMessage
+
+# Errors about one message or recipient: the server itself is working
+MESSAGE_ERRORS = (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused, smtplib.SMTPDataError)
+# Marks a send skipped because the server was found unavailable
+SKIPPED = object()
+
+
+class MailServerUnavailable(Exception):
+    """Sending stopped after too many consecutive connection failures."""
+
+
+class RateLimiter:
+    """Spaces calls to wait() at most `rate` per second across threads (0 = unlimited)."""
+
+    def __init__(self, rate):
+        self.interval = 1 / rate if rate else 0
+        self.lock = threading.Lock()
+        self.next_at = time.monotonic()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self.lock:
+            now = time.monotonic()
+            delay = self.next_at - now
+            self.next_at = max(now, self.next_at) + self.interval
+        if delay > 0:
+            time.sleep(delay)
+
+
+class FailureTracker:
+    """Counts consecutive connection failures across threads; trips at `limit` (0 = never)."""
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.lock = threading.Lock()
+        self.consecutive = 0
+        self.last_error = None
+
+    @property
+    def tripped(self):
+        return bool(self.limit) and self.consecutive >= self.limit
+
+    def record(self, error=None):
+        with self.lock:
+            if error is not None:
+                self.consecutive += 1
+                self.last_error = error
+            elif not self.tripped:
+                self.consecutive = 0
+
+
+class ConnectionPool:
+    """One open mail connection per sending thread."""
+
+    def __init__(self, backend=None):
+        self.backend = backend
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.connections = []
+
+    def get(self):
+        connection = getattr(self.local, 'connection', None)
+        if connection is None:
+            connection = get_connection(self.backend)
+            # Raises on connect/auth errors; only an open connection is kept for the thread
+            connection.open()
+            self.local.connection = connection
+            with self.lock:
+                self.connections.append(connection)
+        return connection
+
+    def reset(self):
+        """Drop this thread's connection after an error; the next get() reconnects."""
+        connection = getattr(self.local, 'connection', None)
+        if connection is not None:
+            connection.close()
+            self.local.connection = None
+
+    def close_all(self):
+        for connection in self.connections:
+            connection.close()
+
+
+def render_newsletter(subject, template_name, html_template_name=None):
+    """Render the text (and optional HTML) body once for all recipients."""
+    context = {'subject': subject, 'site_url': settings.SITE_URL}
+    body = render_to_string(template_name, context)
+    html_body = render_to_string(html_template_name, context) if html_template_name else None
+    return body, html_body
+
+
+def send_newsletter(campaign, body, html_body=None, chunk_size=1000, connections=4, rate=0,
+                    backend=None, on_chunk=None, max_failures=20):
+    """
+    Send the campaign to every active subscriber after its last_subscriber_id.
+    on_chunk(campaign, sent, failed) is called after each saved chunk.
+    Raises MailServerUnavailable after max_failures consecutive connection
+    failures (0 = never stop).
+    """
+    limiter = RateLimiter(rate)
+    pool = ConnectionPool(backend)
+    failures = FailureTracker(max_failures)
+    from_email = settings.DEFAULT_FROM_EMAIL
+
+    def send_one(email):
+        if failures.tripped:
+            return SKIPPED
+        limiter.wait()
+        try:
+            message = EmailMultiAlternatives(campaign.subject, body, from_email, [email], connection=pool.get())
+            if html_body:
+                message.attach_alternative(html_body, 'text/html')
+            message.send()
+        except MESSAGE_ERRORS as exc:
+            failures.record()
+            return f'{type(exc).__name__}: {exc}'
+        except Exception as exc:
+            pool.reset()
+            error = f'{type(exc).__name__}: {exc}'
+            failures.record(error)
+            return error
+        failures.record()
+        return None
+
+    subscribers = NewsletterSubscriber.objects.filter(is_active=True).order_by('id')
+    try:
+        with ThreadPoolExecutor(max_workers=connections) as executor:
+            while True:
+                chunk = list(
+                    subscribers.filter(id__gt=campaign.last_subscriber_id).values_list('id', 'email')[:chunk_size]
+                )
+                if not chunk:
+                    break
+                errors = list(executor.map(send_one, [email for subscriber_id, email in chunk]))
+                if failures.tripped:
+                    # Keep the chunk up to the last attempted send; the rest is left for the rerun
+                    attempted = [index for index, error in enumerate(errors) if error is not SKIPPED]
+                    if not attempted:
+                        break
+                    chunk, errors = chunk[:attempted[-1] + 1], errors[:attempted[-1] + 1]
+                failed = [
+                    OutboxMessage(subject=campaign.subject, body=body, html_body=html_body or '',
+                                  from_email=from_email, recipients=[email],
+                                  attempts=0 if error is SKIPPED else 1,
+                                  last_error='Skipped: mail server unavailable' if error is SKIPPED else error)
+                    for (subscriber_id, email), error in zip(chunk, errors) if error
+                ]
+                OutboxMessage.objects.bulk_create(failed)
+
+                campaign.last_subscriber_id = chunk[-1][0]
+                sent = len(chunk) - len(failed)
+                NewsletterCampaign.objects.filter(pk=campaign.pk).update(
+                    last_subscriber_id=campaign.last_subscriber_id,
+                    sent_count=F('sent_count') + sent,
+                    failed_count=F('failed_count') + len(failed),
+                )
+                campaign.sent_count += sent
+                campaign.failed_count += len(failed)
+                if on_chunk:
+                    on_chunk(campaign, sent, len(failed))
+                if failures.tripped:
+                    break
+    finally:
+        pool.close_all()
+
+    if failures.tripped:
+        raise MailServerUnavailable(
+            f'{failures.consecutive} consecutive sends failed (last error: {failures.last_error})'
+        )
+
+    campaign.finished_at = timezone.now()
+    campaign.save(update_fields=['finished_at'])
+    return campaign
@@ -0,0 +1,132 @@
+"""
+Database-backed email outbox.
+
+enqueue_email() stores a message as an OutboxMessage row; call it inside the
+transaction of the write the email is about, so the message exists exactly
+when the write commits. deliver_outbox() (run by the send_outbox worker)
+sends due messages in batches over one reused mail connection. Failed
+messages are retried with exponential backoff and marked failed after
+max_attempts.
+
+A batch is claimed in a short transaction that counts the attempt and
+leases the rows (next_attempt_at moves CLAIM_LEASE ahead), so no database
+transaction or row lock is held during the SMTP round-trips; other workers
+skip leased rows. Outcomes are recorded in a second short transaction. If a
+worker dies mid-batch, its messages become due again when the lease runs
+out, so delivery is at-least-once.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from .models import OutboxMessage
+
+RETRY_BASE_DELAY = timedelta(minutes=1)
+RETRY_MAX_DELAY = timedelta(hours=6)
+# How long claimed messages are reserved for the worker sending them
+CLAIM_LEASE = timedelta(minutes=10)
+
+
+def enqueue_email(subject, body, recipient_list, from_email=None, html_body=''):
+    """Queue an email (with an optional HTML alternative) for delivery; returns the OutboxMessage."""
+    return OutboxMessage.objects.create(
+        subject=subject,
+        body=body,
+        html_body=html_body or '',
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        recipients=list(recipient_list),
+    )
+
+
+def retry_delay(attempts):
+    """Backoff before the next attempt after the given number of failures."""
+    return min(RETRY_BASE_DELAY * 2 ** (attempts - 1), RETRY_MAX_DELAY)
+
+
+def _send(connection, message):
+    email = EmailMultiAlternatives(
+        subject=message.subject,
+        body=message.body,
+        from_email=message.from_email,
+        to=message.recipients,
+        connection=connection,
+    )
+    if message.html_body:
+        email.attach_alternative(message.html_body, 'text/html')
+    email.send()
+
+
+def _open(connection):
+    try:
+        connection.open()
+    except Exception:
+        # Left closed: each send then tries to connect and fails (and is retried) on its own
+        pass
+
+
+def claim_batch(batch_size=100):
+    """
+    Lease up to batch_size due messages for this worker and count the attempt.
+    Returns the claimed messages.
+    """
+    with transaction.atomic():
+        # skip_locked lets several workers share the queue (ignored on SQLite)
+        messages = list(
+            OutboxMessage.objects.select_for_update(skip_locked=True).filter(
+                status=OutboxMessage.PENDING,
+                next_attempt_at__lte=timezone.now()
+            ).order_by('next_attempt_at', 'id')[:batch_size]
+        )
+        lease_until = timezone.now() + CLAIM_LEASE
+        for message in messages:
+            message.attempts += 1
+            message.next_attempt_at = lease_until
+        OutboxMessage.objects.bulk_update(messages, ['attempts', 'next_attempt_at'])
+    return messages
+
+
+def deliver_outbox(batch_size=100, max_attempts=5, backend=None, max_batches=None):
+    """
+    Send due messages until none are left (or max_batches batches were sent).
+    Returns {'sent': n, 'retried': n, 'failed': n}.
+    """
+    counts = {'sent': 0, 'retried': 0, 'failed': 0}
+    connection = get_connection(backend)
+    batches = 0
+    try:
+        while max_batches is None or batches < max_batches:
+            messages = claim_batch(batch_size)
+            if not messages:
+                break
+            _open(connection)
+            for message in messages:
+                try:
+                    _send(connection, message)
+                except Exception as exc:
+                    message.last_error = f'{type(exc).__name__}: {exc}'
+                    if message.attempts >= max_attempts:
+                        message.status = OutboxMessage.FAILED
+                        counts['failed'] += 1
+                    else:
+                        message.next_attempt_at = timezone.now() + retry_delay(message.attempts)
+                        counts['retried'] += 1
+                    # The connection may be unusable after an error; start a fresh one
+                    connection.close()
+                    _open(connection)
+                else:
+                    message.status = OutboxMessage.SENT
+                    message.sent_at = timezone.now()
+                    message.last_error = ''
+                    counts['sent'] += 1
+            with transaction.atomic():
+                OutboxMessage.objects.bulk_update(
+                    messages,
+                    ['status', 'next_attempt_at', 'last_error', 'sent_at']
+                )
+            batches += 1
+    finally:
+        connection.close()
+    return counts
@@ -0,0 +1,130 @@
+"""
+Newsletter subscriber import.
+
+import_subscribers() takes any iterable of email addresses (a stream from
+read_subscriber_file(), or a single address from the subscribe form),
+normalizes and de-duplicates them in memory and writes each batch with one
+SELECT (to classify addresses for the report), one UPDATE re-activating
+unsubscribed addresses and one bulk_create(update_conflicts=True) inserting
+new ones (and re-activating any inserted concurrently).
+
+Addresses are stored lower-cased, but rows saved before this normalization
+may be mixed-case, so existing subscribers are matched on LOWER(email)
+(indexed) and updated under their stored spelling.
+"""
+import csv
+import json
+
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import transaction
+from django.db.models.functions import Lower
+
+from .models import NewsletterSubscriber
+
+
+def normalize_email(value):
+    """Lower-cased, stripped address, or None if it is not a valid email."""
+    email = (value or '').strip().lower()
+    try:
+        validate_email(email)
+    except ValidationError:
+        return None
+    return email
+
+
+def read_subscriber_file(file, file_format='csv'):
+    """
+    Yield raw addresses from an open CSV or JSONL file, one row at a time.
+    CSV files use their 'email' column if they have a header, else the first
+    column. JSONL lines are objects with an 'email' key, or plain strings.
+    """
+    if file_format == 'jsonl':
+        for line in file:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                yield ''
+                continue
+            yield record.get('email', '') if isinstance(record, dict) else str(record)
+        return
+
+    reader = csv.reader(file)
+    first = next(reader, None)
+    if first is None:
+        return
+    header = [column.strip().lower() for column in first]
+    if 'email' in header:
+        column = header.index('email')
+    else:
+        column = 0
+        yield first[0] if first else ''
+    for row in reader:
+        yield row[column] if len(row) > column else ''
+
+
+def _write_batch(emails, reactivate):
+    # {normalized email: (stored email, is_active)}
+    existing = {
+        normalized: (stored, is_active)
+        for normalized, stored, is_active in NewsletterSubscriber.objects.annotate(
+            normalized=Lower('email')
+        ).filter(normalized__in=emails).values_list('normalized', 'email', 'is_active')
+    }
+    new = [email for email in emails if email not in existing]
+    inactive = [stored for stored, is_active in existing.values() if not is_active] if reactivate else []
+
+    with transaction.atomic():
+        if inactive:
+            NewsletterSubscriber.objects.filter(email__in=inactive).update(is_active=True, unsubscribed_at=None)
+        NewsletterSubscriber.objects.bulk_create(
+            [NewsletterSubscriber(email=email, is_active=True, unsubscribed_at=None) for email in new],
+            update_conflicts=True,
+            unique_fields=['email'],
+            update_fields=['is_active', 'unsubscribed_at'],
+        )
+    return {
+        'inserted': len(new),
+        'reactivated': len(inactive),
+        'skipped': len(emails) - len(new) - len(inactive),
+    }
+
+
+def import_subscribers(emails, batch_size=1000, reactivate=True, on_batch=None):
+    """
+    Import addresses in batches. Returns totals for inserted, reactivated,
+    skipped (already active, or inactive with reactivate=False), duplicate
+    and invalid addresses. on_batch(number, counts) is called after each batch.
+    """
+    totals = {'inserted': 0, 'reactivated': 0, 'skipped': 0, 'duplicate': 0, 'invalid': 0}
+    seen = set()
+    batch = []
+    batch_number = 0
+
+    def flush():
+        nonlocal batch, batch_number
+        counts = _write_batch(batch, reactivate)
+        for key, value in counts.items():
+            totals[key] += value
+        batch_number += 1
+        if on_batch:
+            on_batch(batch_number, counts)
+        batch = []
+
+    for value in emails:
+        email = normalize_email(value)
+        if email is None:
+            totals['invalid'] += 1
+        elif email in seen:
+            totals['duplicate'] += 1
+        else:
+            seen.add(email)
+            batch.append(email)
+            if len(batch) >= batch_size:
+                flush()
+    if batch:
+        flush()
+    return totals
@@ -0,0 +1,150 @@
+"""
+Tests for store app.
+"""
+from datetime import timedelta
+
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from .models import NewsletterCampaign, NewsletterSubscriber, OutboxMessage
+from .newsletter import MailServerUnavailable, send_newsletter
+from .outbox import CLAIM_LEASE, claim_batch, deliver_outbox, enqueue_email
+from .subscribers import import_subscribers
+
+
+class FailingEmailBackend(EmailBackend):
+    """locmem backend that refuses every message, like an SMTP server that is down."""
+
+    def send_messages(self, messages):
+        raise ConnectionRefusedError('SMTP unavailable')
+
+
+@override_settings(EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend')
+class OutboxDeliveryTests(TestCase):
+    """Queued emails are delivered in batches and retried with backoff."""
+
+    def test_pending_messages_are_sent_and_marked(self):
+        for index in range(5):
+            enqueue_email(f'Message {index}', 'Body', [f'user{index}@example.com'])
+
+        counts = deliver_outbox(batch_size=2)
+
+        self.assertEqual(counts, {'sent': 5, 'retried': 0, 'failed': 0})
+        self.assertEqual(len(mail.outbox), 5)
+        self.assertFalse(OutboxMessage.objects.exclude(status=OutboxMessage.SENT).exists())
+
+    def test_failures_back_off_then_fail_permanently(self):
+        message = enqueue_email('Hello', 'Body', ['user@example.com'])
+        backend = f'{__name__}.FailingEmailBackend'
+
+        self.assertEqual(deliver_outbox(max_attempts=2, backend=backend)['retried'], 1)
+        message.refresh_from_db()
+        self.assertEqual(message.status, OutboxMessage.PENDING)
+        self.assertGreater(message.next_attempt_at, timezone.now())
+        self.assertIn('SMTP unavailable', message.last_error)
+
+        # Not due yet: nothing is attempted
+        self.assertEqual(deliver_outbox(max_attempts=2, backend=backend)['retried'], 0)
+
+        OutboxMessage.objects.update(next_attempt_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(deliver_outbox(max_attempts=2, backend=backend)['failed'], 1)
+        message.refresh_from_db()
+        self.assertEqual(message.status, OutboxMessage.FAILED)
+        self.assertEqual(message.attempts, 2)
+
+    def test_claimed_messages_are_leased_to_one_worker(self):
+        for index in range(3):
+            enqueue_email(f'Message {index}', 'Body', [f'user{index}@example.com'])
+
+        claimed = claim_batch(batch_size=2)
+        self.assertEqual([message.attempts for message in claimed], [1, 1])
+        # Another worker only gets what is left
+        self.assertEqual(len(claim_batch(batch_size=10)), 1)
+        self.assertEqual(claim_batch(batch_size=10), [])
+
+        # A worker that died mid-batch: its messages become due again after the lease
+        OutboxMessage.objects.update(next_attempt_at=timezone.now() - CLAIM_LEASE)
+        self.assertEqual(deliver_outbox()['sent'], 3)
+        self.assertEqual(len(mail.outbox), 3)
+
+
+class UnreachableEmailBackend(EmailBackend):
+    """locmem backend whose connection cannot be opened, like an SMTP login failure."""
+
+    def open(self):
+        raise ConnectionRefusedError('SMTP login failed')
+
+
+@override_settings(EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend')
+class NewsletterDeliveryTests(TestCase):
+    """Newsletter sends that fail are handed to the outbox, HTML included."""
+
+    def setUp(self):
+        for index in range(4):
+            NewsletterSubscriber.objects.create(email=f'reader{index}@example.com')
+        self.campaign = NewsletterCampaign.objects.create(name='march', subject='March news')
+
+    def test_connection_failures_are_recorded_not_raised(self):
+        campaign = send_newsletter(self.campaign, 'Text', '<p>HTML</p>', connections=2,
+                                   backend=f'{__name__}.UnreachableEmailBackend')
+
+        self.assertEqual((campaign.sent_count, campaign.failed_count), (0, 4))
+        self.assertIsNotNone(campaign.finished_at)
+        failed = OutboxMessage.objects.get(recipients=['reader0@example.com'])
+        self.assertIn('SMTP login failed', failed.last_error)
+
+        # The outbox retry keeps the HTML alternative
+        OutboxMessage.objects.update(next_attempt_at=timezone.now())
+        self.assertEqual(deliver_outbox()['sent'], 4)
+        self.assertEqual(mail.outbox[0].alternatives, [('<p>HTML</p>', 'text/html')])
+
+
+    def test_unavailable_server_stops_the_run(self):
+        with self.assertRaises(MailServerUnavailable):
+            send_newsletter(self.campaign, 'Text', connections=1, chunk_size=3, max_failures=2,
+                            backend=f'{__name__}.UnreachableEmailBackend')
+
+        self.campaign.refresh_from_db()
+        self.assertIsNone(self.campaign.finished_at)
+        # Only the attempted sends were queued; the rest is left for the rerun
+        self.assertEqual((self.campaign.last_subscriber_id, self.campaign.failed_count), (
+            NewsletterSubscriber.objects.order_by('id')[1].id, 2
+        ))
+        self.assertEqual(OutboxMessage.objects.count(), 2)
+
+        campaign = send_newsletter(self.campaign, 'Text', connections=1)
+        self.assertIsNotNone(campaign.finished_at)
+        self.assertEqual(campaign.sent_count, 2)
+        self.assertEqual(sorted(message.to[0] for message in mail.outbox), ['reader2@example.com', 'reader3@example.com'])
+
+
+class SubscriberImportTests(TestCase):
+    """Imported addresses are normalized, de-duplicated and upserted in batches."""
+
+    def test_import_inserts_reactivates_and_skips(self):
+        NewsletterSubscriber.objects.create(email='old@example.com', is_active=False)
+        NewsletterSubscriber.objects.create(email='active@example.com')
+        batches = []
+
+        totals = import_subscribers(
+            [' New@Example.com', 'new@example.com', 'OLD@example.com', 'active@example.com', 'nope'],
+            batch_size=2,
+            on_batch=lambda number, counts: batches.append(counts),
+        )
+
+        self.assertEqual(totals, {'inserted': 1, 'reactivated': 1, 'skipped': 1, 'duplicate': 1, 'invalid': 1})
+        self.assertEqual(len(batches), 2)
+        self.assertEqual(NewsletterSubscriber.objects.filter(is_active=True).count(), 3)
+        self.assertIsNone(NewsletterSubscriber.objects.get(email='old@example.com').unsubscribed_at)
+
+    def test_existing_mixed_case_rows_are_matched(self):
+        NewsletterSubscriber.objects.create(email='Ada@Example.com', is_active=False)
+        NewsletterSubscriber.objects.create(email='BOB@example.com')
+
+        totals = import_subscribers(['ada@example.com', 'bob@EXAMPLE.com', 'cy@example.com'])
+
+        self.assertEqual(totals, {'inserted': 1, 'reactivated': 1, 'skipped': 1, 'duplicate': 0, 'invalid': 0})
+        self.assertEqual(NewsletterSubscriber.objects.count(), 3)
+        self.assertTrue(NewsletterSubscriber.objects.get(email='Ada@Example.com').is_active)
@@ -3,10 +3,10 @@ Views for store app.
 """
 from django.shortcuts import render, redirect
 from django.contrib import messages
-from django.core.mail import send_mail
 from django.conf import settings
-from .models import NewsletterSubscriber
 from .forms import ContactForm, NewsletterForm
+from .outbox import enqueue_email
+from .subscribers import import_subscribers
 
 
 def about_view(request):
@@ -23,13 +23,11 @@ def contact_view(request):
     if request.method == 'POST':
         form = ContactForm(request.POST)
         if form.is_valid():
-            # Send email
-            send_mail(
+            # Queue email (delivered by send_outbox)
+            enqueue_email(
                 subject=f"Contact Form: {form.cleaned_data['subject']}",
-                message=f"From: {form.cleaned_data['name']} ({form.cleaned_data['email']})\n\n{form.cleaned_data['message']}",
-                from_email=settings.DEFAULT_FROM_EMAIL,
+                body=f"From: {form.cleaned_data['name']} ({form.cleaned_data['email']})\n\n{form.cleaned_data['message']}",
                 recipient_list=[settings.DEFAULT_FROM_EMAIL],
-                fail_silently=False,
             )
             messages.success(request, 'Thank you for contacting us! We will get back to you soon.')
             return redirect('store:contact')
@@ -59,20 +57,12 @@ def newsletter_subscribe_view(request):
     if request.method == 'POST':
         form = NewsletterForm(request.POST)
         if form.is_valid():
-            email = form.cleaned_data['email']
-            subscriber, created = NewsletterSubscriber.objects.get_or_create(
-                email=email,
-                defaults={'is_active': True}
-            )
-            
-            if not created:
-                if subscriber.is_active:
-                    messages.info(request, 'You are already subscribed to our newsletter.')
-                else:
-                    subscriber.is_active = True
-                    subscriber.unsubscribed_at = None
-                    subscriber.save()
-                    messages.success(request, 'You have been resubscribed to our newsletter!')
+            counts = import_subscribers([form.cleaned_data['email']])
+
+            if counts['skipped']:
+                messages.info(request, 'You are already subscribed to our newsletter.')
+            elif counts['reactivated']:
+                messages.success(request, 'You have been resubscribed to our newsletter!')
             else:
                 messages.success(request, 'Thank you for subscribing to our newsletter!')
             